@@ -3,17 +3,26 @@
 from typing import Any, Optional
 
 from boto3 import Session
+from botocore.config import Config
 
 from instance_scheduler.util import get_boto_config
 
 
 def get_client_with_standard_retry(
-    service_name: str, region: Optional[str] = None, session: Optional[Session] = None
+    service_name: str,
+    region: Optional[str] = None,
+    session: Optional[Session] = None,
+    max_pool_connections: Optional[int] = None,
 ) -> Any:
     aws_session = session if session is not None else Session()
 
+    config = get_boto_config()
+    if max_pool_connections is not None:
+        # clients shared by worker threads need one connection per worker
+        config = config.merge(Config(max_pool_connections=max_pool_connections))
+
     result = aws_session.client(
-        service_name=service_name, region_name=region, config=get_boto_config()
+        service_name=service_name, region_name=region, config=config
     )
 
     return result
@@ -1,8 +1,9 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
+from bisect import bisect_right
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import Optional, Sequence, TypedDict
+from datetime import date, datetime, time, timedelta
+from typing import Final, NamedTuple, Optional, Sequence, TypedDict
 from zoneinfo import ZoneInfo
 
 from aws_lambda_powertools import Logger as PowerToolsLogger
@@ -31,12 +32,45 @@ DEBUG_USED_PERIOD = 'Using period "{}" to set the desired state and instance siz
 DEBUG_USED_TIME_FOR_SCHEDULE = "Time used to determine desired for instance is {}"
 
 
+SECONDS_PER_DAY: Final = 24 * 60 * 60
+# compiled transition tables are kept for this many local dates per schedule
+MAX_CACHED_TRANSITION_TABLES: Final = 8
+
+
 class PeriodWithDesiredState(TypedDict):
     period: RunningPeriod
     instancetype: Optional[str]
     state: ScheduleState
 
 
+class ScheduleTransition(NamedTuple):
+    """the desired state of a schedule from {second} (seconds since local midnight) until the next transition"""
+
+    second: int
+    state: ScheduleState
+    instance_type: Optional[str]
+    period_name: Optional[str]
+
+
+class DailyTransitionTable:
+    """
+    the desired states of a schedule over a single local date as a sorted list of transitions, the first
+    transition always starts at midnight
+    """
+
+    def __init__(self, transitions: list[ScheduleTransition]) -> None:
+        self.transitions: Final = transitions
+        self._seconds: Final = [transition.second for transition in transitions]
+
+    def at(self, second: int) -> ScheduleTransition:
+        """the transition that is in effect {second} seconds after local midnight"""
+        return self.transitions[bisect_right(self._seconds, second) - 1]
+
+
+def _seconds_of(t: time) -> int:
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
 @dataclass
 class InstanceSchedule:
     name: str
@@ -53,6 +87,7 @@ class InstanceSchedule:
 
     def __post_init__(self) -> None:
         self._logger: Optional[Logger | PowerToolsLogger] = None
+        self._transition_tables: dict[date, DailyTransitionTable] = {}
 
     def _log_debug(self, msg: str, *args: Optional[str]) -> None:
         if self._logger is not None:
@@ -203,11 +238,85 @@ class InstanceSchedule:
             self._log_debug(DEBUG_OVERRIDE_STATUS, self.override_status, desired_state)
             return desired_state, None, "override_status"
 
-        # get a list of all period schedules along with their desired states at the specified time
-        periods_with_desired_states = self.get_periods_with_desired_states(
-            localized_time
+        transition = self.get_transition_table(localized_time.date()).at(
+            _seconds_of(localized_time.time())
+        )
+        self._log_debug(
+            "Desired state at {} is {} (period {})",
+            localized_time.strftime("%H:%M:%S"),
+            transition.state,
+            transition.period_name,
+        )
+        return transition.state, transition.instance_type, transition.period_name
+
+    def get_transition_table(self, local_date: date) -> DailyTransitionTable:
+        """
+        the compiled transitions of this schedule's periods on a date in the schedule's timezone
+
+        tables are compiled on first use and cached per date, so that repeated lookups on the same day are a
+        bisect instead of an evaluation of every period
+        """
+        table = self._transition_tables.get(local_date)
+        if table is None:
+            table = self._compile_transition_table(local_date)
+            if len(self._transition_tables) >= MAX_CACHED_TRANSITION_TABLES:
+                del self._transition_tables[next(iter(self._transition_tables))]
+            self._transition_tables[local_date] = table
+        return table
+
+    def _compile_transition_table(self, local_date: date) -> DailyTransitionTable:
+        # periods can only change state at midnight and at their begin/end times, evaluate the schedule at each
+        # of these instants to find the desired state of the segment that starts there
+        is_active_on_date: Final = [
+            period["period"].cron_recurrence.contains_days(
+                local_date, local_date + timedelta(days=1)
+            )[0]
+            == 1
+            for period in self.periods
+        ]
+        breakpoints: Final = sorted(
+            {0}
+            | {
+                _seconds_of(boundary)
+                for period, is_active in zip(self.periods, is_active_on_date)
+                if is_active
+                for boundary in (period["period"].begintime, period["period"].endtime)
+                if boundary is not None
+            }
         )
 
+        transitions: Final[list[ScheduleTransition]] = []
+        for second in breakpoints:
+            instant = datetime.combine(
+                local_date, time(second // 3600, second // 60 % 60, second % 60)
+            )
+            transition = ScheduleTransition(
+                second,
+                *self._combine_period_states(
+                    [
+                        {
+                            "period": period["period"],
+                            "instancetype": period.get("instancetype", None),
+                            "state": (
+                                period["period"].check_time(instant)
+                                if is_active
+                                else ScheduleState.STOPPED
+                            ),
+                        }
+                        for period, is_active in zip(self.periods, is_active_on_date)
+                    ]
+                ),
+            )
+            if transitions and transitions[-1][1:] == transition[1:]:
+                continue
+            transitions.append(transition)
+
+        return DailyTransitionTable(transitions)
+
+    @staticmethod
+    def _combine_period_states(
+        periods_with_desired_states: list[PeriodWithDesiredState],
+    ) -> tuple[ScheduleState, Optional[str], Optional[str]]:
         # desired states have a relative priority of running > any > stopped. The desired state of a schedule is
         # the highest priority state of any period within that schedule
         if any(period["state"] == "running" for period in periods_with_desired_states):
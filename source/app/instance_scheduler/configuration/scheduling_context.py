@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 import datetime
 import time
+import zlib
 from collections.abc import Mapping
 from dataclasses import dataclass, field
 from typing import Optional, TypedDict
@@ -28,6 +29,9 @@ class SchedulingContext:
     scheduling_interval_minutes: int
     started_tags: list[TagTemplate] = field(default_factory=list)
     stopped_tags: list[TagTemplate] = field(default_factory=list)
+    # when a target is split into multiple shards, only the instances of this shard are scheduled
+    shard_index: int = 0
+    shard_count: int = 1
 
     def __post_init__(self) -> None:
         if not is_aware(self.current_dt):
@@ -45,6 +49,15 @@ class SchedulingContext:
             return None
         return self.schedules[name] if name in self.schedules else None
 
+    def is_in_shard(self, instance_id: str) -> bool:
+        """
+        test if an instance belongs to the shard scheduled in this context, uses a stable hash of the instance id
+        so that every instance is always assigned to the same shard
+        """
+        if self.shard_count <= 1:
+            return True
+        return zlib.crc32(instance_id.encode()) % self.shard_count == self.shard_index
+
 
 def get_time_from_string(timestr: Optional[str]) -> Optional[datetime.time]:
     """
@@ -1,10 +1,11 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
 from typing import Any
 
 from instance_scheduler.cron.cron_to_running_period import (
+    days_matching,
     monthday_cron_expr_contains,
     months_cron_expr_contains,
     weekday_cron_expr_contains,
@@ -59,3 +60,15 @@ class CronRecurrenceExpression:
                 weekday_cron_expr_contains(self.weekdays, dt),
             )
         )
+
+    def contains_days(self, start: date, end: date) -> bytearray:
+        """
+        Which days in the half-open range [`start`, `end`) satisfy the recurrence, one byte per day (1 or 0)
+        """
+        return days_matching(
+            monthdays=self.monthdays,
+            months=self.months,
+            weekdays=self.weekdays,
+            start=start,
+            end=end,
+        )
@@ -4,6 +4,8 @@
 from calendar import monthrange
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Final
 
 from instance_scheduler.cron.expression import (
     CronAll,
@@ -67,6 +69,160 @@ def in_period(expr: FullCronExpression, dt: datetime) -> bool:
     )
 
 
+# per-month bitmaps are cached for this many (expression, month) combinations, roughly a 10-year forecast of 30
+# distinct expressions
+MONTH_BITMAP_CACHE_SIZE: Final = 4096
+
+
+def in_period_days(expr: FullCronExpression, start: date, end: date) -> bytearray:
+    """
+    Which days in the half-open range [`start`, `end`) satisfy the recurrence defined in `expr`
+
+    :return: a mask with one byte per day in the range, 1 if the day satisfies the recurrence and 0 otherwise
+    """
+    return days_matching(
+        monthdays=expr.days_of_month,
+        months=expr.months_of_year,
+        weekdays=expr.days_of_week,
+        start=start,
+        end=end,
+    )
+
+
+def days_matching(
+    *,
+    monthdays: CronExpression,
+    months: CronExpression,
+    weekdays: CronExpression,
+    start: date,
+    end: date,
+) -> bytearray:
+    """
+    batch equivalent of testing every day in the half-open range [`start`, `end`) with the *_cron_expr_contains
+    functions. Days are resolved one month at a time from cached per-month bitmaps (bit `n - 1` is set when
+    day `n` of the month matches), so forecasts spanning several years only resolve each month once
+
+    :return: a mask with one byte per day in the range, 1 if the day satisfies all expressions and 0 otherwise
+    """
+    mask: Final = bytearray()
+    month_start = start
+    while month_start < end:
+        _, days_in_month = monthrange(month_start.year, month_start.month)
+        bitmap = (
+            _monthdays_bitmap(monthdays, month_start.year, month_start.month)
+            & _months_bitmap(months, month_start.year, month_start.month)
+            & _weekdays_bitmap(weekdays, month_start.year, month_start.month)
+        )
+        last_day = min(days_in_month, month_start.day + (end - month_start).days - 1)
+        mask.extend(
+            (bitmap >> (day - 1)) & 1 for day in range(month_start.day, last_day + 1)
+        )
+        month_start = date(month_start.year, month_start.month, 1) + timedelta(
+            days=days_in_month
+        )
+    return mask
+
+
+def _bitmap_of(monthdays: set[int]) -> int:
+    bitmap = 0
+    for monthday in monthdays:
+        bitmap |= 1 << (monthday - 1)
+    return bitmap
+
+
+def _all_days_bitmap(year: int, month: int) -> int:
+    _, days_in_month = monthrange(year, month)
+    return (1 << days_in_month) - 1
+
+
+@lru_cache(maxsize=MONTH_BITMAP_CACHE_SIZE)
+def _months_bitmap(expr: CronExpression, year: int, month: int) -> int:
+    """all days of the month when the month satisfies `expr`, no days otherwise"""
+    if months_cron_expr_contains(expr, datetime(year, month, 1)):
+        return _all_days_bitmap(year, month)
+    return 0
+
+
+@lru_cache(maxsize=MONTH_BITMAP_CACHE_SIZE)
+def _monthdays_bitmap(expr: CronExpression, year: int, month: int) -> int:
+    """the days of the month that satisfy `expr` when interpreted as a days-of-month expression"""
+    _, days_in_month = monthrange(year, month)
+    monthdays_domain = IntDomain(1, days_in_month)
+
+    match expr:
+        case CronAll():
+            return _all_days_bitmap(year, month)
+        case CronSingleValueNumeric():
+            return (
+                _bitmap_of({expr.value}) if monthdays_domain.contains(expr.value) else 0
+            )
+        case CronRange():
+            return _bitmap_of(_range_to_discrete_values(expr, monthdays_domain))
+        case CronUnion():
+            bitmap = 0
+            for sub_expr in expr.exprs:
+                bitmap |= _monthdays_bitmap(sub_expr, year, month)
+            return bitmap
+        case CronSingleValueLast():
+            return _bitmap_of({monthdays_domain.end})
+        case CronNearestWeekday():
+            return _bitmap_of(
+                {
+                    resolve_nearest_weekday_as_monthday(
+                        expr.value.value, date(year, month, 1)
+                    )
+                }
+            )
+        case CronNthWeekday():
+            raise ValueError("Nth Weekday not supported by monthday expression")
+        case CronLastWeekday():
+            raise ValueError("Last Weekday not supported by monthday expression")
+
+
+@lru_cache(maxsize=MONTH_BITMAP_CACHE_SIZE)
+def _weekdays_bitmap(expr: CronExpression, year: int, month: int) -> int:
+    """the days of the month that satisfy `expr` when interpreted as a days-of-week expression"""
+    weekdays_domain = IntDomain(0, 6)
+
+    def on_weekdays(weekdays: set[int]) -> int:
+        first_weekday = date(year, month, 1).weekday()
+        _, days_in_month = monthrange(year, month)
+        return _bitmap_of(
+            {
+                monthday
+                for monthday in range(1, days_in_month + 1)
+                if (first_weekday + monthday - 1) % 7 in weekdays
+            }
+        )
+
+    match expr:
+        case CronAll():
+            return _all_days_bitmap(year, month)
+        case CronSingleValueNumeric():
+            return on_weekdays({expr.value})
+        case CronRange():
+            return on_weekdays(_range_to_discrete_values(expr, weekdays_domain))
+        case CronUnion():
+            bitmap = 0
+            for sub_expr in expr.exprs:
+                bitmap |= _weekdays_bitmap(sub_expr, year, month)
+            return bitmap
+        case CronSingleValueLast():
+            return on_weekdays({weekdays_domain.end})
+        case CronNearestWeekday():
+            # the days-of-week parser never produces a nearest weekday expression
+            raise ValueError("Nearest Weekday not supported by weekday expression")
+        case CronNthWeekday():
+            monthday = resolve_nth_weekday_as_monthday(
+                weekday=expr.day.value, n=expr.n, reference_date=date(year, month, 1)
+            )
+            return _bitmap_of({monthday}) if monthday > 0 else 0
+        case CronLastWeekday():
+            return _bitmap_of(
+                {resolve_last_weekday_as_monthday(expr.day.value, date(year, month, 1))}
+            )
+
+
 def months_cron_expr_contains(expr: CronExpression, dt: datetime) -> bool:
     """
     Does `dt` satisfy `expr` when interpreted as a months-of-year expression
@@ -12,9 +12,9 @@ we only have to define one set of parsers.
 import re
 from collections.abc import Callable, Mapping
 from dataclasses import replace
-from functools import partial
+from functools import lru_cache, partial
 from itertools import chain
-from typing import Final
+from typing import Final, Optional
 
 from instance_scheduler.cron.expression import (
     CronAll,
@@ -36,6 +36,10 @@ from instance_scheduler.cron.validator import (
 
 PeriodDefnStr = set[str] | None
 
+# the same handful of expressions are parsed for every period on every load of the configuration, parsed expressions
+# are immutable so they can be shared between all periods
+PARSE_CACHE_SIZE: Final = 1024
+
 
 def parse_period_def(
     *,
@@ -50,26 +54,45 @@ def parse_period_def(
     )
 
 
+def _freeze(exprs: PeriodDefnStr) -> Optional[frozenset[str]]:
+    return None if exprs is None else frozenset(exprs)
+
+
 def parse_months_expr(months_expr: PeriodDefnStr) -> CronExpression:
+    return _parse_months_expr(_freeze(months_expr))
+
+
+def parse_monthdays_expr(monthdays_expr: PeriodDefnStr) -> CronExpression:
+    return _parse_monthdays_expr(_freeze(monthdays_expr))
+
+
+def parse_weekdays_expr(weekdays_expr: PeriodDefnStr) -> CronExpression:
+    return _parse_weekdays_expr(_freeze(weekdays_expr))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_months_expr(months_expr: Optional[frozenset[str]]) -> CronExpression:
     result: Final = _parse_multi_general(months_expr, _month_name_to_value)
     validate_months_expression(result)
     return result
 
 
-def parse_monthdays_expr(monthdays_expr: PeriodDefnStr) -> CronExpression:
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_monthdays_expr(monthdays_expr: Optional[frozenset[str]]) -> CronExpression:
     result: Final = _parse_multi_general(monthdays_expr, {})
     validate_monthdays_expression(result)
     return result
 
 
-def parse_weekdays_expr(weekdays_expr: PeriodDefnStr) -> CronExpression:
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_weekdays_expr(weekdays_expr: Optional[frozenset[str]]) -> CronExpression:
     result: Final = _parse_multi_general(weekdays_expr, _weekday_name_to_value)
     validate_weekdays_expression(result)
     return result
 
 
 def _parse_multi_general(
-    exprs: PeriodDefnStr, domain: Mapping[str, int]
+    exprs: PeriodDefnStr | frozenset[str], domain: Mapping[str, int]
 ) -> CronExpression:
     if exprs is None:
         return CronAll()
@@ -93,22 +116,30 @@ def _parse_single_general(expr: str, domain: Mapping[str, int]) -> CronExpressio
 
 
 def _general_parse(expr: str, domain: Mapping[str, int]) -> CronExpression:
-    parsers: Final[list[Callable[[str], CronExpression]]] = [
-        partial(_parse_single_value_general, domain=domain),
-        _parse_all_values,
-        _parse_last_value,
-        partial(_parse_step, domain=domain),
-        partial(_parse_range, domain=domain),
-        partial(_parse_nth_weekday, domain=domain),
-        partial(_parse_last_weekday, domain=domain),
-        _parse_nearest_weekday,
-    ]
-    for parser in parsers:
-        try:
-            return parser(expr)
-        except ValueError:
-            pass
-    raise ValueError(f"Could not parse as any form of cron expression: {expr}")
+    """
+    select the only parser that can accept the expression from its structure, the separators "/", "#" and "-"
+    and the suffixes "L" and "W" can only be produced by a single form of expression each
+    """
+    parser: Callable[[str], CronExpression]
+    if _single_value_re.match(expr) or expr in domain or _last_re.match(expr):
+        parser = partial(_parse_single_value_general, domain=domain)
+    elif all_values_re.match(expr):
+        parser = _parse_all_values
+    elif "/" in expr:
+        parser = partial(_parse_step, domain=domain)
+    elif "#" in expr:
+        parser = partial(_parse_nth_weekday, domain=domain)
+    elif "-" in expr:
+        parser = partial(_parse_range, domain=domain)
+    elif _last_weekday_re.match(expr):
+        parser = partial(_parse_last_weekday, domain=domain)
+    else:
+        parser = _parse_nearest_weekday
+
+    try:
+        return parser(expr)
+    except ValueError:
+        raise ValueError(f"Could not parse as any form of cron expression: {expr}")
 
 
 # period definitions are not localized
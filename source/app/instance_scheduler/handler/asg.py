@@ -2,16 +2,13 @@
 # SPDX-License-Identifier: Apache-2.0
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Any, Final, Set, cast
+from typing import TYPE_CHECKING, Any, Final, Set
 from uuid import uuid4
 
 from aws_lambda_powertools.logging import Logger
 
 from instance_scheduler.handler.environments.asg_env import AsgEnv
-from instance_scheduler.handler.scheduling_request import (
-    SchedulingRequest,
-    validate_scheduler_request,
-)
+from instance_scheduler.handler.scheduling_request import decode_scheduler_request
 from instance_scheduler.model.period_definition import PeriodDefinition
 from instance_scheduler.model.store.dynamo_period_definition_store import (
     DynamoPeriodDefinitionStore,
@@ -62,8 +59,7 @@ def lambda_handler(event: dict[str, Any], context: LambdaContext) -> None:
     # correlation ID should eventually come from event
     logger.set_correlation_id(str(uuid4()))
 
-    validate_scheduler_request(event)
-    request: Final = cast(SchedulingRequest, event)
+    request: Final = decode_scheduler_request(event)
 
     [num_tagged_auto_scaling_groups, num_schedules] = schedule_auto_scaling_groups(
         schedule_tag_key=env.schedule_tag_key,
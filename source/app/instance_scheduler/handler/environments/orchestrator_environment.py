@@ -17,6 +17,7 @@ class OrchestratorEnvironment:
     # references
     scheduling_request_handler_name: str
     config_table_name: str
+    state_table_name: str
     # scheduling
     enable_schedule_hub_account: bool
     enable_ec2_service: bool
@@ -26,6 +27,10 @@ class OrchestratorEnvironment:
     enable_docdb_service: bool
     enable_asg_service: bool
     schedule_regions: list[str]
+    # dispatch
+    scheduling_request_dispatch_concurrency: int
+    scheduling_request_batch_max_instances: int
+    scheduling_request_shard_max_instances: int
 
     # used for metrics only
     default_timezone: ZoneInfo
@@ -46,6 +51,7 @@ class OrchestratorEnvironment:
                 topic_arn=environ["ISSUES_TOPIC_ARN"],
                 enable_debug_logging=env_to_bool(environ["ENABLE_DEBUG_LOGS"]),
                 config_table_name=environ["CONFIG_TABLE"],
+                state_table_name=environ["STATE_TABLE"],
                 scheduling_request_handler_name=environ[
                     "SCHEDULING_REQUEST_HANDLER_NAME"
                 ],
@@ -60,6 +66,16 @@ class OrchestratorEnvironment:
                 enable_docdb_service=env_to_bool(environ["ENABLE_DOCDB_SERVICE"]),
                 enable_asg_service=env_to_bool(environ["ENABLE_ASG_SERVICE"]),
                 schedule_regions=env_to_list(environ["SCHEDULE_REGIONS"]),
+                # dispatch
+                scheduling_request_dispatch_concurrency=int(
+                    environ.get("SCHEDULING_REQUEST_DISPATCH_CONCURRENCY", "1")
+                ),
+                scheduling_request_batch_max_instances=int(
+                    environ.get("SCHEDULING_REQUEST_BATCH_MAX_INSTANCES", "0")
+                ),
+                scheduling_request_shard_max_instances=int(
+                    environ.get("SCHEDULING_REQUEST_SHARD_MAX_INSTANCES", "0")
+                ),
                 # metrics data
                 default_timezone=ZoneInfo(environ["DEFAULT_TIMEZONE"]),
                 enable_rds_snapshots=env_to_bool(environ["ENABLE_RDS_SNAPSHOTS"]),
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from os import environ
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from instance_scheduler.schedulers.instance_states import InstanceStateLayout
 from instance_scheduler.util.app_env_utils import AppEnvError, env_to_bool, env_to_list
 
 
@@ -15,6 +16,11 @@ class SchedulingRequestEnvironment:
     enable_debug_logging: bool
     stack_name: str
     state_table_name: str
+    state_table_layout: InstanceStateLayout
+    # reuse the instance states cached by a warm container while they are unchanged in the state table
+    enable_instance_states_cache: bool
+    # prefetch the instance states of all targets of a batched request and save them once all targets are scheduled
+    enable_batched_instance_states: bool
     config_table_name: str
     maintenance_window_table_name: str
     scheduler_role_name: str
@@ -24,10 +30,16 @@ class SchedulingRequestEnvironment:
     stop_tags: list[str]
     schedule_tag_key: str
     enable_ops_monitoring: bool
+    # start/stop actions are sent to the service in batches of this size while instances are still being described
+    scheduling_action_batch_size: int
 
     # for ec2
     scheduler_frequency_minutes: int
     enable_ec2_ssm_maintenance_windows: bool
+    # only describe instances tagged with the name of a known schedule
+    ec2_describe_by_schedule_name: bool
+    # the maximum number of concurrent start/stop calls made for a single batch of instances
+    ec2_action_concurrency: int
 
     # for rds
     enable_rds_service: bool
@@ -35,6 +47,8 @@ class SchedulingRequestEnvironment:
     enable_docdb_service: bool
     enable_neptune_service: bool
     enable_rds_snapshots: bool
+    # the maximum number of rds resources started or stopped concurrently
+    rds_action_concurrency: int
 
     @staticmethod
     def from_env() -> "SchedulingRequestEnvironment":
@@ -47,6 +61,15 @@ class SchedulingRequestEnvironment:
                 stack_name=environ["STACK_NAME"],
                 config_table_name=environ["CONFIG_TABLE"],
                 state_table_name=environ["STATE_TABLE"],
+                state_table_layout=InstanceStateLayout(
+                    environ.get("STATE_TABLE_LAYOUT", InstanceStateLayout.SINGLE_ITEM)
+                ),
+                enable_instance_states_cache=env_to_bool(
+                    environ.get("ENABLE_INSTANCE_STATES_CACHE", "False")
+                ),
+                enable_batched_instance_states=env_to_bool(
+                    environ.get("ENABLE_BATCHED_INSTANCE_STATES", "False")
+                ),
                 maintenance_window_table_name=environ["MAINT_WINDOW_TABLE"],
                 scheduler_role_name=environ["SCHEDULER_ROLE_NAME"],
                 default_timezone=ZoneInfo(environ["DEFAULT_TIMEZONE"]),
@@ -56,13 +79,21 @@ class SchedulingRequestEnvironment:
                 enable_ec2_ssm_maintenance_windows=env_to_bool(
                     environ["ENABLE_EC2_SSM_MAINTENANCE_WINDOWS"]
                 ),
+                ec2_describe_by_schedule_name=env_to_bool(
+                    environ.get("EC2_DESCRIBE_BY_SCHEDULE_NAME", "False")
+                ),
+                ec2_action_concurrency=int(environ.get("EC2_ACTION_CONCURRENCY", "4")),
                 enable_rds_service=env_to_bool(environ["ENABLE_RDS_SERVICE"]),
                 enable_rds_clusters=env_to_bool(environ["ENABLE_RDS_CLUSTERS"]),
                 enable_neptune_service=env_to_bool(environ["ENABLE_NEPTUNE_SERVICE"]),
                 enable_docdb_service=env_to_bool(environ["ENABLE_DOCDB_SERVICE"]),
                 enable_rds_snapshots=env_to_bool(environ["ENABLE_RDS_SNAPSHOTS"]),
+                rds_action_concurrency=int(environ.get("RDS_ACTION_CONCURRENCY", "4")),
                 scheduler_frequency_minutes=int(environ["SCHEDULING_INTERVAL_MINUTES"]),
                 enable_ops_monitoring=env_to_bool(environ["ENABLE_OPS_MONITORING"]),
+                scheduling_action_batch_size=int(
+                    environ.get("SCHEDULING_ACTION_BATCH_SIZE", "100")
+                ),
             )
         except ZoneInfoNotFoundError as err:
             raise AppEnvError(f"Invalid timezone: {err.args[0]}") from err
@@ -70,3 +101,7 @@ class SchedulingRequestEnvironment:
             raise AppEnvError(
                 f"Missing required application environment variable: {err.args[0]}"
             ) from err
+        except ValueError as err:
+            raise AppEnvError(
+                f"Invalid application environment variable: {err.args[0]}"
+            ) from err
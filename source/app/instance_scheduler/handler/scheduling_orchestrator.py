@@ -3,14 +3,27 @@
 import json
 import traceback
 from collections.abc import Mapping
-from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Any, Literal, Optional, TypedDict, TypeGuard, cast
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Final,
+    Literal,
+    Optional,
+    TypedDict,
+    TypeGuard,
+    cast,
+)
 
 from instance_scheduler.boto_retry import get_client_with_standard_retry
 from instance_scheduler.handler.environments.orchestrator_environment import (
     OrchestratorEnvironment,
 )
-from instance_scheduler.handler.scheduling_request import SchedulingRequest
+from instance_scheduler.handler.scheduling_request import (
+    SchedulingRequest,
+    SchedulingRequestTarget,
+)
 from instance_scheduler.model.ddb_config_item import DdbConfigItem
 from instance_scheduler.model.period_definition import (
     InvalidPeriodDefinition,
@@ -20,6 +33,10 @@ from instance_scheduler.model.schedule_definition import (
     InvalidScheduleDefinition,
     ScheduleDefinition,
 )
+from instance_scheduler.model.store.config_snapshot_store import (
+    ConfigSnapshot,
+    ConfigSnapshotStore,
+)
 from instance_scheduler.model.store.ddb_config_item_store import DdbConfigItemStore
 from instance_scheduler.model.store.dynamo_period_definition_store import (
     DynamoPeriodDefinitionStore,
@@ -37,6 +54,8 @@ from instance_scheduler.model.store.period_definition_store import PeriodDefinit
 from instance_scheduler.model.store.schedule_definition_store import (
     ScheduleDefinitionStore,
 )
+from instance_scheduler.model.store.target_stats_store import TargetStatsStore
+from instance_scheduler.model.target_stats import TargetStats
 from instance_scheduler.ops_metrics.metric_type.deployment_description_metric import (
     DeploymentDescriptionMetric,
     ScheduleFlagCounts,
@@ -44,7 +63,14 @@ from instance_scheduler.ops_metrics.metric_type.deployment_description_metric im
 from instance_scheduler.ops_metrics.metrics import collect_metric, should_collect_metric
 from instance_scheduler.util import safe_json
 from instance_scheduler.util.logger import Logger
-from instance_scheduler.util.scheduling_target import get_account_ids, list_all_targets
+from instance_scheduler.util.scheduling_target import (
+    SchedulingTarget,
+    batch_targets,
+    get_account_ids,
+    instance_count_estimator,
+    list_all_targets,
+    shard_targets,
+)
 from instance_scheduler.util.validation import ValidationException, validate_string
 
 if TYPE_CHECKING:
@@ -76,6 +102,77 @@ LAMBDA_PAYLOAD_CAPACITY_BYTES = (
     200_000  # is actually 256_000 but this provides some overhead
 )
 
+# snapshots are only needed by the scheduling requests dispatched in the same run, but are kept for a while
+# longer as asynchronous invocations may be retried
+CONFIG_SNAPSHOT_RETENTION: Final = timedelta(days=1)
+
+
+class SchedulingRequestPayloadBuilder:
+    """
+    Builds the encoded lambda payloads for scheduling requests that share the same schedules and periods
+
+    The shared schedules and periods are encoded once per orchestration run, only the per-target fields
+    of each request are encoded per payload and spliced together with the pre-encoded configuration.
+    When a config snapshot is provided, payloads only reference the snapshot instead
+    """
+
+    def __init__(
+        self,
+        schedules: InMemoryScheduleDefinitionStore,
+        periods: InMemoryPeriodDefinitionStore,
+        capacity_bytes: int,
+        config_snapshot: Optional[str] = None,
+    ) -> None:
+        self._capacity_bytes: Final = capacity_bytes
+        self._encoded_configs: Final[list[bytes]] = []
+        if config_snapshot is not None:
+            self._encoded_configs.append(
+                _encode_json_members({"config_snapshot": config_snapshot})
+            )
+        else:
+            # when a payload is too large, the configuration is switched to the compact format, then periods
+            # are stripped and then schedules as well. The request handler will reload whatever was stripped
+            compact_schedules: Final = schedules.serialize(compact=True)
+            self._encoded_configs.extend(
+                [
+                    _encode_json_members(
+                        {
+                            "schedules": schedules.serialize(),
+                            "periods": periods.serialize(),
+                        }
+                    ),
+                    _encode_json_members(
+                        {
+                            "schedules": compact_schedules,
+                            "periods": periods.serialize(compact=True),
+                        }
+                    ),
+                    _encode_json_members({"schedules": compact_schedules}),
+                    b"",
+                ]
+            )
+
+    def build(self, scheduler_request: SchedulingRequest) -> bytes:
+        """
+        encode a scheduling request together with as much of the shared configuration as fits within
+        the payload capacity. The result is identical to json encoding the combined request
+        """
+        encoded_request: Final = _encode_json_members(scheduler_request)
+        for encoded_config in self._encoded_configs:
+            payload = _join_json_members(encoded_request, encoded_config)
+            if len(payload) <= self._capacity_bytes:
+                break
+        return payload
+
+
+def _encode_json_members(obj: Mapping[str, Any]) -> bytes:
+    # the members of a json object without the enclosing braces
+    return str.encode(json.dumps(obj))[1:-1]
+
+
+def _join_json_members(*encoded_members: bytes) -> bytes:
+    return b"{" + b", ".join(members for members in encoded_members if members) + b"}"
+
 
 def handle_orchestration_request(
     event: Mapping[str, Any], context: LambdaContext
@@ -135,7 +232,12 @@ class SchedulingOrchestratorHandler:
         :return: lambda client
         """
         if self._lambda_client is None:
-            self._lambda_client = get_client_with_standard_retry("lambda")
+            self._lambda_client = get_client_with_standard_retry(
+                "lambda",
+                max_pool_connections=max(
+                    10, self._env.scheduling_request_dispatch_concurrency
+                ),
+            )
         return self._lambda_client
 
     def handle_request(self) -> list[Any]:
@@ -156,14 +258,31 @@ class SchedulingOrchestratorHandler:
             schedules, periods = prefetch_schedules_and_periods(self._env, self._logger)
             ddb_config_item = ddb_config_item_store.get()
 
-            serialized_schedules = schedules.serialize()
-            serialized_periods = periods.serialize()
+            config_snapshot = ConfigSnapshot(
+                schedules=schedules.serialize(), periods=periods.serialize()
+            )
+            config_snapshot_key = self._put_config_snapshot(config_snapshot)
+
+            payload_builder = SchedulingRequestPayloadBuilder(
+                schedules=schedules,
+                periods=periods,
+                capacity_bytes=LAMBDA_PAYLOAD_CAPACITY_BYTES,
+                config_snapshot=config_snapshot_key,
+            )
 
-            result = []
+            target_stats = self._load_target_stats()
 
-            scheduler_request = None
-            for target in list_all_targets(
-                ddb_config_item, self._env, self._logger, self._context
+            scheduler_requests: list[SchedulingRequest] = []
+            for target, *additional_targets in batch_targets(
+                shard_targets(
+                    list_all_targets(
+                        ddb_config_item, self._env, self._logger, self._context
+                    ),
+                    max_instances_per_shard=self._env.scheduling_request_shard_max_instances,
+                    stats=target_stats,
+                ),
+                max_instances_per_batch=self._env.scheduling_request_batch_max_instances,
+                estimate_instance_count=instance_count_estimator(target_stats),
             ):
                 current_dt_str = datetime.now(timezone.utc).isoformat()
                 scheduler_request = SchedulingRequest(
@@ -174,9 +293,23 @@ class SchedulingOrchestratorHandler:
                     current_dt=current_dt_str,
                     dispatch_time=datetime.now(timezone.utc).isoformat(),
                 )
-                scheduler_request["schedules"] = serialized_schedules
-                scheduler_request["periods"] = serialized_periods
-                result.append(self._run_scheduling_lambda(scheduler_request))
+                if target.shard_count > 1:
+                    scheduler_request["shard_index"] = target.shard_index
+                    scheduler_request["shard_count"] = target.shard_count
+                if additional_targets:
+                    scheduler_request["additional_targets"] = [
+                        SchedulingRequestTarget(
+                            account=additional_target.account,
+                            region=additional_target.region,
+                            service=additional_target.service,
+                        )
+                        for additional_target in additional_targets
+                    ]
+                scheduler_requests.append(scheduler_request)
+
+            result = self._dispatch_scheduling_requests(
+                scheduler_requests, payload_builder
+            )
 
             if not result:
                 self._logger.warning(
@@ -184,6 +317,9 @@ class SchedulingOrchestratorHandler:
                     " accounts and regions in your CloudFormation parameters"
                 )
 
+            if config_snapshot_key is not None:
+                self._delete_stale_config_snapshots(config_snapshot_key)
+
             if should_collect_metric(DeploymentDescriptionMetric):
                 collect_metric(
                     self.build_deployment_description_metric(
@@ -192,7 +328,11 @@ class SchedulingOrchestratorHandler:
                         periods,
                         self._env,
                         self._context,
-                        sample_scheduling_request=scheduler_request,
+                        sample_payload_size_bytes=(
+                            len(payload_builder.build(scheduler_requests[-1]))
+                            if scheduler_requests
+                            else 0
+                        ),
                     ),
                     logger=self._logger,
                 )
@@ -201,26 +341,137 @@ class SchedulingOrchestratorHandler:
         finally:
             self._logger.flush()
 
+    def _load_target_stats(self) -> dict[SchedulingTarget, TargetStats]:
+        """
+        load the statistics of the last scheduling run of every target
+
+        returns an empty mapping if the statistics could not be loaded, in which case targets are
+        neither sharded nor batched by their actual size
+        """
+        if (
+            self._env.scheduling_request_shard_max_instances <= 0
+            and self._env.scheduling_request_batch_max_instances <= 0
+        ):
+            return {}
+        try:
+            return {
+                SchedulingTarget.of(stats): stats
+                for stats in TargetStatsStore(self._env.state_table_name).find_all()
+            }
+        except Exception as e:
+            self._logger.warning("Unable to load scheduling statistics: ({})", e)
+            return {}
+
+    def _put_config_snapshot(self, config_snapshot: ConfigSnapshot) -> Optional[str]:
+        """
+        save the schedule and period configuration for this run as a snapshot that scheduling requests can
+        reference instead of carrying the configuration in their payload.
+
+        returns None if the snapshot could not be saved, in which case the configuration is sent inline
+        """
+        try:
+            key = ConfigSnapshotStore(self._env.config_table_name).put(
+                config_snapshot, created_at=datetime.now(timezone.utc)
+            )
+            self._logger.info("Saved config snapshot {}", key)
+            return key
+        except Exception as e:
+            self._logger.warning(
+                "Unable to save config snapshot, schedules and periods will be sent with each scheduling request: ({})",
+                e,
+            )
+            return None
+
+    def _delete_stale_config_snapshots(self, current_snapshot_key: str) -> None:
+        try:
+            deleted_keys = ConfigSnapshotStore(
+                self._env.config_table_name
+            ).delete_older_than(
+                datetime.now(timezone.utc) - CONFIG_SNAPSHOT_RETENTION,
+                keep=current_snapshot_key,
+            )
+            if deleted_keys:
+                self._logger.info("Deleted stale config snapshots {}", deleted_keys)
+        except Exception as e:
+            self._logger.warning("Unable to delete stale config snapshots: ({})", e)
+
+    def _dispatch_scheduling_requests(
+        self,
+        scheduler_requests: list[SchedulingRequest],
+        payload_builder: SchedulingRequestPayloadBuilder,
+    ) -> list[dict[str, Any]]:
+        """
+        invoke the scheduling request handler once for every request
+
+        when a dispatch concurrency greater than 1 is configured the invocations are
+        spread over a bounded pool of worker threads, results are always returned in
+        the same order as the requests
+        """
+        concurrency = min(
+            self._env.scheduling_request_dispatch_concurrency, len(scheduler_requests)
+        )
+        if concurrency <= 1:
+            return [
+                self._try_run_scheduling_lambda(scheduler_request, payload_builder)
+                for scheduler_request in scheduler_requests
+            ]
+
+        self._logger.info(
+            "Dispatching {} scheduling requests using {} workers",
+            len(scheduler_requests),
+            concurrency,
+        )
+        _ = self.lambda_client  # initialize the shared client before fanning out
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(
+                executor.map(
+                    lambda scheduler_request: self._try_run_scheduling_lambda(
+                        scheduler_request, payload_builder
+                    ),
+                    scheduler_requests,
+                )
+            )
+
+    def _try_run_scheduling_lambda(
+        self,
+        scheduler_request: SchedulingRequest,
+        payload_builder: SchedulingRequestPayloadBuilder,
+    ) -> dict[str, Any]:
+        # a failure to dispatch one target must not prevent the remaining targets from being scheduled
+        try:
+            return self._run_scheduling_lambda(scheduler_request, payload_builder)
+        except Exception as e:
+            self._logger.error(
+                "Error starting lambda function for scheduling {} instances for account {} in region {}: ({})",
+                scheduler_request["service"],
+                scheduler_request["account"],
+                scheduler_request["region"],
+                e,
+            )
+            return {
+                "service": scheduler_request["service"],
+                "account": scheduler_request["account"],
+                "region": scheduler_request["region"],
+                "lambda_invoke_result": None,
+                "error": str(e),
+            }
+
     def _run_scheduling_lambda(
-        self, scheduler_request: SchedulingRequest
+        self,
+        scheduler_request: SchedulingRequest,
+        payload_builder: SchedulingRequestPayloadBuilder,
     ) -> dict[str, Any]:
         # runs a service/account/region subset of the configuration as a new lambda function
         self._logger.info(
-            "Starting lambda function for scheduling {} instances for account {} in region {}",
+            "Starting lambda function for scheduling {} instances for account {} in region {}"
+            " and {} additional targets",
             scheduler_request["service"],
             scheduler_request["account"],
             scheduler_request["region"],
+            len(scheduler_request.get("additional_targets", [])),
         )
 
-        payload = str.encode(json.dumps(scheduler_request))
-        if len(payload) > LAMBDA_PAYLOAD_CAPACITY_BYTES:
-            # strip periods and let the request handler reload them
-            del scheduler_request["periods"]
-            payload = str.encode(json.dumps(scheduler_request))
-        if len(payload) > LAMBDA_PAYLOAD_CAPACITY_BYTES:
-            # if payload is still too large, strip schedules as well
-            del scheduler_request["schedules"]
-            payload = str.encode(json.dumps(scheduler_request))
+        payload = payload_builder.build(scheduler_request)
 
         # start the lambda function
         resp = self.lambda_client.invoke(
@@ -253,7 +504,7 @@ class SchedulingOrchestratorHandler:
         period_store: PeriodDefinitionStore,
         env: OrchestratorEnvironment,
         lambda_context: LambdaContext,
-        sample_scheduling_request: Optional[SchedulingRequest],
+        sample_payload_size_bytes: int,
     ) -> DeploymentDescriptionMetric:
         flag_counts = ScheduleFlagCounts()
         schedules = schedule_store.find_all()
@@ -296,11 +547,7 @@ class SchedulingOrchestratorHandler:
             ops_dashboard_enabled=env.ops_dashboard_enabled,
             num_started_tags=len(env.start_tags),
             num_stopped_tags=len(env.stop_tags),
-            approximate_lambda_payload_size_bytes=(
-                len(str.encode(json.dumps(sample_scheduling_request)))
-                if sample_scheduling_request
-                else 0
-            ),
+            approximate_lambda_payload_size_bytes=sample_payload_size_bytes,
         )
 
         return metric
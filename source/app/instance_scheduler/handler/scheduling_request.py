@@ -30,6 +30,10 @@ from instance_scheduler.handler.base import MainHandler
 from instance_scheduler.handler.environments.scheduling_request_environment import (
     SchedulingRequestEnvironment,
 )
+from instance_scheduler.model.store.config_snapshot_store import (
+    ConfigSnapshot,
+    ConfigSnapshotStore,
+)
 from instance_scheduler.model.store.dynamo_period_definition_store import (
     DynamoPeriodDefinitionStore,
 )
@@ -48,14 +52,19 @@ from instance_scheduler.model.store.period_definition_store import PeriodDefinit
 from instance_scheduler.model.store.schedule_definition_store import (
     ScheduleDefinitionStore,
 )
+from instance_scheduler.model.store.target_stats_store import TargetStatsStore
 from instance_scheduler.schedulers.instance_scheduler import InstanceScheduler
-from instance_scheduler.schedulers.instance_states import InstanceStates
+from instance_scheduler.schedulers.instance_states import (
+    InstanceStates,
+    InstanceStatesBatch,
+)
 from instance_scheduler.service import Ec2Service, RdsService, Service
 from instance_scheduler.util import get_boto_config, safe_json
 from instance_scheduler.util.logger import Logger
 from instance_scheduler.util.session_manager import assume_role, get_role_arn
 from instance_scheduler.util.validation import (
     ValidationException,
+    validate_int,
     validate_string,
     validate_string_list,
 )
@@ -68,6 +77,12 @@ else:
     LambdaClient = object
 
 
+class SchedulingRequestTarget(TypedDict):
+    account: str
+    service: str
+    region: str
+
+
 class SchedulingRequest(TypedDict):
     action: Literal["scheduler:run"]
     dispatch_time: str
@@ -77,12 +92,28 @@ class SchedulingRequest(TypedDict):
     current_dt: str
     schedules: NotRequired[SerializedInMemoryScheduleDefinitionStore]
     periods: NotRequired[SerializedInMemoryPeriodDefinitionStore]
+    config_snapshot: NotRequired[str]
     schedule_names: NotRequired[list[str]]
+    # batched requests: targets scheduled by the same invocation after the account/service/region above
+    additional_targets: NotRequired[list[SchedulingRequestTarget]]
+    # sharded requests: only the instances in shard {shard_index} of {shard_count} are scheduled
+    shard_index: NotRequired[int]
+    shard_count: NotRequired[int]
 
 
 def validate_scheduler_request(
     untyped_dict: Mapping[str, Any]
 ) -> TypeGuard[SchedulingRequest]:
+    decode_scheduler_request(untyped_dict)
+    return True
+
+
+def decode_scheduler_request(untyped_dict: Mapping[str, Any]) -> SchedulingRequest:
+    """
+    validate a scheduling request and return a copy in which schedules and periods are in the verbose serial format,
+    so that compact payloads are only decoded once per request
+    """
+    decoded: Final = dict(untyped_dict)
     valid_keys = inspect.get_annotations(SchedulingRequest).keys()
     for key in untyped_dict.keys():
         if key not in valid_keys:
@@ -99,23 +130,137 @@ def validate_scheduler_request(
     )  # todo: validate as ISO string
 
     if "schedules" in untyped_dict:
-        InMemoryScheduleDefinitionStore.validate_serial_data(untyped_dict["schedules"])
+        decoded["schedules"] = InMemoryScheduleDefinitionStore.decode_serial_data(
+            untyped_dict["schedules"]
+        )
 
     if "periods" in untyped_dict:
-        InMemoryPeriodDefinitionStore.validate_serial_data(untyped_dict["periods"])
+        decoded["periods"] = InMemoryPeriodDefinitionStore.decode_serial_data(
+            untyped_dict["periods"]
+        )
+
+    validate_string(untyped_dict, "config_snapshot", required=False)
 
     if "schedule_names" in untyped_dict:
         validate_string_list(untyped_dict, "schedule_names", required=False)
 
-    return True
+    validate_int(untyped_dict, "shard_index", required=False)
+    validate_int(untyped_dict, "shard_count", required=False)
+    if not 0 <= untyped_dict.get("shard_index", 0) < untyped_dict.get("shard_count", 1):
+        raise ValidationException(
+            f"shard_index must be between 0 and shard_count - 1, received: "
+            f"{untyped_dict.get('shard_index')} of {untyped_dict.get('shard_count')}"
+        )
+
+    if "additional_targets" in untyped_dict:
+        additional_targets = untyped_dict["additional_targets"]
+        if not isinstance(additional_targets, list):
+            raise ValidationException(
+                f"additional_targets must be a list of targets, received: {type(additional_targets)}"
+            )
+        for target in additional_targets:
+            if not isinstance(target, dict):
+                raise ValidationException(
+                    f"additional_targets must be a list of targets, list contains {type(target)}"
+                )
+            validate_string(target, "account", required=True)
+            validate_string(target, "service", required=True)
+            validate_string(target, "region", required=True)
+
+    return cast(SchedulingRequest, decoded)
+
+
+def split_targets(event: SchedulingRequest) -> list[SchedulingRequest]:
+    """split a (batched) scheduling request into one scheduling request per target"""
+    shared_fields: Final = {
+        key: value for key, value in event.items() if key != "additional_targets"
+    }
+    return [cast(SchedulingRequest, shared_fields)] + [
+        cast(SchedulingRequest, {**shared_fields, **target})
+        for target in event.get("additional_targets", [])
+    ]
 
 
 def handle_scheduling_request(event: Mapping[str, Any], context: LambdaContext) -> Any:
     # todo: how to surface validation error?
     env = SchedulingRequestEnvironment.from_env()
-    validate_scheduler_request(event)
-    event = cast(SchedulingRequest, event)
+    event = decode_scheduler_request(event)
+
+    target_events: Final = split_targets(event)
+    if len(target_events) == 1:
+        return handle_scheduling_target(event, context, env)
+
+    instance_states_batch: Final = (
+        InstanceStatesBatch(
+            env.state_table_name,
+            layout=env.state_table_layout,
+            use_cache=env.enable_instance_states_cache,
+        )
+        if env.enable_batched_instance_states
+        else None
+    )
+
+    # the schedules are shared by all targets of a batch, so they only need to be loaded once
+    with init_logger(
+        service=event["service"],
+        account=event["account"],
+        region=event["region"],
+        env=env,
+    ) as logger:
+        try:
+            schedules: Final = load_schedules(event, env)
+        except Exception as e:
+            logger.error(
+                "Error loading schedules for scheduling request {}: ({})\n{}",
+                safe_json(event),
+                e,
+                traceback.format_exc(),
+            )
+            raise e
 
+        if instance_states_batch is not None:
+            instance_states_batch.prefetch(
+                (
+                    (target["service"], target["account"], target["region"])
+                    for target in target_events
+                ),
+                logger,
+            )
+
+    results: Final[list[Any]] = []
+    first_error: Optional[Exception] = None
+    for target_event in target_events:
+        try:
+            results.append(
+                handle_scheduling_target(
+                    target_event, context, env, schedules, instance_states_batch
+                )
+            )
+        except Exception as e:
+            # a failure in one target must not prevent the remaining targets of the batch from being scheduled
+            first_error = first_error or e
+
+    if instance_states_batch is not None:
+        try:
+            # the states of every target are saved as soon as it has been scheduled, wait for the saves to finish.
+            # errors are logged per target
+            instance_states_batch.flush()
+        except Exception as e:
+            first_error = first_error or e
+
+    if first_error:
+        # already logged per target, let the lambda execution fail
+        raise first_error
+    return results
+
+
+def handle_scheduling_target(
+    event: SchedulingRequest,
+    context: LambdaContext,
+    env: SchedulingRequestEnvironment,
+    schedules: Optional[Mapping[str, InstanceSchedule]] = None,
+    instance_states_batch: Optional[InstanceStatesBatch] = None,
+) -> Any:
     logger = init_logger(
         service=event["service"],
         account=event["account"],
@@ -124,7 +269,14 @@ def handle_scheduling_request(event: Mapping[str, Any], context: LambdaContext)
     )
     with logger:
         try:
-            handler = SchedulingRequestHandler(event, context, env, logger)
+            handler = SchedulingRequestHandler(
+                event,
+                context,
+                env,
+                logger,
+                schedules=schedules,
+                instance_states_batch=instance_states_batch,
+            )
             return handler.handle_request()
         except Exception as e:
             # log error to SNS, then let the lambda execution fail
@@ -161,12 +313,16 @@ class SchedulingRequestHandler(MainHandler[SchedulingRequest]):
         context: LambdaContext,
         env: SchedulingRequestEnvironment,
         logger: Logger,
+        schedules: Optional[Mapping[str, InstanceSchedule]] = None,
+        instance_states_batch: Optional[InstanceStatesBatch] = None,
     ) -> None:
         self._env: Final = env
         self._logger = logger
         self._function_name: Final = context.function_name
         self._hub_account_id: Final = context.invoked_function_arn.split(":")[4]
         self._event = event
+        self._schedules: Final = schedules
+        self._instance_states_batch: Final = instance_states_batch
 
     @staticmethod
     def is_handling_request(event: Mapping[str, Any]) -> TypeGuard[SchedulingRequest]:
@@ -174,7 +330,9 @@ class SchedulingRequestHandler(MainHandler[SchedulingRequest]):
 
     def handle_request(self) -> Any:
         with self._logger:
-            scheduling_context = build_scheduling_context(self._event, self._env)
+            scheduling_context = build_scheduling_context(
+                self._event, self._env, self._schedules
+            )
 
             spoke_scheduler_role = assume_role(
                 account=scheduling_context.account_id,
@@ -201,8 +359,18 @@ class SchedulingRequestHandler(MainHandler[SchedulingRequest]):
                 case _:
                     raise ValueError(f"Unknown service: {scheduling_context.service}")
 
-            instance_states: Final = InstanceStates(
-                self._env.state_table_name, scheduling_context.service, self._logger
+            instance_states: Final = (
+                self._instance_states_batch.instance_states(
+                    scheduling_context.service, self._logger
+                )
+                if self._instance_states_batch is not None
+                else InstanceStates(
+                    self._env.state_table_name,
+                    scheduling_context.service,
+                    self._logger,
+                    layout=self._env.state_table_layout,
+                    use_cache=self._env.enable_instance_states_cache,
+                )
             )
 
             scheduler: Final = InstanceScheduler(
@@ -211,6 +379,7 @@ class SchedulingRequestHandler(MainHandler[SchedulingRequest]):
                 instance_states,
                 self._logger,
                 self._env,
+                target_stats_store=TargetStatsStore(self._env.state_table_name),
             )
 
             self._logger.info(
@@ -235,7 +404,9 @@ class SchedulingRequestHandler(MainHandler[SchedulingRequest]):
 
 
 def build_scheduling_context(
-    event: SchedulingRequest, env: SchedulingRequestEnvironment
+    event: SchedulingRequest,
+    env: SchedulingRequestEnvironment,
+    schedules: Optional[Mapping[str, InstanceSchedule]] = None,
 ) -> SchedulingContext:
     current_dt = datetime.fromisoformat(event["current_dt"])
 
@@ -245,13 +416,35 @@ def build_scheduling_context(
         region=event["region"],
         current_dt=current_dt,
         default_timezone=env.default_timezone,
-        schedules=load_schedules(event, env),
+        schedules=schedules if schedules is not None else load_schedules(event, env),
         scheduling_interval_minutes=env.scheduler_frequency_minutes,
         started_tags=build_tags_from_template(",".join(env.start_tags), env),
         stopped_tags=build_tags_from_template(",".join(env.stop_tags), env),
+        shard_index=event.get("shard_index", 0),
+        shard_count=event.get("shard_count", 1),
     )
 
 
+# config snapshots are immutable, so snapshots loaded by previous invocations of a warm container remain valid
+_config_snapshot_cache: dict[str, ConfigSnapshot] = {}
+CONFIG_SNAPSHOT_CACHE_SIZE: Final = 4
+
+
+def load_config_snapshot(
+    key: str, env: SchedulingRequestEnvironment
+) -> Optional[ConfigSnapshot]:
+    if key in _config_snapshot_cache:
+        return _config_snapshot_cache[key]
+
+    snapshot = ConfigSnapshotStore(env.config_table_name).get(key)
+    if snapshot is not None:
+        if len(_config_snapshot_cache) >= CONFIG_SNAPSHOT_CACHE_SIZE:
+            # snapshots are superseded whenever the configuration changes, so drop the oldest one
+            del _config_snapshot_cache[next(iter(_config_snapshot_cache))]
+        _config_snapshot_cache[key] = snapshot
+    return snapshot
+
+
 def load_schedules(
     event: SchedulingRequest,
     env: SchedulingRequestEnvironment,
@@ -259,6 +452,21 @@ def load_schedules(
     schedule_store: ScheduleDefinitionStore
     period_store: PeriodDefinitionStore
 
+    config_snapshot = (
+        load_config_snapshot(event["config_snapshot"], env)
+        if "config_snapshot" in event
+        else None
+    )
+
+    if config_snapshot is not None:
+        schedule_store = InMemoryScheduleDefinitionStore.deserialize(
+            config_snapshot["schedules"]
+        )
+        period_store = InMemoryPeriodDefinitionStore.deserialize(
+            config_snapshot["periods"]
+        )
+        return _to_instance_schedules(schedule_store, period_store)
+
     if "schedules" in event:
         schedule_store = InMemoryScheduleDefinitionStore.deserialize(event["schedules"])
     else:
@@ -273,6 +481,12 @@ def load_schedules(
         dynamo_period_store = DynamoPeriodDefinitionStore(env.config_table_name)
         period_store = InMemoryPeriodDefinitionStore(dynamo_period_store.find_all())
 
+    return _to_instance_schedules(schedule_store, period_store)
+
+
+def _to_instance_schedules(
+    schedule_store: ScheduleDefinitionStore, period_store: PeriodDefinitionStore
+) -> Mapping[str, InstanceSchedule]:
     loaded_schedules: dict[str, InstanceSchedule] = {}
     for schedule_def in schedule_store.find_all().values():
         schedule = schedule_def.to_instance_schedule(period_store)
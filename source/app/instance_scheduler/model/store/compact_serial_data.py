@@ -0,0 +1,52 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+"""
+compact wire format for serialized in-memory stores
+
+The verbose serial format of the in-memory stores is a json list of param dicts that grows quickly with the number of
+configured schedules. The compact format wraps the same data (after any store-specific dictionary encoding) as
+a base64 encoded zlib stream tagged with a format version so that the format can evolve without breaking
+requests that are already in flight
+"""
+import base64
+import json
+import zlib
+from typing import Any, Final, TypedDict, TypeGuard
+
+from instance_scheduler.util.validation import ValidationException
+
+COMPACT_SERIAL_DATA_VERSION: Final = 1
+
+
+class CompactSerialData(TypedDict):
+    compact_version: int
+    data: str
+
+
+def is_compact_serial_data(data: Any) -> TypeGuard[CompactSerialData]:
+    return isinstance(data, dict) and "compact_version" in data
+
+
+def to_compact_serial_data(obj: Any) -> CompactSerialData:
+    encoded: Final = str.encode(json.dumps(obj, separators=(",", ":")))
+    return CompactSerialData(
+        compact_version=COMPACT_SERIAL_DATA_VERSION,
+        data=base64.b64encode(zlib.compress(encoded, level=9)).decode(),
+    )
+
+
+def from_compact_serial_data(data: CompactSerialData) -> Any:
+    if data.get("compact_version") != COMPACT_SERIAL_DATA_VERSION:
+        raise ValidationException(
+            f"Unsupported compact serial data version: {data.get('compact_version')}, "
+            f"supported versions are [{COMPACT_SERIAL_DATA_VERSION}]"
+        )
+    if not isinstance(data.get("data"), str):
+        raise ValidationException(
+            f"Invalid compact serial data: data must be a string, received: {type(data.get('data'))}"
+        )
+
+    try:
+        return json.loads(zlib.decompress(base64.b64decode(data["data"])))
+    except (ValueError, zlib.error) as e:
+        raise ValidationException(f"Invalid compact serial data: {e}")
@@ -0,0 +1,105 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+import hashlib
+import json
+import zlib
+from datetime import datetime
+from typing import Final, Optional, TypedDict
+
+from instance_scheduler.model.store.dynamo_client import hub_dynamo_client
+from instance_scheduler.model.store.in_memory_period_definition_store import (
+    SerializedInMemoryPeriodDefinitionStore,
+)
+from instance_scheduler.model.store.in_memory_schedule_definition_store import (
+    SerializedInMemoryScheduleDefinitionStore,
+)
+
+CONFIG_SNAPSHOT_ITEM_TYPE: Final = "config_snapshot"
+
+
+class ConfigSnapshot(TypedDict):
+    schedules: SerializedInMemoryScheduleDefinitionStore
+    periods: SerializedInMemoryPeriodDefinitionStore
+
+
+def _encode_snapshot(snapshot: ConfigSnapshot) -> bytes:
+    # canonical encoding so that identical configurations always produce identical snapshot keys
+    return str.encode(json.dumps(snapshot, sort_keys=True, separators=(",", ":")))
+
+
+class ConfigSnapshotStore:
+    """
+    immutable, content-addressed snapshots of the serialized schedule and period configuration stored in the
+    config table.
+
+    The scheduling orchestrator writes a snapshot once per run so that scheduling request handlers can load the
+    entire configuration with a single read instead of querying every schedule and period
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+    ):
+        self._table: Final = table_name
+
+    def put(self, snapshot: ConfigSnapshot, created_at: datetime) -> str:
+        """
+        save a snapshot to dynamo, overwriting any identical snapshot
+        :returns the key of the snapshot (a hash of its content)
+        """
+        encoded_snapshot: Final = _encode_snapshot(snapshot)
+        key: Final = hashlib.sha256(encoded_snapshot).hexdigest()
+        hub_dynamo_client().put_item(
+            TableName=self._table,
+            Item={
+                "type": {"S": CONFIG_SNAPSHOT_ITEM_TYPE},
+                "name": {"S": key},
+                "data": {"B": zlib.compress(encoded_snapshot)},
+                "created_at": {"N": str(int(created_at.timestamp()))},
+            },
+        )
+        return key
+
+    def get(self, key: str) -> Optional[ConfigSnapshot]:
+        """fetch a snapshot from dynamo, returns None if the snapshot does not exist"""
+        result = hub_dynamo_client().get_item(
+            TableName=self._table,
+            Key={"type": {"S": CONFIG_SNAPSHOT_ITEM_TYPE}, "name": {"S": key}},
+        )
+
+        if "Item" not in result:
+            return None
+
+        snapshot: ConfigSnapshot = json.loads(
+            zlib.decompress(result["Item"]["data"]["B"])
+        )
+        return snapshot
+
+    def delete_older_than(self, created_before: datetime, keep: str) -> list[str]:
+        """
+        delete all snapshots created before the provided time, except for the snapshot with key {keep}
+        :returns the keys of the deleted snapshots
+        """
+        paginator: Final = hub_dynamo_client().get_paginator("query")
+        stale_keys: list[str] = []
+        for page in paginator.paginate(
+            TableName=self._table,
+            KeyConditionExpression="#part_key=:value",
+            ProjectionExpression="#part_key, #sort_key, created_at",
+            ExpressionAttributeNames={"#part_key": "type", "#sort_key": "name"},
+            ExpressionAttributeValues={":value": {"S": CONFIG_SNAPSHOT_ITEM_TYPE}},
+        ):
+            for item in page["Items"]:
+                key = item["name"]["S"]
+                if key != keep and int(item["created_at"]["N"]) < int(
+                    created_before.timestamp()
+                ):
+                    stale_keys.append(key)
+
+        for key in stale_keys:
+            hub_dynamo_client().delete_item(
+                TableName=self._table,
+                Key={"type": {"S": CONFIG_SNAPSHOT_ITEM_TYPE}, "name": {"S": key}},
+            )
+
+        return stale_keys
@@ -1,12 +1,18 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
-from typing import Any, Mapping, Optional, Sequence, TypeGuard
+from typing import Any, Mapping, Optional, Sequence, TypeGuard, cast
 
 from instance_scheduler.model.period_definition import (
     PeriodDefinition,
     PeriodParams,
     validate_as_period_params,
 )
+from instance_scheduler.model.store.compact_serial_data import (
+    CompactSerialData,
+    from_compact_serial_data,
+    is_compact_serial_data,
+    to_compact_serial_data,
+)
 from instance_scheduler.model.store.period_definition_store import (
     PeriodAlreadyExistsException,
     PeriodDefinitionStore,
@@ -14,7 +20,7 @@ from instance_scheduler.model.store.period_definition_store import (
 )
 from instance_scheduler.util.validation import ValidationException
 
-SerializedInMemoryPeriodDefinitionStore = Sequence[PeriodParams]
+SerializedInMemoryPeriodDefinitionStore = Sequence[PeriodParams] | CompactSerialData
 
 
 class InMemoryPeriodDefinitionStore(PeriodDefinitionStore):
@@ -41,15 +47,23 @@ class InMemoryPeriodDefinitionStore(PeriodDefinitionStore):
     def find_all(self) -> Mapping[str, PeriodDefinition]:
         return self._data
 
-    def serialize(self) -> SerializedInMemoryPeriodDefinitionStore:
-        return [period_def.to_period_params() for period_def in self._data.values()]
+    def serialize(
+        self, compact: bool = False
+    ) -> SerializedInMemoryPeriodDefinitionStore:
+        """
+        :param compact: if true, the store is serialized in the compact wire format
+        """
+        period_params = [
+            period_def.to_period_params() for period_def in self._data.values()
+        ]
+        return to_compact_serial_data(period_params) if compact else period_params
 
     @classmethod
     def deserialize(
         cls, data: SerializedInMemoryPeriodDefinitionStore
     ) -> "InMemoryPeriodDefinitionStore":
         periods: dict[str, PeriodDefinition] = {}
-        for period_params in data:
+        for period_params in _period_params_of(data):
             period_def = PeriodDefinition.from_period_params(period_params)
             periods[period_def.name] = period_def
 
@@ -59,6 +73,18 @@ class InMemoryPeriodDefinitionStore(PeriodDefinitionStore):
     def validate_serial_data(
         data: Any,
     ) -> TypeGuard[SerializedInMemoryPeriodDefinitionStore]:
+        InMemoryPeriodDefinitionStore.decode_serial_data(data)
+        return True
+
+    @staticmethod
+    def decode_serial_data(data: Any) -> Sequence[PeriodParams]:
+        """
+        validate serialized data and return it in the verbose serial format, so that compact data that has been
+        validated does not need to be decoded again when it is deserialized
+        """
+        if is_compact_serial_data(data):
+            data = _expand_compact_period_params(data)
+
         if not isinstance(data, Sequence):
             raise ValidationException(
                 f"Invalid PeriodStore format: must be a sequence of period definitions, received: {type(data)}"
@@ -71,4 +97,17 @@ class InMemoryPeriodDefinitionStore(PeriodDefinitionStore):
                 )
             validate_as_period_params(params)
 
-        return True
+        return cast(Sequence[PeriodParams], data)
+
+
+def _expand_compact_period_params(data: CompactSerialData) -> list[PeriodParams]:
+    period_params: list[PeriodParams] = from_compact_serial_data(data)
+    return period_params
+
+
+def _period_params_of(
+    data: SerializedInMemoryPeriodDefinitionStore,
+) -> Sequence[PeriodParams]:
+    if is_compact_serial_data(data):
+        return _expand_compact_period_params(data)
+    return cast(Sequence[PeriodParams], data)
@@ -1,12 +1,18 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
-from typing import Any, Mapping, Optional, Sequence, TypeGuard
+from typing import Any, Final, Mapping, Optional, Sequence, TypeGuard, cast
 
 from instance_scheduler.model.schedule_definition import (
     ScheduleDefinition,
     ScheduleParams,
     validate_as_schedule_params,
 )
+from instance_scheduler.model.store.compact_serial_data import (
+    CompactSerialData,
+    from_compact_serial_data,
+    is_compact_serial_data,
+    to_compact_serial_data,
+)
 from instance_scheduler.model.store.schedule_definition_store import (
     ScheduleAlreadyExistsException,
     ScheduleDefinitionStore,
@@ -14,7 +20,7 @@ from instance_scheduler.model.store.schedule_definition_store import (
 )
 from instance_scheduler.util.validation import ValidationException
 
-SerializedInMemoryScheduleDefinitionStore = Sequence[ScheduleParams]
+SerializedInMemoryScheduleDefinitionStore = Sequence[ScheduleParams] | CompactSerialData
 
 
 class InMemoryScheduleDefinitionStore(ScheduleDefinitionStore):
@@ -56,17 +62,40 @@ class InMemoryScheduleDefinitionStore(ScheduleDefinitionStore):
     def find_all(self) -> Mapping[str, ScheduleDefinition]:
         return self._data
 
-    def serialize(self) -> SerializedInMemoryScheduleDefinitionStore:
-        return [
+    def serialize(
+        self, compact: bool = False
+    ) -> SerializedInMemoryScheduleDefinitionStore:
+        """
+        :param compact: if true, the store is serialized in the compact wire format with period identifiers
+        dictionary-encoded (many schedules typically reference the same few periods)
+        """
+        schedule_params = [
             schedule_def.to_schedule_params() for schedule_def in self._data.values()
         ]
+        if not compact:
+            return schedule_params
+
+        period_ids: dict[str, int] = {}
+        encoded_params: list[dict[str, Any]] = []
+        for params in schedule_params:
+            encoded = dict[str, Any](params)
+            if "periods" in params:
+                encoded["periods"] = [
+                    period_ids.setdefault(period_id, len(period_ids))
+                    for period_id in params["periods"].split(",")
+                ]
+            encoded_params.append(encoded)
+
+        return to_compact_serial_data(
+            {"period_ids": list(period_ids), "schedules": encoded_params}
+        )
 
     @classmethod
     def deserialize(
         cls, data: SerializedInMemoryScheduleDefinitionStore
     ) -> "InMemoryScheduleDefinitionStore":
         schedules: dict[str, ScheduleDefinition] = {}
-        for period_params in data:
+        for period_params in _schedule_params_of(data):
             schedule_def = ScheduleDefinition.from_schedule_params(period_params)
             schedules[schedule_def.name] = schedule_def
 
@@ -76,6 +105,18 @@ class InMemoryScheduleDefinitionStore(ScheduleDefinitionStore):
     def validate_serial_data(
         data: Any,
     ) -> TypeGuard[SerializedInMemoryScheduleDefinitionStore]:
+        InMemoryScheduleDefinitionStore.decode_serial_data(data)
+        return True
+
+    @staticmethod
+    def decode_serial_data(data: Any) -> Sequence[ScheduleParams]:
+        """
+        validate serialized data and return it in the verbose serial format, so that compact data that has been
+        validated does not need to be decoded again when it is deserialized
+        """
+        if is_compact_serial_data(data):
+            data = _expand_compact_schedule_params(data)
+
         if not isinstance(data, Sequence):
             raise ValidationException(
                 f"Invalid PeriodStore format: must be a sequence of period definitions, received: {type(data)}"
@@ -88,4 +129,27 @@ class InMemoryScheduleDefinitionStore(ScheduleDefinitionStore):
                 )
             validate_as_schedule_params(params)
 
-        return True
+        return cast(Sequence[ScheduleParams], data)
+
+
+def _expand_compact_schedule_params(data: CompactSerialData) -> list[ScheduleParams]:
+    decoded: Final = from_compact_serial_data(data)
+    schedule_params: Final[list[ScheduleParams]] = []
+    try:
+        for params in decoded["schedules"]:
+            if "periods" in params:
+                params["periods"] = ",".join(
+                    decoded["period_ids"][index] for index in params["periods"]
+                )
+            schedule_params.append(params)
+    except (TypeError, KeyError, IndexError) as e:
+        raise ValidationException(f"Invalid compact ScheduleStore format: {e}")
+    return schedule_params
+
+
+def _schedule_params_of(
+    data: SerializedInMemoryScheduleDefinitionStore,
+) -> Sequence[ScheduleParams]:
+    if is_compact_serial_data(data):
+        return _expand_compact_schedule_params(data)
+    return cast(Sequence[ScheduleParams], data)
@@ -0,0 +1,36 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from typing import Final
+
+from instance_scheduler.model.store.dynamo_client import hub_dynamo_client
+from instance_scheduler.model.target_stats import TARGET_STATS_PARTITION, TargetStats
+
+
+class TargetStatsStore:
+    """
+    per-target scheduling statistics stored alongside the instance states in the state table.
+
+    Recorded by the scheduling request handler after every run and used by the scheduling orchestrator to
+    size the scheduling requests it dispatches
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+    ):
+        self._table: Final = table_name
+
+    def put(self, stats: TargetStats) -> None:
+        hub_dynamo_client().put_item(TableName=self._table, Item=stats.to_item())
+
+    def find_all(self) -> list[TargetStats]:
+        paginator: Final = hub_dynamo_client().get_paginator("query")
+        stats: Final[list[TargetStats]] = []
+        for page in paginator.paginate(
+            TableName=self._table,
+            KeyConditionExpression="#part_key=:value",
+            ExpressionAttributeNames={"#part_key": "service"},
+            ExpressionAttributeValues={":value": {"S": TARGET_STATS_PARTITION}},
+        ):
+            stats.extend(TargetStats.from_item(item) for item in page["Items"])
+        return stats
@@ -0,0 +1,73 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Final
+
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb.type_defs import AttributeValueTypeDef
+else:
+    AttributeValueTypeDef = object
+
+# partition key of the statistics items in the state table, does not collide with any scheduled service name
+TARGET_STATS_PARTITION: Final = "target-stats"
+
+
+@dataclass(frozen=True)
+class TargetStats:
+    """
+    statistics of the last scheduling run of a single (account, service, region) scheduling target
+
+    when a target is split into multiple shards, every shard records the statistics of its own part of the target.
+    Only the work that is divided between the shards is timed: every shard still describes all instances of the
+    target, so the time spent describing is not part of {action_seconds}
+    """
+
+    account: str
+    service: str
+    region: str
+    instance_count: int
+    # time spent starting, resizing and stopping instances
+    action_seconds: float
+    shard_count: int = 1
+    updated_at: datetime = datetime.fromtimestamp(0, timezone.utc)
+
+    @property
+    def estimated_instance_count(self) -> int:
+        """the estimated number of instances in the entire target"""
+        return self.instance_count * self.shard_count
+
+    @property
+    def estimated_action_seconds(self) -> float:
+        """the estimated time of starting and stopping the instances of the entire target in a single run"""
+        return self.action_seconds * self.shard_count
+
+    @property
+    def sort_key(self) -> str:
+        return f"{self.service}:{self.account}:{self.region}"
+
+    def to_item(self) -> dict[str, AttributeValueTypeDef]:
+        """Return this object as a dict suitable for a call to DynamoDB `put_item`"""
+        return {
+            "service": {"S": TARGET_STATS_PARTITION},
+            "account-region": {"S": self.sort_key},
+            "account": {"S": self.account},
+            "target_service": {"S": self.service},
+            "region": {"S": self.region},
+            "instance_count": {"N": str(self.instance_count)},
+            "action_seconds": {"N": f"{self.action_seconds:.3f}"},
+            "shard_count": {"N": str(self.shard_count)},
+            "updated_at": {"S": self.updated_at.isoformat()},
+        }
+
+    @classmethod
+    def from_item(cls, item: dict[str, AttributeValueTypeDef]) -> "TargetStats":
+        return TargetStats(
+            account=item["account"]["S"],
+            service=item["target_service"]["S"],
+            region=item["region"]["S"],
+            instance_count=int(item["instance_count"]["N"]),
+            action_seconds=float(item["action_seconds"]["N"]),
+            shard_count=int(item.get("shard_count", {}).get("N", "1")),
+            updated_at=datetime.fromisoformat(item["updated_at"]["S"]),
+        )
@@ -0,0 +1,42 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from datetime import datetime
+from typing import Final, Optional
+
+from aws_lambda_powertools import Logger as PowerToolsLogger
+
+from instance_scheduler.configuration.instance_schedule import InstanceSchedule
+from instance_scheduler.schedulers.states import ScheduleState
+from instance_scheduler.util.logger import Logger
+
+DesiredState = tuple[ScheduleState, Optional[str], Optional[str]]
+
+
+class DesiredStateCache:
+    """
+    memoizes the desired state of schedules for the duration of a single scheduling run
+
+    all instances of a run are scheduled at the same time and usually share a handful of schedules, so the
+    desired state of each schedule only needs to be evaluated once per run instead of once per instance
+    """
+
+    def __init__(self) -> None:
+        self._desired_states: Final[dict[tuple[str, datetime], DesiredState]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_desired_state(
+        self,
+        schedule: InstanceSchedule,
+        dt: datetime,
+        logger: Optional[Logger | PowerToolsLogger] = None,
+    ) -> DesiredState:
+        key: Final = (schedule.name, dt)
+        if key in self._desired_states:
+            self.hits += 1
+            return self._desired_states[key]
+
+        self.misses += 1
+        desired_state: Final = schedule.get_desired_state(dt, logger=logger)
+        self._desired_states[key] = desired_state
+        return desired_state
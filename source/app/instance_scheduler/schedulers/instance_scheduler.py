@@ -1,15 +1,19 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 import time
-from collections.abc import Iterator
-from datetime import datetime
-from typing import Any, Final, assert_never
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Final, Optional, assert_never
 
 from instance_scheduler.configuration.instance_schedule import InstanceSchedule
 from instance_scheduler.configuration.scheduling_context import SchedulingContext
 from instance_scheduler.handler.environments.scheduling_request_environment import (
     SchedulingRequestEnvironment,
 )
+from instance_scheduler.model.store.target_stats_store import TargetStatsStore
+from instance_scheduler.model.target_stats import TargetStats
 from instance_scheduler.ops_metrics.metric_type.insights_metric import InsightsMetric
 from instance_scheduler.ops_metrics.metric_type.instance_count_metric import (
     InstanceCountMetric,
@@ -25,6 +29,7 @@ from instance_scheduler.ops_monitoring.instance_counts import (
     InstanceCountsAggregator,
     ServiceInstanceCounts,
 )
+from instance_scheduler.schedulers.desired_state_cache import DesiredStateCache
 from instance_scheduler.schedulers.instance_states import InstanceStates
 from instance_scheduler.schedulers.scheduling_decision import (
     SchedulingAction,
@@ -35,6 +40,12 @@ from instance_scheduler.schedulers.states import InstanceState, ScheduleState
 from instance_scheduler.service import Service
 from instance_scheduler.service.abstract_instance import AbstractInstance
 from instance_scheduler.util.logger import Logger
+from instance_scheduler.util.prefetch import read_ahead
+
+# instances described ahead of the scheduling decisions
+DESCRIBE_READ_AHEAD_INSTANCES: Final = 1000
+# action batches waiting for the action worker before decision-making is paused
+MAX_PENDING_ACTION_BATCHES: Final = 2
 
 
 class InstanceScheduler:
@@ -45,12 +56,15 @@ class InstanceScheduler:
         instance_states: InstanceStates,
         logger: Logger,
         env: SchedulingRequestEnvironment,
+        target_stats_store: Optional[TargetStatsStore] = None,
     ) -> None:
         self._service: Final = service
         self._scheduling_context: Final = scheduling_context
         self._instance_states: Final = instance_states
         self._logger: Final = logger
         self._env: Final = env
+        self._target_stats_store: Final = target_stats_store
+        self._desired_states: Final = DesiredStateCache()
 
         self._metric_counts: InstanceCountsAggregator = InstanceCountsAggregator()
 
@@ -61,6 +75,13 @@ class InstanceScheduler:
 
         time_taken = execution_end - execution_start
 
+        self._record_target_stats(
+            instance_count=sum(
+                count.total() for count in result.instance_counts.by_type().values()
+            ),
+            action_seconds=result.action_seconds,
+        )
+
         # op metrics
         collect_metric(
             InstanceCountMetric(
@@ -106,7 +127,35 @@ class InstanceScheduler:
 
         return result.to_output_dict()
 
+    def _record_target_stats(self, instance_count: int, action_seconds: float) -> None:
+        if self._target_stats_store is None:
+            return
+        # the statistics are only used to size future scheduling requests, failing to record them
+        # must not fail the scheduling run
+        try:
+            self._target_stats_store.put(
+                TargetStats(
+                    account=self._scheduling_context.account_id,
+                    service=self._scheduling_context.service,
+                    region=self._scheduling_context.region,
+                    instance_count=instance_count,
+                    action_seconds=action_seconds,
+                    shard_count=self._scheduling_context.shard_count,
+                    updated_at=datetime.now(timezone.utc),
+                )
+            )
+        except Exception as e:
+            self._logger.warning("Unable to record scheduling statistics: ({})", e)
+
     def _run_scheduler(self) -> SchedulingResult:
+        """
+        describe, decide and act as a streaming pipeline
+
+        instances are described in a background thread while decisions are made for the instances that were
+        already described. Start and stop actions are sent to the service by a single action worker in batches
+        of {scheduling_action_batch_size} as soon as they are decided, so pagination, decision-making and
+        start/stop calls overlap instead of running back to back
+        """
         result = SchedulingResult()
         self._instance_states.load(
             account=self._scheduling_context.account_id,
@@ -117,45 +166,126 @@ class InstanceScheduler:
             SchedulingAction.START: [],
             SchedulingAction.STOP: [],
         }
+        batch_size: Final = max(1, self._env.scheduling_action_batch_size)
+        pending_batches: Final[
+            deque[Future[list[tuple[AbstractInstance, Exception]]]]
+        ] = deque()
+        failed_starts: Final[list[tuple[AbstractInstance, Exception]]] = []
+        # every instance described in this run, including the instances of other shards
+        seen_instances: Final[set[str]] = set()
+
+        def record_seen(
+            instances: Iterator[AbstractInstance],
+        ) -> Iterator[AbstractInstance]:
+            for instance in instances:
+                seen_instances.add(instance.id)
+                yield instance
+
+        def timed(
+            action: Callable[..., list[tuple[AbstractInstance, Exception]]],
+            *args: Any,
+        ) -> list[tuple[AbstractInstance, Exception]]:
+            # runs on the single action worker thread
+            start = time.perf_counter()
+            try:
+                return action(*args)
+            finally:
+                result.action_seconds += time.perf_counter() - start
+
+        def flush(action: SchedulingAction) -> None:
+            decisions = actions_to_take[action]
+            actions_to_take[action] = []
+            if not decisions:
+                return
+            # bound the number of batches that are waiting for the action worker
+            while len(pending_batches) >= MAX_PENDING_ACTION_BATCHES:
+                failed_starts.extend(pending_batches.popleft().result())
+            # filtering and bookkeeping happen on this thread, only the service calls are handed to the worker
+            if action is SchedulingAction.START:
+                instances_to_resize, instances_to_start = (
+                    self._prepare_start_and_resize_actions(
+                        decisions, result_object=result, logger=self._logger
+                    )
+                )
+                pending_batches.append(
+                    action_worker.submit(
+                        timed,
+                        self._resize_and_start_instances,
+                        instances_to_resize,
+                        instances_to_start,
+                    )
+                )
+            else:
+                pending_batches.append(
+                    action_worker.submit(
+                        timed,
+                        self._stop_instances,
+                        self._prepare_stop_actions(
+                            decisions, result_object=result, logger=self._logger
+                        ),
+                    )
+                )
 
-        for decision in self.make_scheduling_decisions(
-            self._service.describe_tagged_instances(),
-            self._instance_states,
-            self._scheduling_context,
-            result_object=result,
+        with (
+            ThreadPoolExecutor(max_workers=1) as action_worker,
+            read_ahead(
+                self._service.describe_tagged_instances(),
+                max_buffered=DESCRIBE_READ_AHEAD_INSTANCES,
+            ) as instances,
         ):
-            self._logger.info(
-                f"Scheduling decision for {decision.instance.display_str}: "
-                f"\n  action: {decision.action} "
-                f"\n  reason: {decision.reason}"
-            )
+            # describing may fail after batches were sent to the action worker. The actions that were already
+            # decided are still taken and the states of their instances saved, so that the stored states match the
+            # actions that were taken
+            describe_error: Optional[Exception] = None
+            try:
+                for decision in self.make_scheduling_decisions(
+                    record_seen(instances),
+                    self._instance_states,
+                    self._scheduling_context,
+                    result_object=result,
+                ):
+                    self._logger.info(
+                        f"Scheduling decision for {decision.instance.display_str}: "
+                        f"\n  action: {decision.action} "
+                        f"\n  reason: {decision.reason}"
+                    )
 
-            if decision.action is not SchedulingAction.DO_NOTHING:
-                actions_to_take[decision.action].append(decision)
+                    if decision.action is not SchedulingAction.DO_NOTHING:
+                        actions_to_take[decision.action].append(decision)
+                        if len(actions_to_take[decision.action]) >= batch_size:
+                            flush(decision.action)
 
-            if decision.new_state_table_state is not None:
-                self._instance_states.set_instance_state(
-                    decision.instance.id, decision.new_state_table_state
-                )
+                    if decision.new_state_table_state is not None:
+                        self._instance_states.set_instance_state(
+                            decision.instance.id, decision.new_state_table_state
+                        )
+            except Exception as e:
+                describe_error = e
 
-        for failed_instance, err in self._handle_start_and_resize_actions(
-            actions_to_take[SchedulingAction.START],
-            result_object=result,
-            logger=self._logger,
-        ):
+            flush(SchedulingAction.START)
+            flush(SchedulingAction.STOP)
+            while pending_batches:
+                failed_starts.extend(pending_batches.popleft().result())
+
+        result.desired_state_cache_hits = self._desired_states.hits
+        result.desired_state_cache_misses = self._desired_states.misses
+
+        for failed_instance, err in failed_starts:
             self._logger.info(f"{failed_instance.display_str} failed to start: {err} ")
             self._instance_states.set_instance_state(
                 failed_instance.id, InstanceState.START_FAILED
             )
 
-        self._handle_stop_actions(
-            actions_to_take[SchedulingAction.STOP],
-            result_object=result,
-            logger=self._logger,
-        )
+        # an incomplete describe must not remove stored states
+        if describe_error is None:
+            self._instance_states.cleanup(seen_instances)
 
+        # only the changes of this run are saved, other shards of this account/region may update the same item
         self._instance_states.save()
 
+        if describe_error is not None:
+            raise describe_error
+
         return result
 
     def make_scheduling_decisions(
@@ -166,6 +296,9 @@ class InstanceScheduler:
         result_object: SchedulingResult,
     ) -> Iterator[SchedulingDecision]:
         for instance in instances:
+            if not context.is_in_shard(instance.id):
+                continue
+
             schedule = context.get_schedule(instance.schedule_name)
 
             if not schedule:
@@ -237,8 +370,8 @@ class InstanceScheduler:
         # overriding the manual action until the next regular start/stop action. Additional states InstanceStates and
         # schedule flags can be used to modify this behavior to fit the customer needs (for example: enforced schedules
         # and the retain_running flag)
-        schedule_state, new_desired_type, _ = schedule.get_desired_state(
-            current_dt, logger=self._logger
+        schedule_state, new_desired_type, _ = self._desired_states.get_desired_state(
+            schedule, current_dt, logger=self._logger
         )
         match schedule_state:
             case ScheduleState.STOPPED:
@@ -390,12 +523,18 @@ class InstanceScheduler:
             case _ as unreachable:
                 assert_never(unreachable)
 
-    def _handle_start_and_resize_actions(
+    def _prepare_start_and_resize_actions(
         self,
         start_actions: list[SchedulingDecision],
         result_object: SchedulingResult,
         logger: Logger,
-    ) -> Iterator[tuple[AbstractInstance, Exception]]:
+    ) -> tuple[list[tuple[AbstractInstance, str]], list[AbstractInstance]]:
+        """
+        filter and record start actions
+
+        :return: the instances to resize (with their new type) and the instances to start
+        """
+        instances_to_resize: list[tuple[AbstractInstance, str]] = []
         filtered_actions = []
 
         # filter out instances that are already running
@@ -425,7 +564,7 @@ class InstanceScheduler:
                         f"resizing {action.instance.id} from {action.instance.instance_type} to {action.desired_size}"
                     )
 
-                    self._service.resize_instance(action.instance, action.desired_size)
+                    instances_to_resize.append((action.instance, action.desired_size))
 
                     result_object.add_resize_action(
                         action.instance, action.desired_size
@@ -439,17 +578,30 @@ class InstanceScheduler:
         for action in filtered_actions:
             result_object.add_completed_action(action)
 
-        for failed_instance, err in self._service.start_instances(
-            [action.instance for action in filtered_actions]
-        ):
-            yield failed_instance, err
+        return instances_to_resize, [action.instance for action in filtered_actions]
 
-    def _handle_stop_actions(
+    def _resize_and_start_instances(
+        self,
+        instances_to_resize: list[tuple[AbstractInstance, str]],
+        instances_to_start: list[AbstractInstance],
+    ) -> list[tuple[AbstractInstance, Exception]]:
+        """runs on the action worker, returns the instances that failed to start"""
+        for instance, instance_type in instances_to_resize:
+            self._service.resize_instance(instance, instance_type)
+
+        return list(self._service.start_instances(instances_to_start))
+
+    def _prepare_stop_actions(
         self,
         stop_actions: list[SchedulingDecision],
         result_object: SchedulingResult,
         logger: Logger,
-    ) -> None:
+    ) -> list[AbstractInstance]:
+        """
+        filter and record stop actions
+
+        :return: the instances to stop
+        """
         filtered_actions = []
 
         # filter out instances that are already stopped
@@ -466,11 +618,14 @@ class InstanceScheduler:
         for action in filtered_actions:
             result_object.add_completed_action(action)
 
-        list(
-            self._service.stop_instances(
-                [action.instance for action in filtered_actions]
-            )
-        )
+        return [action.instance for action in filtered_actions]
+
+    def _stop_instances(
+        self, instances_to_stop: list[AbstractInstance]
+    ) -> list[tuple[AbstractInstance, Exception]]:
+        """runs on the action worker, stop failures are logged by the service and never retried"""
+        list(self._service.stop_instances(instances_to_stop))
+        return []
 
     def _is_maintenance_window_running(
         self,
@@ -1,9 +1,16 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 import time
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from decimal import Decimal
-from typing import Any, Optional
+from enum import Enum
+from functools import cached_property
+from threading import Lock
+from typing import Any, Final, Optional
 
+from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 
 from instance_scheduler.schedulers.states import InstanceState, is_valid_instance_state
@@ -11,41 +18,151 @@ from instance_scheduler.util.dynamodb_utils import DynamoDBUtils
 from instance_scheduler.util.logger import Logger
 
 INF_CLEANING = "Cleaning up instance registry."
+INF_REFRESHING_LAST_SEEN = "Refreshing the last seen time of {} instances."
 INF_MOVING_FOR_PURGE = "Moving instance {} to be purged in next cleanup."
 INF_REMOVING_INSTANCE = "Removing instance {} from instance registry."
 
+# change sets up to this size are saved with a single update_item, which keeps update expressions well below the
+# dynamodb expression size limits. Larger change sets rewrite the whole item with a single put_item
+MAX_INSTANCE_CHANGES_PER_UPDATE = 100
+
+INF_MIGRATING_STATES = "Migrating {} instance states of {} to one item per instance."
+
+INF_CONCURRENT_UPDATE = (
+    "Instance states of {} were updated concurrently, reloading and retrying"
+)
+
+# number of account/regions whose instance states are cached per lambda container
+MAX_CACHED_INSTANCE_STATES = 64
+
+# number of attempts to save changes to an item that is updated concurrently
+MAX_SAVE_ATTEMPTS = 10
+
+# the maximum number of keys per batch_get_item call
+BATCH_GET_ITEM_MAX_KEYS = 100
+
+# number of batch_get_item calls made for keys that dynamodb left unprocessed, and the initial backoff between them
+MAX_BATCH_GET_ATTEMPTS = 5
+BATCH_GET_BACKOFF_SECONDS = 0.05
+
+# number of account/regions whose changes are saved concurrently when a batch is flushed
+MAX_CONCURRENT_FLUSHES = 4
+
+WARN_PREFETCHING_STATES = (
+    "Could not prefetch instance states, states are loaded per target ({})"
+)
+
+ERR_SAVING_STATES = "Error saving instance states of {}: {}"
+
 WARN_LOADING_STATE = "Could not load instance state data {}, this warning should only occur once after creating the scheduler"
 
 
+class InstanceStateLayout(str, Enum):
+    """how the instance states of an account/region are stored in the state table"""
+
+    # one item per account/region with one attribute per instance
+    SINGLE_ITEM = "single-item"
+    # one item per instance, keyed by account/region and instance id
+    ITEM_PER_INSTANCE = "item-per-instance"
+
+
+@dataclass(frozen=True)
+class _CachedInstanceStates:
+    version: Any
+    timestamp: Any
+    last_cleanup: Any
+    state_info: dict[str, Any]
+    instances_to_purge: frozenset[str]
+
+
+# the instance states of the account/regions most recently loaded or saved by this (warm) lambda container
+_instance_states_cache: Final[dict[tuple[str, str, str], _CachedInstanceStates]] = {}
+_cache_lock: Final = Lock()
+
+
 class InstanceStates:
     """
     Implements store for last desired state for service instances
+
+    With the item-per-instance layout, instance states are stored as items with sort key
+    {account}:{region}#{instance id} and a metadata item with sort key {account}:{region}#. Only changed
+    instances are written (with batch_write_item), so the size of an account/region is not bounded by the
+    dynamodb item size limit. States stored in the single-item layout are migrated the first time they are loaded
+    with the item-per-instance layout, migrated states are only written for instances that have no item yet. The
+    metadata item holds the timestamp of the last save
+
+    States of instances that are no longer described (terminated, or no longer tagged) are garbage collected. With
+    the single-item layout, cleanup() marks instances that were not described for removal and removes them when
+    they are still not described at the next cleanup. With the item-per-instance layout, every instance item
+    records when the instance was last seen and expires (dynamodb TTL) {state_retention} seconds later, cleanup()
+    only refreshes the items of described instances that were last seen more than {cleanup_interval} seconds ago
+
+    With the single-item layout, the states loaded or saved by a warm lambda container can be cached per
+    account/region. A cached entry is reused when an eventually consistent read of only the version and timestamp
+    of the item still matches it
     """
 
     INSTANCE_TABLE_TIMESTAMP = "timestamp"
     INSTANCE_TABLE_PURGE = "purge_in_next_cleanup"
     INSTANCE_TABLE_ACCOUNT_REGION = "account-region"
     INSTANCE_TABLE_NAME = "service"
+    INSTANCE_TABLE_STATE = "state"
+    INSTANCE_TABLE_VERSION = "version"
+    INSTANCE_TABLE_LAST_CLEANUP = "last_cleanup"
+    INSTANCE_TABLE_LAST_SEEN = "last_seen"
+    # time to live attribute of the state table
+    INSTANCE_TABLE_EXPIRES_AT = "expires_at"
+    INSTANCE_KEY_SEPARATOR = "#"
 
     # cleanup interval time
     cleanup_interval = Decimal(12 * 3600)
+    # time after which the state of an instance that is no longer seen expires (item-per-instance layout)
+    state_retention = Decimal(36 * 3600)
 
-    def __init__(self, table_name: str, service: str, logger: Logger) -> None:
+    def __init__(
+        self,
+        table_name: str,
+        service: str,
+        logger: Logger,
+        layout: InstanceStateLayout = InstanceStateLayout.SINGLE_ITEM,
+        use_cache: bool = False,
+        batch: Optional["InstanceStatesBatch"] = None,
+    ) -> None:
         """
         Initializes instance of state store
         :param table_name: name of the state table
         :param service: name of the service
         :param logger: logger to log output of ste logic
+        :param layout: how instance states are stored in the state table
+        :param use_cache: validate and reuse the states cached by previous invocations of this container instead
+        of reading them again (single-item layout only)
+        :param batch: batch that prefetches the states of this instance and saves them when it is flushed
         """
         self._table_name = table_name
         self._state_table = None
         self._state_info: dict[str, Any] = {}
         self._instances_to_purge: set[Any] = set()
+        self._changed_instances: set[str] = set()
         self._dirty: Optional[bool] = None
         self._timestamp: Decimal | float = Decimal(time.time())
+        self._last_cleanup: Decimal | float = Decimal(0)
+        # epoch seconds at which instances were last seen (item-per-instance layout)
+        self._last_seen: dict[str, Decimal] = {}
+        # instances of which only the last seen time is written (item-per-instance layout)
+        self._last_seen_refreshes: set[str] = set()
         self._service = service
         self._current_account_region: Optional[str] = None
         self._logger = logger
+        self._layout: Final = layout
+        self._use_cache: Final = use_cache
+        self._batch: Final = batch
+        # states were loaded from the single-item layout, that item is deleted once they have been saved
+        self._migrated_item = False
+        self._migrated_instances: set[str] = set()
+        self._version: Optional[int] = None
+        self._purge_changed = False
+        # timestamp written by the last update of the single item
+        self._saved_timestamp: Optional[Decimal] = None
 
     @property
     def state_table(self) -> Any:
@@ -68,15 +185,98 @@ class InstanceStates:
         """
         self._dirty = False
         self._state_info = {}
+        self._changed_instances = set()
         self._current_account_region = "{}:{}".format(account, region)
 
+        self._migrated_item = False
+        self._migrated_instances = set()
+        self._instances_to_purge = set()
+        self._version = None
+        self._purge_changed = False
+        self._last_cleanup = Decimal(0)
+        self._last_seen = {}
+        self._last_seen_refreshes = set()
+
+        if self._layout is InstanceStateLayout.ITEM_PER_INSTANCE:
+            self._load_item_per_instance()
+            return
+
+        prefetched: Final = (
+            self._batch.take_prefetched(self._service, self._current_account_region)
+            if self._batch is not None
+            else None
+        )
+        if prefetched is not None:
+            self._apply_single_item(prefetched)
+            self._update_cache()
+        elif not (self._use_cache and self._load_from_cache()):
+            self._load_single_item()
+            self._update_cache()
+
+    def _load_from_cache(self) -> bool:
+        """
+        restore the states cached by a previous load or save of this container, if the version and timestamp of the
+        stored item still match the cached states. Only the version and timestamp are read, with an eventually
+        consistent read. Stale reads are safe, as saves are conditional on the version of the item
+        :return: True if the cached states are still valid
+        """
+        with _cache_lock:
+            cached = _instance_states_cache.get(self._cache_key)
+        if cached is None:
+            return False
+
+        try:
+            item = self.state_table.get_item(
+                Key=self._single_item_key,
+                ProjectionExpression="#version, #ts",
+                ExpressionAttributeNames={
+                    "#version": InstanceStates.INSTANCE_TABLE_VERSION,
+                    "#ts": InstanceStates.INSTANCE_TABLE_TIMESTAMP,
+                },
+                ConsistentRead=False,
+            ).get("Item", {})
+        except ClientError as ex:
+            self._logger.warning(WARN_LOADING_STATE, str(ex))
+            return False
+
+        if (
+            item.get(InstanceStates.INSTANCE_TABLE_VERSION) != cached.version
+            or item.get(InstanceStates.INSTANCE_TABLE_TIMESTAMP) != cached.timestamp
+        ):
+            return False
+
+        self._version = cached.version
+        self._timestamp = cached.timestamp
+        self._last_cleanup = cached.last_cleanup
+        self._state_info = dict(cached.state_info)
+        self._instances_to_purge = set(cached.instances_to_purge)
+        return True
+
+    def _update_cache(self, timestamp: Optional[Decimal | float] = None) -> None:
+        """cache the states of the account/region as stored with the current version"""
+        if not self._use_cache or self._version is None:
+            return
+        with _cache_lock:
+            _instance_states_cache.pop(self._cache_key, None)
+            while len(_instance_states_cache) >= MAX_CACHED_INSTANCE_STATES:
+                del _instance_states_cache[next(iter(_instance_states_cache))]
+            _instance_states_cache[self._cache_key] = _CachedInstanceStates(
+                version=self._version,
+                timestamp=self._timestamp if timestamp is None else timestamp,
+                last_cleanup=self._last_cleanup,
+                state_info=dict(self._state_info),
+                instances_to_purge=frozenset(self._instances_to_purge),
+            )
+
+    @property
+    def _cache_key(self) -> tuple[str, str, str]:
+        return self._table_name, self._service, str(self._current_account_region)
+
+    def _load_single_item(self) -> None:
         # get single row from dynamoDB
         try:
             resp = self.state_table.get_item(
-                Key={
-                    InstanceStates.INSTANCE_TABLE_NAME: self._service,
-                    InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION: self._current_account_region,
-                },
+                Key=self._single_item_key,
                 ConsistentRead=True,
             )
             item = resp.get("Item", {})
@@ -84,6 +284,9 @@ class InstanceStates:
             self._logger.warning(WARN_LOADING_STATE, str(ex))
             item = {}
 
+        self._apply_single_item(item)
+
+    def _apply_single_item(self, item: dict[str, Any]) -> None:
         # time of last update
         if InstanceStates.INSTANCE_TABLE_TIMESTAMP in item:
             self._timestamp = item[InstanceStates.INSTANCE_TABLE_TIMESTAMP]
@@ -100,12 +303,95 @@ class InstanceStates:
                 InstanceStates.INSTANCE_TABLE_NAME,
                 InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION,
                 InstanceStates.INSTANCE_TABLE_PURGE,
+                InstanceStates.INSTANCE_TABLE_VERSION,
+                InstanceStates.INSTANCE_TABLE_LAST_CLEANUP,
             ]
         }
 
+        # time of last cleanup, the first cleanup of an item runs on the first scheduling pass
+        self._last_cleanup = item.get(
+            InstanceStates.INSTANCE_TABLE_LAST_CLEANUP, Decimal(0)
+        )
+
+        # version of the item, used to detect concurrent updates
+        self._version = item.get(InstanceStates.INSTANCE_TABLE_VERSION, None)
+
         # items to purge
-        if InstanceStates.INSTANCE_TABLE_PURGE in item:
-            self._instances_to_purge = item[InstanceStates.INSTANCE_TABLE_PURGE]
+        self._instances_to_purge = set(
+            item.get(InstanceStates.INSTANCE_TABLE_PURGE, set())
+        )
+
+    def _load_item_per_instance(self) -> None:
+        items: Final[list[dict[str, Any]]] = []
+        try:
+            query_args: dict[str, Any] = {
+                "KeyConditionExpression": Key(InstanceStates.INSTANCE_TABLE_NAME).eq(
+                    self._service
+                )
+                & Key(InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION).begins_with(
+                    self._instance_key_prefix
+                ),
+                "ConsistentRead": True,
+            }
+            while True:
+                resp = self.state_table.query(**query_args)
+                items.extend(resp.get("Items", []))
+                if "LastEvaluatedKey" not in resp:
+                    break
+                query_args["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+        except ClientError as ex:
+            self._logger.warning(WARN_LOADING_STATE, str(ex))
+
+        if not items:
+            # nothing stored in this layout yet, start from the states stored in the single-item layout
+            self._load_single_item()
+            if self._state_info or self._instances_to_purge:
+                self._logger.info(
+                    INF_MIGRATING_STATES,
+                    str(len(self._state_info)),
+                    self._current_account_region,
+                )
+                self._migrated_item = True
+                self._migrated_instances = set(self._state_info)
+                self._dirty = True
+            return
+
+        self._timestamp = Decimal(time.time())
+        now: Final = int(time.time())
+        for item in items:
+            instance_id = item[InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION][
+                len(self._instance_key_prefix) :
+            ]
+            if not instance_id:
+                # metadata item
+                self._timestamp = item.get(
+                    InstanceStates.INSTANCE_TABLE_TIMESTAMP, self._timestamp
+                )
+                continue
+            if item.get(InstanceStates.INSTANCE_TABLE_EXPIRES_AT, now) < now:
+                # expired, but not deleted by dynamodb yet
+                continue
+            if InstanceStates.INSTANCE_TABLE_STATE in item:
+                self._state_info[instance_id] = item[
+                    InstanceStates.INSTANCE_TABLE_STATE
+                ]
+            if InstanceStates.INSTANCE_TABLE_LAST_SEEN in item:
+                self._last_seen[instance_id] = item[
+                    InstanceStates.INSTANCE_TABLE_LAST_SEEN
+                ]
+            if item.get(InstanceStates.INSTANCE_TABLE_PURGE):
+                self._instances_to_purge.add(instance_id)
+
+    @property
+    def _single_item_key(self) -> dict[str, Any]:
+        return {
+            InstanceStates.INSTANCE_TABLE_NAME: self._service,
+            InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION: self._current_account_region,
+        }
+
+    @property
+    def _instance_key_prefix(self) -> str:
+        return f"{self._current_account_region}{InstanceStates.INSTANCE_KEY_SEPARATOR}"
 
     def set_instance_state(self, instance_id: str, new_state: InstanceState) -> None:
         """
@@ -119,6 +405,7 @@ class InstanceStates:
         # only update if changed
         if not state or state != new_state:
             self._state_info[instance_id] = new_state
+            self._changed_instances.add(instance_id)
             self._dirty = True
 
     def get_instance_state(self, instance_id: str) -> InstanceState:
@@ -140,65 +427,498 @@ class InstanceStates:
             del self._state_info[instance_id]
             if instance_id in self._instances_to_purge:
                 self._instances_to_purge.remove(instance_id)
+                self._purge_changed = True
+            self._changed_instances.add(instance_id)
             self._dirty = True
 
     def save(self) -> None:
         """
-        Stores the instance state information to the dynamodb table if it has changed
+        Stores the states of the instances that were changed since they were loaded, or submits storing them to
+        the batch of this instance, which saves them in the background
         :return:
         """
-        if self._dirty:
-            # key and timestamp
-            data: dict[str, Any] = {
-                InstanceStates.INSTANCE_TABLE_NAME: self._service,
-                InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION: self._current_account_region,
-                InstanceStates.INSTANCE_TABLE_TIMESTAMP: Decimal(time.time()),
-            }
+        if self._batch is not None:
+            self._batch.submit(self)
+        else:
+            self.flush()
+
+    def flush_logged(self) -> Optional[Exception]:
+        """
+        Stores the changed states like flush(), errors are logged (and the log flushed, as the logger may already
+        have been flushed when the target was scheduled) and returned instead of raised
+        :return: the error that prevented the states from being stored
+        """
+        with self._logger:
+            try:
+                self.flush()
+                return None
+            except Exception as ex:
+                self._logger.error(
+                    ERR_SAVING_STATES, self._current_account_region, str(ex)
+                )
+                return ex
+
+    def flush(self) -> None:
+        """
+        Stores the states of the instances that were changed since they were loaded
+
+        With the single-item layout, the changes are saved with one write that is conditional on the version of
+        the item that was loaded, so that concurrent workers on the same account/region cannot overwrite each
+        other's changes: an update_item with SET/REMOVE expressions for the changed instances, or a put_item of the
+        whole item for large change sets. Both consume write units for the full size of the item. When the item was
+        updated by another worker in the meantime, its current state is reloaded and the write is retried
+        :return:
+        """
+        if self._layout is InstanceStateLayout.ITEM_PER_INSTANCE:
+            self._save_item_per_instance()
+            return
+
+        if not self._dirty:
+            return
+
+        self._write_single_item()
+
+        self._dirty = False
+        self._changed_instances = set()
+        self._purge_changed = False
+        self._update_cache(timestamp=self._saved_timestamp)
+
+    def _write_single_item(self) -> None:
+        for _ in range(MAX_SAVE_ATTEMPTS - 1):
+            try:
+                self._apply_single_item_write()
+                return
+            except ClientError as ex:
+                if ex.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+            self._logger.info(INF_CONCURRENT_UPDATE, self._current_account_region)
+            self._refresh_single_item()
+
+        self._apply_single_item_write()
+
+    def _apply_single_item_write(self) -> None:
+        timestamp: Final = Decimal(time.time())
+        next_version: Final = (self._version or 0) + 1
+        if len(self._changed_instances) <= MAX_INSTANCE_CHANGES_PER_UPDATE:
+            self.state_table.update_item(
+                Key=self._single_item_key,
+                **self._single_item_update(
+                    sorted(self._changed_instances), timestamp, next_version
+                ),
+            )
+        else:
+            self.state_table.put_item(**self._single_item_put(timestamp, next_version))
+        self._version = next_version
+        self._saved_timestamp = timestamp
+
+    def _version_condition(self) -> dict[str, Any]:
+        if self._version is None:
+            return {"ConditionExpression": "attribute_not_exists(#version)"}
+        return {
+            "ConditionExpression": "#version = :version",
+            "ExpressionAttributeValues": {":version": self._version},
+        }
+
+    def _single_item_put(self, timestamp: Decimal, next_version: int) -> dict[str, Any]:
+        item: Final[dict[str, Any]] = {
+            **self._state_info,
+            **self._single_item_key,
+            InstanceStates.INSTANCE_TABLE_TIMESTAMP: timestamp,
+            InstanceStates.INSTANCE_TABLE_VERSION: next_version,
+            InstanceStates.INSTANCE_TABLE_LAST_CLEANUP: Decimal(self._last_cleanup),
+        }
+        if self._instances_to_purge:
+            item[InstanceStates.INSTANCE_TABLE_PURGE] = set(self._instances_to_purge)
+        return {
+            "Item": item,
+            "ExpressionAttributeNames": {
+                "#version": InstanceStates.INSTANCE_TABLE_VERSION
+            },
+            **self._version_condition(),
+        }
+
+    def _single_item_update(
+        self, instance_ids: list[str], timestamp: Decimal, next_version: int
+    ) -> dict[str, Any]:
+        condition: Final = self._version_condition()
+        names: dict[str, str] = {
+            "#ts": InstanceStates.INSTANCE_TABLE_TIMESTAMP,
+            "#version": InstanceStates.INSTANCE_TABLE_VERSION,
+        }
+        values: dict[str, Any] = {
+            ":ts": timestamp,
+            ":next_version": next_version,
+            **condition.get("ExpressionAttributeValues", {}),
+        }
+        set_actions = ["#ts = :ts", "#version = :next_version"]
+        remove_actions = []
 
-            # store instance states as one column per instance
-            for i in self._state_info:
-                data[i] = self._state_info[i]
+        if self._purge_changed:
+            names["#last_cleanup"] = InstanceStates.INSTANCE_TABLE_LAST_CLEANUP
+            values[":last_cleanup"] = Decimal(self._last_cleanup)
+            set_actions.append("#last_cleanup = :last_cleanup")
+            names["#purge"] = InstanceStates.INSTANCE_TABLE_PURGE
+            if self._instances_to_purge:
+                values[":purge"] = set(self._instances_to_purge)
+                set_actions.append("#purge = :purge")
+            else:
+                remove_actions.append("#purge")
 
-            # instances to purge
-            if len(self._instances_to_purge) > 0:
-                data[InstanceStates.INSTANCE_TABLE_PURGE] = self._instances_to_purge
+        for index, instance_id in enumerate(instance_ids):
+            names[f"#i{index}"] = instance_id
+            if instance_id in self._state_info:
+                values[f":i{index}"] = self._state_info[instance_id]
+                set_actions.append(f"#i{index} = :i{index}")
+            else:
+                remove_actions.append(f"#i{index}")
 
-            self.state_table.put_item(Item=data)
-            self._dirty = False
+        update_expression = "SET " + ", ".join(set_actions)
+        if remove_actions:
+            update_expression += " REMOVE " + ", ".join(remove_actions)
 
-    def cleanup(self, instances: list[str]) -> None:
+        return {
+            "UpdateExpression": update_expression,
+            "ConditionExpression": condition["ConditionExpression"],
+            "ExpressionAttributeNames": names,
+            "ExpressionAttributeValues": values,
+        }
+
+    def _refresh_single_item(self) -> None:
+        """
+        reload the states stored by other workers, keeping the changes of this worker that were not saved yet
+        """
+        changed_states: Final = {
+            instance_id: self._state_info.get(instance_id)
+            for instance_id in self._changed_instances
+        }
+        instances_to_purge: Final = self._instances_to_purge
+        last_cleanup: Final = self._last_cleanup
+        purge_changed: Final = self._purge_changed
+        changed_instances: Final = self._changed_instances
+
+        self._load_single_item()
+
+        for instance_id, state in changed_states.items():
+            if state is None:
+                self._state_info.pop(instance_id, None)
+            else:
+                self._state_info[instance_id] = state
+        if purge_changed:
+            self._instances_to_purge = instances_to_purge
+            self._last_cleanup = last_cleanup
+        self._changed_instances = changed_instances
+        self._purge_changed = purge_changed
+
+    def _save_item_per_instance(self) -> None:
+        if not self._dirty:
+            return
+
+        now: Final = Decimal(int(time.time()))
+        with self.state_table.batch_writer() as batch:
+            batch.put_item(
+                Item={
+                    InstanceStates.INSTANCE_TABLE_NAME: self._service,
+                    InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION: self._instance_key_prefix,
+                    InstanceStates.INSTANCE_TABLE_TIMESTAMP: Decimal(time.time()),
+                }
+            )
+            for instance_id in sorted(self._changed_instances):
+                key = {
+                    InstanceStates.INSTANCE_TABLE_NAME: self._service,
+                    InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION: self._instance_key_prefix
+                    + instance_id,
+                }
+                if instance_id not in self._state_info:
+                    batch.delete_item(Key=key)
+                    continue
+                # instances are only changed when they were seen by this run
+                batch.put_item(Item=self._instance_item(instance_id, now))
+                self._last_seen[instance_id] = now
+
+        for instance_id in sorted(self._migrated_instances - self._changed_instances):
+            self._put_migrated_instance(instance_id, now)
+
+        for instance_id in sorted(self._last_seen_refreshes - self._changed_instances):
+            self._write_last_seen(instance_id, now)
+
+        if self._migrated_item:
+            self.state_table.delete_item(Key=self._single_item_key)
+            self._migrated_item = False
+
+        self._dirty = False
+        self._changed_instances = set()
+        self._migrated_instances = set()
+        self._last_seen_refreshes = set()
+
+    def _instance_item(self, instance_id: str, now: Decimal) -> dict[str, Any]:
+        item: Final[dict[str, Any]] = {
+            InstanceStates.INSTANCE_TABLE_NAME: self._service,
+            InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION: self._instance_key_prefix
+            + instance_id,
+            InstanceStates.INSTANCE_TABLE_STATE: self._state_info[instance_id],
+            InstanceStates.INSTANCE_TABLE_LAST_SEEN: now,
+            InstanceStates.INSTANCE_TABLE_EXPIRES_AT: now
+            + int(InstanceStates.state_retention),
+        }
+        if instance_id in self._instances_to_purge:
+            item[InstanceStates.INSTANCE_TABLE_PURGE] = True
+        return item
+
+    def _put_migrated_instance(self, instance_id: str, now: Decimal) -> None:
+        # workers of other shards may migrate the same single item, or already store newer states for their
+        # instances, a migrated state never overwrites an instance item
+        try:
+            self.state_table.put_item(
+                Item=self._instance_item(instance_id, now),
+                ConditionExpression="attribute_not_exists(#ar)",
+                ExpressionAttributeNames={
+                    "#ar": InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION
+                },
+            )
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return
+        self._last_seen[instance_id] = now
+
+    def _write_last_seen(self, instance_id: str, now: Decimal) -> None:
+        # only the last seen time is written, the state may have been changed by the worker of another shard
+        try:
+            self.state_table.update_item(
+                Key={
+                    InstanceStates.INSTANCE_TABLE_NAME: self._service,
+                    InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION: self._instance_key_prefix
+                    + instance_id,
+                },
+                UpdateExpression="SET #last_seen = :last_seen, #expires_at = :expires_at",
+                ConditionExpression="attribute_exists(#state)",
+                ExpressionAttributeNames={
+                    "#last_seen": InstanceStates.INSTANCE_TABLE_LAST_SEEN,
+                    "#expires_at": InstanceStates.INSTANCE_TABLE_EXPIRES_AT,
+                    "#state": InstanceStates.INSTANCE_TABLE_STATE,
+                },
+                ExpressionAttributeValues={
+                    ":last_seen": now,
+                    ":expires_at": now + int(InstanceStates.state_retention),
+                },
+            )
+        except ClientError as ex:
+            # deleted by another worker in the meantime
+            if ex.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return
+        self._last_seen[instance_id] = now
+
+    def cleanup(self, instances: Iterable[str]) -> None:
         """
         Removes instance id's from the table that have been terminated or not being processed by the scheduler.
         This code contains workaround for instances not being returned by describe_instances when changing state
         When an instance is not listed it is marked for removal at next cleanup if it is not found again
-        :param instances:
+
+        With the item-per-instance layout, states expire (dynamodb TTL) when their instances are no longer seen, so
+        only the last seen time of the listed instances is refreshed. Refreshes do not write the states, which may
+        be changed concurrently by the workers of other shards
+        :param instances: ids of all instances that were described in this run
         :return:
         """
+        seen: Final = set(instances)
+        if self._layout is InstanceStateLayout.ITEM_PER_INSTANCE:
+            self._refresh_last_seen(seen)
+            return
+
         # cleanup only if the last cleanup was more than a the configured interval ago
-        if (
-            Decimal(time.time()) - Decimal(self._timestamp)
-        ) > InstanceStates.cleanup_interval:
-            self._logger.info(INF_CLEANING)
-            self._timestamp = time.time()
-            self._dirty = True
+        now: Final = Decimal(int(time.time()))
+        if now - Decimal(self._last_cleanup) <= InstanceStates.cleanup_interval:
+            return
+
+        self._logger.info(INF_CLEANING)
+        self._last_cleanup = now
+        self._purge_changed = True
+        self._dirty = True
+
+        stored_instances: Final = set(self._state_info)
+        # instances that were also not there in last cleanup
+        for i in sorted((stored_instances - seen) & self._instances_to_purge):
+            del self._state_info[i]
+            self._changed_instances.add(i)
+            self._logger.info(INF_REMOVING_INSTANCE, i)
+        # when instance is not there queue it for removal in next cleanup
+        # this step is needed because instances don't show op in describe-instances when changing state
+        for i in sorted(stored_instances - seen - self._instances_to_purge):
+            self._logger.info(INF_MOVING_FOR_PURGE, i)
+        self._instances_to_purge = stored_instances - seen - self._instances_to_purge
+
+    def _refresh_last_seen(self, seen: set[str]) -> None:
+        refresh_before: Final = (
+            Decimal(int(time.time())) - InstanceStates.cleanup_interval
+        )
+        # states stored before last seen times were recorded never expire until they are written again
+        stale: Final = {
+            instance_id
+            for instance_id in self._state_info
+            if instance_id not in self._last_seen
+            or (instance_id in seen and self._last_seen[instance_id] < refresh_before)
+        } - self._changed_instances
+        if not stale:
+            return
+
+        self._logger.info(INF_REFRESHING_LAST_SEEN, str(len(stale)))
+        self._last_seen_refreshes |= stale
+        self._dirty = True
+
+
+class InstanceStatesBatch:
+    """
+    instance states of the targets of a batched scheduling request
+
+    The single items of all targets are prefetched with batch_get_item instead of a get_item per target. The
+    changes of a target are saved in the background as soon as the target has been scheduled, while the next
+    targets are scheduled, and the batch is flushed to wait for all saves. Saves remain conditional writes, as
+    batch_write_item cannot check the version of an item
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        layout: InstanceStateLayout = InstanceStateLayout.SINGLE_ITEM,
+        use_cache: bool = False,
+    ) -> None:
+        self._table_name: Final = table_name
+        self._layout: Final = layout
+        self._use_cache: Final = use_cache
+        self._prefetched: Final[dict[tuple[str, str], dict[str, Any]]] = {}
+        self._saves: Final[list[tuple[InstanceStates, Future[Optional[Exception]]]]] = (
+            []
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock: Final = Lock()
+
+    def instance_states(self, service: str, logger: Logger) -> InstanceStates:
+        """the instance states of a single target of the batch"""
+        return InstanceStates(
+            self._table_name,
+            service,
+            logger,
+            layout=self._layout,
+            use_cache=self._use_cache,
+            batch=self,
+        )
+
+    def prefetch(self, targets: Iterable[tuple[str, str, str]], logger: Logger) -> None:
+        """
+        read the states of the (service, account, region) targets with batch_get_item
+
+        keys that are still unprocessed after {MAX_BATCH_GET_ATTEMPTS} attempts are not prefetched, the states
+        of those targets are read when they are loaded
+        """
+        if self._layout is not InstanceStateLayout.SINGLE_ITEM:
+            return
+
+        keys: Final = list(
+            {
+                (service, "{}:{}".format(account, region)): None
+                for service, account, region in targets
+            }
+        )
+        for start in range(0, len(keys), BATCH_GET_ITEM_MAX_KEYS):
+            # prefetching is best effort, any error falls back to loading the states per target
+            try:
+                self._batch_get(keys[start : start + BATCH_GET_ITEM_MAX_KEYS])
+            except Exception as ex:
+                logger.warning(WARN_PREFETCHING_STATES, str(ex))
+                return
+
+    @cached_property
+    def _dynamodb(self) -> Any:
+        return DynamoDBUtils.get_dynamodb_resource()
+
+    def _batch_get(self, keys: list[tuple[str, str]]) -> None:
+        unprocessed: list[dict[str, Any]] = [
+            {
+                InstanceStates.INSTANCE_TABLE_NAME: service,
+                InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION: account_region,
+            }
+            for service, account_region in keys
+        ]
+        items: Final[dict[tuple[str, str], dict[str, Any]]] = {}
+        for attempt in range(MAX_BATCH_GET_ATTEMPTS):
+            if attempt > 0:
+                time.sleep(BATCH_GET_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            response = self._dynamodb.batch_get_item(
+                RequestItems={
+                    self._table_name: {"Keys": unprocessed, "ConsistentRead": True}
+                }
+            )
+            for item in response.get("Responses", {}).get(self._table_name, []):
+                items[
+                    (
+                        item[InstanceStates.INSTANCE_TABLE_NAME],
+                        item[InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION],
+                    )
+                ] = item
+            unprocessed = (
+                response.get("UnprocessedKeys", {})
+                .get(self._table_name, {})
+                .get("Keys", [])
+            )
+            if not unprocessed:
+                break
+
+        not_read: Final = {
+            (
+                key[InstanceStates.INSTANCE_TABLE_NAME],
+                key[InstanceStates.INSTANCE_TABLE_ACCOUNT_REGION],
+            )
+            for key in unprocessed
+        }
+        with self._lock:
+            for key in keys:
+                if key not in not_read:
+                    # keys that were read but not returned have no stored states yet
+                    self._prefetched[key] = items.get(key, {})
+
+    def take_prefetched(
+        self, service: str, account_region: str
+    ) -> Optional[dict[str, Any]]:
+        """the prefetched item of a target, None if it was not prefetched. Items are only served once"""
+        with self._lock:
+            return self._prefetched.pop((service, account_region), None)
+
+    def submit(self, instance_states: InstanceStates) -> None:
+        """start saving the changes of `instance_states` in the background"""
+        with self._lock:
+            # a target is only saved by one worker at a time
+            previous: Final = [
+                future for states, future in self._saves if states is instance_states
+            ]
+        for future in previous:
+            future.result()
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_FLUSHES)
+            self._saves.append(
+                (
+                    instance_states,
+                    self._executor.submit(InstanceStates.flush_logged, instance_states),
+                )
+            )
+
+    def flush(self) -> None:
+        """
+        wait for the saves of all targets, a failure to save one target does not prevent the other targets from
+        being saved. The first error is raised once all targets have been saved
+        """
+        with self._lock:
+            saves: Final = list(self._saves)
+            self._saves.clear()
+            executor: Final = self._executor
+            self._executor = None
+        if executor is None:
+            return
 
-            # get key of stored instances
-            stored_instances = [i for i in list(self._state_info)]
-            for i in stored_instances:
-                # test if instance was still there
-                if i not in instances:
-                    # if not test is it was also not there in last cleanup
-                    if i in self._instances_to_purge:
-                        # remove instance
-                        del self._state_info[i]
-                        self._instances_to_purge.remove(i)
-                        self._logger.info(INF_REMOVING_INSTANCE, i)
-                    else:
-                        # when instance is not there queue it for removal in next cleanup
-                        # this step is needed because instances don't show op in describe-instances when changing state
-                        self._instances_to_purge.add(i)
-                        self._dirty = True
-                        self._logger.info(INF_MOVING_FOR_PURGE, i)
-                elif i in self._instances_to_purge:
-                    # the instance was not returned by describe instances at last cleanup but it is this time
-                    self._instances_to_purge.remove(i)
+        executor.shutdown(wait=True)
+        first_error: Final = next(
+            (error for _, future in saves if (error := future.result())), None
+        )
+        if first_error:
+            raise first_error
@@ -38,6 +38,13 @@ class SchedulingResult:
         self.stopped: dict[str, list[InstanceItem]] = {}
         self.resized: dict[str, list[InstanceItem]] = {}
 
+        # schedule desired-state evaluations answered from / added to the per-run cache
+        self.desired_state_cache_hits = 0
+        self.desired_state_cache_misses = 0
+
+        # time spent by the service calls that start, resize and stop instances
+        self.action_seconds = 0.0
+
     def to_output_dict(self) -> dict[str, Any]:
         return {
             "num_schedules_checked": len(self.instance_counts.by_schedule()),
@@ -45,6 +52,10 @@ class SchedulingResult:
             "started": self.started,
             "stopped": self.stopped,
             "resized": self.resized,
+            "desired_state_cache": {
+                "hits": self.desired_state_cache_hits,
+                "misses": self.desired_state_cache_misses,
+            },
         }
 
     def to_actions_taken(self, service: str) -> list[ActionTaken]:
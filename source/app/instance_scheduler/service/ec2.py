@@ -1,6 +1,9 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
+import re
 from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
 from enum import IntEnum
 from itertools import chain
 from typing import TYPE_CHECKING, Final, List, Optional
@@ -24,22 +27,42 @@ from instance_scheduler.model.store.dynamo_mw_store import DynamoMWStore
 from instance_scheduler.schedulers.states import ScheduleState
 from instance_scheduler.service import Service
 from instance_scheduler.service.ec2_instance import EC2Instance
-from instance_scheduler.util.batch import bisect_retry
+from instance_scheduler.util.batch import FailureResponse, bisect_retry
 from instance_scheduler.util.logger import Logger
+from instance_scheduler.util.pagination import paginate
+from instance_scheduler.util.prefetch import read_ahead
 from instance_scheduler.util.session_manager import AssumedRole
 
 if TYPE_CHECKING:
     from mypy_boto3_ec2.client import EC2Client
     from mypy_boto3_ec2.literals import InstanceStateNameType
-    from mypy_boto3_ec2.type_defs import FilterTypeDef, InstanceTypeDef, TagTypeDef
+    from mypy_boto3_ec2.type_defs import (
+        FilterTypeDef,
+        InstanceTypeDef,
+        ReservationTypeDef,
+        TagTypeDef,
+    )
 else:
     EC2Client = object
     InstanceStateNameType = object
     FilterTypeDef = object
     InstanceTypeDef = object
+    ReservationTypeDef = object
     TagTypeDef = object
 
 
+# the maximum page size of describe_instances
+DESCRIBE_INSTANCES_PAGE_SIZE: Final = 1000
+ASG_GROUP_NAME_TAG_KEY: Final = "aws:autoscaling:groupName"
+# the maximum number of values of a single describe_instances filter
+DESCRIBE_INSTANCES_FILTER_VALUES_LIMIT: Final = 200
+# the maximum number of describe_instances page streams that are read concurrently
+MAX_CONCURRENT_DESCRIBE_STREAMS: Final = 4
+# the maximum number of instance IDs sent in a single start, stop or tag call
+MAX_INSTANCE_IDS_PER_ACTION: Final = 1000
+_RESOURCE_ID_PATTERN: Final = re.compile(r"[\w-]+")
+
+
 class EC2StateCode(IntEnum):
     PENDING = 0x00
     RUNNING = 0x10
@@ -95,6 +118,9 @@ class Ec2Service(Service[EC2Instance]):
 
         also describe all maintenance windows, reconcile the DB with the service, and
         create `InstanceSchedule`s for each window
+
+        when describing by schedule name, only instances tagged with the name of a known schedule are
+        described, using one page stream per chunk of schedule names
         """
         self._logger.info(
             f"Fetching ec2 instances for account {self._spoke_session.account} in region {self._spoke_session.region}"
@@ -109,33 +135,72 @@ class Ec2Service(Service[EC2Instance]):
             "stopped",
             "stopping",
         ]
-        filters: Final[list[FilterTypeDef]] = [
-            {"Name": "instance-state-name", "Values": states_in_scope},
-            {"Name": "tag-key", "Values": [self._scheduler_tag_key]},
-        ]
-        for page in paginator.paginate(Filters=filters):
-            for reservation in page["Reservations"]:
-                for instance in reservation["Instances"]:
-                    if is_member_of_asg(instance):
-                        self._logger.info(
-                            f'Omitted EC2 instance with ID {instance["InstanceId"]} because it is part of an AutoScaling Group'
+        state_filter: Final[FilterTypeDef] = {
+            "Name": "instance-state-name",
+            "Values": states_in_scope,
+        }
+        tag_filters: Final[list[FilterTypeDef]] = (
+            [
+                {"Name": f"tag:{self._scheduler_tag_key}", "Values": schedule_names}
+                for schedule_names in paginate(
+                    sorted(self._scheduling_context.schedules),
+                    DESCRIBE_INSTANCES_FILTER_VALUES_LIMIT,
+                )
+            ]
+            if self._env.ec2_describe_by_schedule_name
+            else [{"Name": "tag-key", "Values": [self._scheduler_tag_key]}]
+        )
+
+        # every tag filter is an independent page stream (instances only have one schedule tag value), the next
+        # page of each stream is fetched while the instances of the current page are processed
+        for stream_filters in paginate(tag_filters, MAX_CONCURRENT_DESCRIBE_STREAMS):
+            with ExitStack() as streams:
+                page_streams = [
+                    streams.enter_context(
+                        read_ahead(
+                            paginator.paginate(
+                                Filters=[state_filter, tag_filter],
+                                PaginationConfig={
+                                    "PageSize": DESCRIBE_INSTANCES_PAGE_SIZE
+                                },
+                            ),
+                            max_buffered=1,
                         )
-                        continue
+                    )
+                    for tag_filter in stream_filters
+                ]
+                for pages in page_streams:
+                    for page in pages:
+                        yield from self._select_page_instances(page["Reservations"])
+
+    def _select_page_instances(
+        self, reservations: list[ReservationTypeDef]
+    ) -> Iterator[EC2Instance]:
+        for reservation in reservations:
+            for instance in reservation["Instances"]:
+                # single pass over the tags of each instance, shared by the asg check and the instance data
+                tags = get_tags(instance)
+                if ASG_GROUP_NAME_TAG_KEY in tags:
+                    self._logger.info(
+                        f'Omitted EC2 instance with ID {instance["InstanceId"]} because it is part of an AutoScaling Group'
+                    )
+                    continue
 
-                    ec2_instance = self._select_instance_data(instance)
+                ec2_instance = self._select_instance_data(instance, tags)
 
+                self._logger.info(
+                    f'Selected EC2 instance with ID {ec2_instance.id} in state "{ec2_instance.current_state}"'
+                )
+                if ec2_instance.maintenance_windows:
                     self._logger.info(
-                        f'Selected EC2 instance with ID {ec2_instance.id} in state "{ec2_instance.current_state}"'
+                        f"EC2 instance ({ec2_instance.id}) selected with the following maintenance windows attached: "
+                        f"{[mw.name for mw in ec2_instance.maintenance_windows]}"
                     )
-                    if ec2_instance.maintenance_windows:
-                        self._logger.info(
-                            f"EC2 instance ({ec2_instance.id}) selected with the following maintenance windows attached: "
-                            f"{[mw.name for mw in ec2_instance.maintenance_windows]}"
-                        )
-                    yield ec2_instance
+                yield ec2_instance
 
-    def _select_instance_data(self, instance: InstanceTypeDef) -> EC2Instance:
-        tags: Final = get_tags(instance)
+    def _select_instance_data(
+        self, instance: InstanceTypeDef, tags: dict[str, str]
+    ) -> EC2Instance:
         name: Final = tags.get("Name", "")
         instance_id: Final = instance["InstanceId"]
         schedule_name: Final = tags.get(self._scheduler_tag_key, "")
@@ -204,6 +269,9 @@ class Ec2Service(Service[EC2Instance]):
 
         tag instances that were successfully stopped with the stop tag keys and values
         configured at a stack value, and remove start tag keys from the same instances
+
+        instances are stopped in chunks of at most MAX_INSTANCE_IDS_PER_ACTION, chunks are
+        stopped concurrently and each chunk is tagged as soon as it has been stopped
         """
         instance_ids_to_hibernate: Final[list[str]] = []
         instance_ids_to_stop: Final[list[str]] = []
@@ -221,16 +289,66 @@ class Ec2Service(Service[EC2Instance]):
             else:
                 instance_ids_to_stop.append(instance.id)
 
-        hibernate_responses: Final = bisect_retry(
-            instance_ids_to_hibernate,
-            lambda ids: self._ec2.stop_instances(InstanceIds=ids, Hibernate=True),
+        stopping_instance_ids: Final[list[str]] = []
+
+        with ThreadPoolExecutor(max_workers=self._action_concurrency) as executor:
+            hibernate_futures: Final = [
+                executor.submit(self._stop_chunk, chunk, hibernate=True)
+                for chunk in paginate(
+                    instance_ids_to_hibernate, MAX_INSTANCE_IDS_PER_ACTION
+                )
+            ]
+            stop_futures: Final = [
+                executor.submit(self._stop_chunk, chunk, hibernate=False)
+                for chunk in paginate(instance_ids_to_stop, MAX_INSTANCE_IDS_PER_ACTION)
+            ]
+
+            for future in as_completed(hibernate_futures):
+                hibernating_ids, unsupported_ids = future.result()
+                stopping_instance_ids.extend(hibernating_ids)
+                # fall back on a regular stop as soon as the hibernate chunk completes
+                stop_futures.extend(
+                    executor.submit(self._stop_chunk, chunk, hibernate=False)
+                    for chunk in paginate(unsupported_ids, MAX_INSTANCE_IDS_PER_ACTION)
+                )
+
+            for future in stop_futures:
+                stopped_ids, _ = future.result()
+                stopping_instance_ids.extend(stopped_ids)
+
+        yield from (
+            (instance_id, ScheduleState.STOPPED)
+            for instance_id in stopping_instance_ids
         )
 
-        stopping_instance_ids: Final[list[str]] = []
+    def _stop_chunk(
+        self, instance_ids: list[str], *, hibernate: bool
+    ) -> tuple[list[str], list[str]]:
+        """
+        stop (or hibernate) a chunk of EC2 instances with IDs in `instance_ids` and tag the instances that are
+        stopping
+
+        @returns the IDs of the instances that are stopping and the IDs of the instances that could not be
+        hibernated because they are not configured for hibernation
+        """
+        if hibernate:
+            responses = bisect_retry(
+                instance_ids,
+                lambda ids: self._ec2.stop_instances(InstanceIds=ids, Hibernate=True),
+                classify_error=_instance_ids_named_in_error,
+            )
+        else:
+            responses = bisect_retry(
+                instance_ids,
+                lambda ids: self._ec2.stop_instances(InstanceIds=ids),
+                classify_error=_instance_ids_named_in_error,
+            )
 
-        for response in hibernate_responses.failure_responses:
+        unsupported_hibernation_ids: Final[list[str]] = []
+        for response in responses.failure_responses:
             if (
-                isinstance(response.error, ClientError)
+                hibernate
+                and isinstance(response.error, ClientError)
                 and response.error.response["Error"]["Code"]
                 == "UnsupportedHibernationConfiguration"
             ):
@@ -238,7 +356,7 @@ class Ec2Service(Service[EC2Instance]):
                     "EC2 instance with ID {} not configured for hibernation, attempting to stop",
                     response.failed_input,
                 )
-                instance_ids_to_stop.append(response.failed_input)
+                unsupported_hibernation_ids.append(response.failed_input)
             else:
                 self._logger.error(
                     "Failed to stop EC2 instance with ID {}: {}",
@@ -246,30 +364,11 @@ class Ec2Service(Service[EC2Instance]):
                     str(response.error),
                 )
 
-        stopping_instance_ids.extend(
-            chain.from_iterable(
-                (instance["InstanceId"] for instance in response["StoppingInstances"])
-                for response in hibernate_responses.success_responses
-            )
-        )
-
-        stop_responses: Final = bisect_retry(
-            instance_ids_to_stop, lambda ids: self._ec2.stop_instances(InstanceIds=ids)
-        )
-
-        for response in stop_responses.failure_responses:
-            self._logger.error(
-                "Failed to stop EC2 instance with ID {}: {}",
-                response.failed_input,
-                str(response.error),
-            )
-
-        stopping_instance_ids.extend(
-            chain.from_iterable(
-                (instance["InstanceId"] for instance in response["StoppingInstances"])
-                for response in stop_responses.success_responses
-            )
-        )
+        stopping_instance_ids: Final = [
+            instance["InstanceId"]
+            for response in responses.success_responses
+            for instance in response["StoppingInstances"]
+        ]
 
         self._tag_instances(
             stopping_instance_ids,
@@ -277,10 +376,7 @@ class Ec2Service(Service[EC2Instance]):
             tag_templates_to_remove=self._scheduling_context.started_tags,
         )
 
-        yield from (
-            (instance_id, ScheduleState.STOPPED)
-            for instance_id in stopping_instance_ids
-        )
+        return stopping_instance_ids, unsupported_hibernation_ids
 
     def start_instances(
         self, instances_to_start: list[EC2Instance]
@@ -293,33 +389,56 @@ class Ec2Service(Service[EC2Instance]):
 
         @returns a tuple of instances that failed to start and the error message associated
         """
+        with ThreadPoolExecutor(max_workers=self._action_concurrency) as executor:
+            failures: Final = list(
+                chain.from_iterable(
+                    executor.map(
+                        self._start_chunk,
+                        paginate(instances_to_start, MAX_INSTANCE_IDS_PER_ACTION),
+                    )
+                )
+            )
+
+        for failure in failures:
+            self._logger.error(
+                "Failed to start EC2 instance with ID {}: {}",
+                failure.failed_input,
+                str(failure.error),
+            )
+
+            yield failure.failed_input, failure.error
+
+    def _start_chunk(
+        self, instances: list[EC2Instance]
+    ) -> list[FailureResponse[EC2Instance]]:
+        """
+        start a chunk of EC2 instances and tag the instances that are starting
+
+        @returns the instances that failed to start
+        """
         responses: Final = bisect_retry(
-            instances_to_start,
-            lambda instances: self._ec2.start_instances(
-                InstanceIds=[instance.id for instance in instances]
+            instances,
+            lambda chunk: self._ec2.start_instances(
+                InstanceIds=[instance.id for instance in chunk]
             ),
+            classify_error=_instances_named_in_error,
         )
-        starting_instance_ids: Final[list[str]] = []
-
-        for response in responses.success_responses:
-            starting_instance_ids.extend(
-                instance["InstanceId"] for instance in response["StartingInstances"]
-            )
 
         self._tag_instances(
-            starting_instance_ids,
+            [
+                instance["InstanceId"]
+                for response in responses.success_responses
+                for instance in response["StartingInstances"]
+            ],
             tag_templates_to_add=self._scheduling_context.started_tags,
             tag_templates_to_remove=self._scheduling_context.stopped_tags,
         )
 
-        for failure in responses.failure_responses:
-            self._logger.error(
-                "Failed to start EC2 instance with ID {}: {}",
-                failure.failed_input,
-                str(failure.error),
-            )
+        return responses.failure_responses
 
-            yield failure.failed_input, failure.error
+    @property
+    def _action_concurrency(self) -> int:
+        return max(1, self._env.ec2_action_concurrency)
 
     def _tag_instances(
         self,
@@ -379,10 +498,37 @@ class Ec2Service(Service[EC2Instance]):
                 )
 
 
+def instance_ids_named_in_error(
+    instance_ids: list[str], error: Exception
+) -> frozenset[str]:
+    """
+    the IDs in `instance_ids` that are named in the message of an EC2 error
+
+    errors such as InvalidInstanceID.NotFound and IncorrectInstanceState name the
+    instances that caused the call to fail
+    """
+    if not isinstance(error, ClientError):
+        return frozenset()
+    message: Final = error.response.get("Error", {}).get("Message", "")
+    return frozenset(_RESOURCE_ID_PATTERN.findall(message)).intersection(instance_ids)
+
+
+def _instance_ids_named_in_error(
+    instance_ids: list[str], error: Exception
+) -> list[int]:
+    failed_ids: Final = instance_ids_named_in_error(instance_ids, error)
+    return [
+        index
+        for index, instance_id in enumerate(instance_ids)
+        if instance_id in failed_ids
+    ]
+
+
+def _instances_named_in_error(
+    instances: list[EC2Instance], error: Exception
+) -> list[int]:
+    return _instance_ids_named_in_error([instance.id for instance in instances], error)
+
+
 def is_member_of_asg(instance: InstanceTypeDef) -> bool:
-    return any(
-        True
-        for _ in filter(
-            lambda x: x["Key"] == "aws:autoscaling:groupName", instance["Tags"]
-        )
-    )
+    return any(tag["Key"] == ASG_GROUP_NAME_TAG_KEY for tag in instance.get("Tags", []))
@@ -1,11 +1,11 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 import re
-from collections.abc import Iterator, Sequence
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, time, timedelta
-from functools import cached_property
-from itertools import chain
-from typing import TYPE_CHECKING, Any, Final, Optional, TypedDict
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, Any, Final, Optional, TypedDict, TypeVar
 from zoneinfo import ZoneInfo
 
 from instance_scheduler.boto_retry import get_client_with_standard_retry
@@ -27,8 +27,10 @@ from instance_scheduler.handler.environments.scheduling_request_environment impo
 from instance_scheduler.schedulers.states import ScheduleState
 from instance_scheduler.service import Service
 from instance_scheduler.service.rds_instance import RdsInstance
+from instance_scheduler.service.rds_snapshot_manager import RdsSnapshotManager
 from instance_scheduler.util.logger import Logger
 from instance_scheduler.util.pagination import paginate
+from instance_scheduler.util.prefetch import read_ahead
 from instance_scheduler.util.session_manager import AssumedRole
 
 if TYPE_CHECKING:
@@ -37,6 +39,7 @@ if TYPE_CHECKING:
     from mypy_boto3_resourcegroupstaggingapi.client import (
         ResourceGroupsTaggingAPIClient,
     )
+    from mypy_boto3_resourcegroupstaggingapi.type_defs import FailureInfoTypeDef
 else:
     RDSClient = object
     DBClusterTypeDef = object
@@ -45,6 +48,7 @@ else:
     DescribeDBInstancesMessageRequestTypeDef = object
     TagTypeDef = object
     ResourceGroupsTaggingAPIClient = object
+    FailureInfoTypeDef = object
     GetResourcesInputRequestTypeDef = object
 
 RESTRICTED_RDS_TAG_VALUE_SET_CHARACTERS = r"[^a-zA-Z0-9\s_\.:+/=\\@-]"
@@ -56,6 +60,23 @@ RDS_CLUSTER_ENGINES: Final = frozenset(
 )
 
 ResourceArn = str
+T = TypeVar("T")
+
+# the maximum number of values in a describe_db_instances/describe_db_clusters filter (see ADR-0007)
+DESCRIBE_FILTER_VALUES_LIMIT: Final = 50
+# the maximum page size of unfiltered describe_db_instances/describe_db_clusters calls
+DESCRIBE_PAGE_SIZE: Final = 100
+# filtered describes return at most 50 resources per call while unfiltered describes return 100, so describing the
+# whole account takes fewer calls once at least half of its resources are tagged
+UNFILTERED_DESCRIBE_TAGGED_RATIO: Final = 0.5
+# the maximum number of filtered describe calls made concurrently per resource type
+MAX_CONCURRENT_DESCRIBES: Final = 4
+
+# the maximum number of distinct preferred maintenance windows whose schedules are cached
+MAINTENANCE_WINDOW_SCHEDULE_CACHE_SIZE: Final = 1024
+
+# the maximum number of resource ARNs in a single tag_resources or untag_resources call
+RGTA_MAX_ARNS_PER_TAG_CALL: Final = 20
 
 
 class RdsTagDescription(TypedDict):
@@ -63,6 +84,18 @@ class RdsTagDescription(TypedDict):
     cluster: dict[ResourceArn, dict[str, str]]
 
 
+@lru_cache(maxsize=MAINTENANCE_WINDOW_SCHEDULE_CACHE_SIZE)
+def maintenance_window_schedule(period_str: str) -> InstanceSchedule:
+    """
+    the schedule of an rds preferred maintenance window, shared by every resource with the same window
+
+    schedules are cached at module level so that they survive warm lambda invocations together with the
+    transition tables they compile, which makes the maintenance window check a table lookup after the first run
+    of the day
+    """
+    return RdsService.build_schedule_from_maintenance_window(period_str)
+
+
 class RdsService(Service[RdsInstance]):
     RDS_STATE_AVAILABLE = "available"
     RDS_STATE_STOPPED = "stopped"
@@ -93,6 +126,12 @@ class RdsService(Service[RdsInstance]):
         self._env: Final = env
 
         self._instance_tags: Optional[dict[str, dict[str, dict[str, str]]]] = None
+        self._snapshots: Final = RdsSnapshotManager(
+            self._rds_client,
+            stack_name=env.stack_name,
+            logger=logger,
+            concurrency=env.rds_action_concurrency,
+        )
 
         self._enabled_services = []
         if self._env.enable_rds_service:
@@ -311,29 +350,22 @@ class RdsService(Service[RdsInstance]):
         if not tagged_instances:
             return
 
-        instance_arns = list(tagged_instances.keys())
-
-        paginator = self._rds_client.get_paginator("describe_db_instances")
-        for arn_page in paginate(instance_arns, 50):
-            for page in paginator.paginate(
-                Filters=[
-                    {
-                        "Name": "db-instance-id",
-                        "Values": arn_page,
-                    },
-                ],
-                PaginationConfig={"PageSize": 50},
-            ):
-                for instance in page.get("DBInstances", []):
-                    if self.instance_is_in_scope(instance):
-                        rds_instance = self._parse_as_rds_instance(
-                            rds_resource=instance,
-                            is_cluster=False,
-                        )
-                        self._logger.debug(
-                            f"Selected rds instance {rds_instance.id} in state ({rds_instance.current_state}) for schedule {rds_instance.schedule_name}",
-                        )
-                        yield rds_instance
+        for instance in self._describe_tagged_resources(
+            self._describe_db_instances,
+            list(tagged_instances.keys()),
+            self._count_account_resources("DBInstances"),
+        ):
+            if instance["DBInstanceArn"] not in tagged_instances:
+                continue
+            if self.instance_is_in_scope(instance):
+                rds_instance = self._parse_as_rds_instance(
+                    rds_resource=instance,
+                    is_cluster=False,
+                )
+                self._logger.debug(
+                    f"Selected rds instance {rds_instance.id} in state ({rds_instance.current_state}) for schedule {rds_instance.schedule_name}",
+                )
+                yield rds_instance
 
     def get_in_scope_rds_clusters(self) -> Iterator[RdsInstance]:
         tagged_clusters: dict[ResourceArn, dict[str, str]] = self.rds_resource_tags[
@@ -342,35 +374,112 @@ class RdsService(Service[RdsInstance]):
         if not tagged_clusters:
             return
 
-        # get all arns from instance_resources
-        cluster_arns = list(tagged_clusters.keys())
-        paginator = self._rds_client.get_paginator("describe_db_clusters")
-
-        for arn_page in paginate(cluster_arns, 50):
-            for page in paginator.paginate(
-                Filters=[
-                    {
-                        "Name": "db-cluster-id",
-                        "Values": arn_page,
-                    },
-                ],
-                PaginationConfig={"PageSize": 50},
-            ):
-                for cluster in page.get("DBClusters", []):
-                    if self.cluster_is_in_scope(cluster):
-                        rds_instance = self._parse_as_rds_instance(
-                            rds_resource=cluster,
-                            is_cluster=True,
-                        )
-                        self._logger.debug(
-                            f"Selected rds cluster {rds_instance.id} in state ({rds_instance.current_state}) for schedule {rds_instance.schedule_name}"
-                        )
-                        yield rds_instance
+        for cluster in self._describe_tagged_resources(
+            self._describe_db_clusters,
+            list(tagged_clusters.keys()),
+            self._count_account_resources("DBClusters"),
+        ):
+            if cluster["DBClusterArn"] not in tagged_clusters:
+                continue
+            if self.cluster_is_in_scope(cluster):
+                rds_instance = self._parse_as_rds_instance(
+                    rds_resource=cluster,
+                    is_cluster=True,
+                )
+                self._logger.debug(
+                    f"Selected rds cluster {rds_instance.id} in state ({rds_instance.current_state}) for schedule {rds_instance.schedule_name}"
+                )
+                yield rds_instance
 
     def describe_tagged_instances(self) -> Iterator[RdsInstance]:
-        rds_instances = self.get_in_scope_rds_instances()
-        rds_clusters = self.get_in_scope_rds_clusters()
-        return chain(rds_instances, rds_clusters)
+        # resolve the tagged resources before describing instances and clusters concurrently
+        _ = self.rds_resource_tags
+        with read_ahead(
+            self.get_in_scope_rds_clusters(), max_buffered=DESCRIBE_PAGE_SIZE
+        ) as rds_clusters:
+            yield from self.get_in_scope_rds_instances()
+            yield from rds_clusters
+
+    def _describe_tagged_resources(
+        self,
+        describe: Callable[[Optional[list[ResourceArn]]], list[T]],
+        tagged_arns: list[ResourceArn],
+        resource_count: Optional[int],
+    ) -> Iterator[T]:
+        """
+        describe the resources with ARNs in `tagged_arns`, either with concurrent filtered describes of at most
+        DESCRIBE_FILTER_VALUES_LIMIT ARNs each, or with a single unfiltered describe when most of the
+        `resource_count` resources in the account are tagged. Unfiltered describes also return untagged resources
+        that must be skipped by the caller
+        """
+        if (
+            resource_count
+            and len(tagged_arns) / resource_count >= UNFILTERED_DESCRIBE_TAGGED_RATIO
+        ):
+            self._logger.debug(
+                "Describing all {} rds resources to find {} tagged resources",
+                resource_count,
+                len(tagged_arns),
+            )
+            yield from describe(None)
+            return
+
+        arn_pages: Final = list(paginate(tagged_arns, DESCRIBE_FILTER_VALUES_LIMIT))
+        if len(arn_pages) == 1:
+            yield from describe(arn_pages[0])
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_CONCURRENT_DESCRIBES, len(arn_pages))
+        ) as executor:
+            for resources in executor.map(describe, arn_pages):
+                yield from resources
+
+    def _describe_db_instances(
+        self, arns: Optional[list[ResourceArn]]
+    ) -> list[DBInstanceTypeDef]:
+        paginator: Final = self._rds_client.get_paginator("describe_db_instances")
+        pages: Final = (
+            paginator.paginate(PaginationConfig={"PageSize": DESCRIBE_PAGE_SIZE})
+            if arns is None
+            else paginator.paginate(
+                Filters=[{"Name": "db-instance-id", "Values": arns}],
+                PaginationConfig={"PageSize": DESCRIBE_FILTER_VALUES_LIMIT},
+            )
+        )
+        return [instance for page in pages for instance in page.get("DBInstances", [])]
+
+    def _describe_db_clusters(
+        self, arns: Optional[list[ResourceArn]]
+    ) -> list[DBClusterTypeDef]:
+        paginator: Final = self._rds_client.get_paginator("describe_db_clusters")
+        pages: Final = (
+            paginator.paginate(PaginationConfig={"PageSize": DESCRIBE_PAGE_SIZE})
+            if arns is None
+            else paginator.paginate(
+                Filters=[{"Name": "db-cluster-id", "Values": arns}],
+                PaginationConfig={"PageSize": DESCRIBE_FILTER_VALUES_LIMIT},
+            )
+        )
+        return [cluster for page in pages for cluster in page.get("DBClusters", [])]
+
+    def _count_account_resources(self, quota_name: str) -> Optional[int]:
+        """
+        the number of resources counted against the account quota `quota_name` (DBInstances or DBClusters), or None
+        if the quotas cannot be described
+        """
+        try:
+            quotas: Final = self._rds_client.describe_account_attributes()[
+                "AccountQuotas"
+            ]
+        except Exception as ex:
+            self._logger.debug("Unable to describe rds account quotas: {}", str(ex))
+            return None
+
+        for quota in quotas:
+            if quota.get("AccountQuotaName") == quota_name:
+                return int(quota.get("Used", 0))
+        return None
 
     def _parse_as_rds_instance(
         self, rds_resource: Any, is_cluster: bool
@@ -411,9 +520,7 @@ class RdsService(Service[RdsInstance]):
             ),
             _engine_type=rds_resource["Engine"],
             _maintenance_windows=[
-                RdsService.build_schedule_from_maintenance_window(
-                    rds_resource["PreferredMaintenanceWindow"]
-                )
+                maintenance_window_schedule(rds_resource["PreferredMaintenanceWindow"])
             ],
             _tags=tags,
             _name=tags.get("Name", ""),
@@ -447,157 +554,210 @@ class RdsService(Service[RdsInstance]):
         return result
 
     def _stop_instance(self, inst: RdsInstance) -> None:
-        def does_snapshot_exist(name: str) -> bool:
-            try:
-                resp = self._rds_client.describe_db_snapshots(
-                    DBSnapshotIdentifier=name, SnapshotType="manual"
-                )
-                snapshot = resp.get("DBSnapshots", None)
-                return snapshot is not None
-            except Exception as ex:
-                if type(ex).__name__ == "DBSnapshotNotFoundFault":
-                    return False
-                else:
-                    raise ex
-
-        args = {"DBInstanceIdentifier": inst.id}
-
         if self._env.enable_rds_snapshots:
-            snapshot_name = "{}-stopped-{}".format(self._stack_name, inst.id).replace(
-                " ", ""
-            )
-            args["DBSnapshotIdentifier"] = snapshot_name
+            # previous snapshots have been deleted by stop_instances
+            self._rds_client.stop_db_instance(
+                DBInstanceIdentifier=inst.id,
+                DBSnapshotIdentifier=self._snapshots.snapshot_name(inst.id),
+            )  # exception caught upstream
+            self._snapshots.record_snapshot(inst.id)
+        else:
+            self._rds_client.stop_db_instance(
+                DBInstanceIdentifier=inst.id
+            )  # exception caught upstream
 
-            try:
-                if does_snapshot_exist(snapshot_name):
-                    self._rds_client.delete_db_snapshot(
-                        DBSnapshotIdentifier=snapshot_name
-                    )
-                    self._logger.info("Deleted previous snapshot {}", snapshot_name)
-            except Exception:
-                self._logger.error("Error deleting snapshot {}", snapshot_name)
-
-        self._rds_client.stop_db_instance(**args)  # exception caught upstream
-
-    def _tag_stopped_resource(self, rds_resource: RdsInstance) -> None:
-        stop_tags = self._validate_rds_tag_values(self._scheduling_context.stopped_tags)
-        if stop_tags is None:
-            stop_tags = []
-        stop_tags_key_names = {t["Key"] for t in stop_tags}
-
-        start_tags_keys = [
-            t["Key"]
-            for t in self._scheduling_context.started_tags
-            if t["Key"] not in stop_tags_key_names
+    def _tag_resources(
+        self,
+        resources: list[RdsInstance],
+        *,
+        state: str,
+        tag_templates_to_add: list[TagTemplate],
+        tag_templates_to_remove: list[TagTemplate],
+    ) -> None:
+        """
+        add tags in `tag_templates_to_add` to `resources` and remove tag keys in `tag_templates_to_remove` from the
+        same resources, using the resource groups tagging api in batches of RGTA_MAX_ARNS_PER_TAG_CALL ARNs
+
+        tag keys that appear in both lists are updated with the values in `tag_templates_to_add`. Failures are
+        reported per resource
+        """
+        tags_to_add: Final = {
+            tag["Key"]: tag["Value"]
+            for tag in self._validate_rds_tag_values(tag_templates_to_add)
+        }
+        tag_keys_to_remove: Final = [
+            tag["Key"]
+            for tag in tag_templates_to_remove
+            if tag["Key"] not in tags_to_add
         ]
 
-        try:
-            if len(start_tags_keys):
+        for batch in paginate(resources, RGTA_MAX_ARNS_PER_TAG_CALL):
+            arns = [resource.arn for resource in batch]
+            if tag_keys_to_remove:
                 self._logger.info(
-                    "Removing start key(s) {} from instance {}",
-                    ",".join(['"{}"'.format(k) for k in start_tags_keys]),
-                    rds_resource.arn,
+                    "Removing {} key(s) {} from rds resources {}",
+                    "stop" if state == "started" else "start",
+                    ",".join(['"{}"'.format(k) for k in tag_keys_to_remove]),
+                    ", ".join(arns),
                 )
-                self._rds_client.remove_tags_from_resource(
-                    ResourceName=rds_resource.arn, TagKeys=start_tags_keys
+                self._report_tagging_failures(
+                    batch,
+                    state,
+                    lambda: self._rgta_client.untag_resources(
+                        ResourceARNList=arns, TagKeys=tag_keys_to_remove
+                    )["FailedResourcesMap"],
                 )
-            if len(stop_tags) > 0:
+            if tags_to_add:
                 self._logger.info(
-                    "Adding stop tags {} to instance {}",
-                    str(stop_tags),
-                    rds_resource.arn,
+                    "Adding {} tags {} to rds resources {}",
+                    "start" if state == "started" else "stop",
+                    str(tags_to_add),
+                    ", ".join(arns),
                 )
-                self._rds_client.add_tags_to_resource(
-                    ResourceName=rds_resource.arn, Tags=stop_tags
+                self._report_tagging_failures(
+                    batch,
+                    state,
+                    lambda: self._rgta_client.tag_resources(
+                        ResourceARNList=arns, Tags=tags_to_add
+                    )["FailedResourcesMap"],
                 )
-        except Exception as ex:
-            self._logger.warning(
-                "Error setting start or stop tags to stopped instance {}, ({})",
-                rds_resource.id,
-                str(ex),
-            )
 
-    def _tag_started_instances(self, rds_resource: RdsInstance) -> None:
-        start_tags = self._validate_rds_tag_values(
-            self._scheduling_context.started_tags
-        )
-        if start_tags is None:
-            start_tags = []
-        start_tags_key_names = {t["Key"] for t in start_tags}
-
-        stop_tags_keys = [
-            t["Key"]
-            for t in self._scheduling_context.stopped_tags
-            if t["Key"] not in start_tags_key_names
-        ]
+    def _report_tagging_failures(
+        self,
+        resources: list[RdsInstance],
+        state: str,
+        tag_call: Callable[[], Mapping[str, FailureInfoTypeDef]],
+    ) -> None:
         try:
-            if len(stop_tags_keys):
-                self._logger.info(
-                    "Removing stop key(s) {} from instance {}",
-                    ",".join(['"{}"'.format(k) for k in stop_tags_keys]),
-                    rds_resource.arn,
-                )
-                self._rds_client.remove_tags_from_resource(
-                    ResourceName=rds_resource.arn, TagKeys=stop_tags_keys
-                )
-            if start_tags is not None and len(start_tags) > 0:
-                self._logger.info(
-                    "Adding start tags {} to instance {}",
-                    str(start_tags),
-                    rds_resource.arn,
+            failures: Final = tag_call()
+        except Exception as ex:
+            for resource in resources:
+                self._logger.warning(
+                    "Error setting start or stop tags to {} instance {}, ({})",
+                    state,
+                    resource.id,
+                    str(ex),
                 )
-                self._rds_client.add_tags_to_resource(
-                    ResourceName=rds_resource.arn, Tags=start_tags
+            return
+
+        for resource in resources:
+            if resource.arn in failures:
+                self._logger.warning(
+                    "Error setting start or stop tags to {} instance {}, ({})",
+                    state,
+                    resource.id,
+                    failures[resource.arn].get("ErrorMessage", ""),
                 )
-        except Exception as ex:
-            self._logger.warning(
-                "Error setting start or stop tags to started instance {}, ({})",
-                rds_resource.id,
-                str(ex),
-            )
 
     def stop_instances(
         self, instances_to_stop: list[RdsInstance]
     ) -> Iterator[tuple[str, ScheduleState]]:
-        for instance in instances_to_stop:
-            try:
-                if instance.is_cluster:
-                    self._rds_client.stop_db_cluster(DBClusterIdentifier=instance.id)
-                    self._logger.info('Stopped rds cluster "{}"', instance.id)
-                else:
-                    self._stop_instance(instance)
-                    self._logger.info('Stopped rds instance "{}"', instance.id)
-
-                self._tag_stopped_resource(instance)
+        if self._env.enable_rds_snapshots:
+            undeleted_snapshot_ids: Final = self._snapshots.delete_previous_snapshots(
+                instance.id for instance in instances_to_stop if not instance.is_cluster
+            )
+            for instance in instances_to_stop:
+                if not instance.is_cluster and instance.id in undeleted_snapshot_ids:
+                    self._logger.error(
+                        "Error stopping rds instance {}, (previous snapshot {} could not be deleted)",
+                        instance.display_str,
+                        self._snapshots.snapshot_name(instance.id),
+                    )
+            instances_to_stop = [
+                instance
+                for instance in instances_to_stop
+                if instance.is_cluster or instance.id not in undeleted_snapshot_ids
+            ]
 
-                yield instance.id, ScheduleState.STOPPED
-            except Exception as ex:
+        stopped_instances: Final[list[RdsInstance]] = []
+        for instance, error in self._for_each_resource(
+            self._stop_resource, instances_to_stop
+        ):
+            if error is None:
+                stopped_instances.append(instance)
+            else:
                 self._logger.error(
                     "Error stopping rds {} {}, ({})",
                     "cluster" if instance.is_cluster else "instance",
                     instance.display_str,
-                    str(ex),
+                    str(error),
                 )
 
-    def start_instances(
-        self, instances_to_start: list[RdsInstance]
-    ) -> Iterator[tuple[RdsInstance, Exception]]:
+        self._tag_resources(
+            stopped_instances,
+            state="stopped",
+            tag_templates_to_add=self._scheduling_context.stopped_tags,
+            tag_templates_to_remove=self._scheduling_context.started_tags,
+        )
 
-        for instance in instances_to_start:
-            try:
-                if instance.is_cluster:
-                    self._rds_client.start_db_cluster(DBClusterIdentifier=instance.id)
-                else:
-                    self._rds_client.start_db_instance(DBInstanceIdentifier=instance.id)
+        yield from (
+            (instance.id, ScheduleState.STOPPED) for instance in stopped_instances
+        )
 
-                self._tag_started_instances(instance)
+    def _stop_resource(self, instance: RdsInstance) -> None:
+        if instance.is_cluster:
+            self._rds_client.stop_db_cluster(DBClusterIdentifier=instance.id)
+            self._logger.info('Stopped rds cluster "{}"', instance.id)
+        else:
+            self._stop_instance(instance)
+            self._logger.info('Stopped rds instance "{}"', instance.id)
 
-            except Exception as ex:
+    def start_instances(
+        self, instances_to_start: list[RdsInstance]
+    ) -> Iterator[tuple[RdsInstance, Exception]]:
+        started_instances: Final[list[RdsInstance]] = []
+        for instance, error in self._for_each_resource(
+            self._start_resource, instances_to_start
+        ):
+            if error is None:
+                started_instances.append(instance)
+            else:
                 self._logger.error(
                     "Error starting rds {} {} ({})",
                     "cluster" if instance.is_cluster else "instance",
                     instance.display_str,
-                    str(ex),
+                    str(error),
                 )
 
-                yield instance, ex
+                yield instance, error
+
+        self._tag_resources(
+            started_instances,
+            state="started",
+            tag_templates_to_add=self._scheduling_context.started_tags,
+            tag_templates_to_remove=self._scheduling_context.stopped_tags,
+        )
+
+    def _start_resource(self, instance: RdsInstance) -> None:
+        if instance.is_cluster:
+            self._rds_client.start_db_cluster(DBClusterIdentifier=instance.id)
+        else:
+            self._rds_client.start_db_instance(DBInstanceIdentifier=instance.id)
+
+    def _for_each_resource(
+        self,
+        action: Callable[[RdsInstance], None],
+        resources: list[RdsInstance],
+    ) -> Iterator[tuple[RdsInstance, Optional[Exception]]]:
+        """
+        run `action` on each resource using up to rds_action_concurrency threads
+
+        @returns each resource, in order, with the error raised by `action` for that resource, if any
+        """
+
+        def capture_error(
+            resource: RdsInstance,
+        ) -> tuple[RdsInstance, Optional[Exception]]:
+            try:
+                action(resource)
+                return resource, None
+            except Exception as ex:
+                return resource, ex
+
+        concurrency: Final = min(self._env.rds_action_concurrency, len(resources))
+        if concurrency <= 1:
+            yield from map(capture_error, resources)
+            return
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            yield from executor.map(capture_error, resources)
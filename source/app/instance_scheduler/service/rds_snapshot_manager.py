@@ -0,0 +1,118 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from threading import Lock
+from typing import TYPE_CHECKING, Final
+
+from instance_scheduler.util.logger import Logger
+
+if TYPE_CHECKING:
+    from mypy_boto3_rds.client import RDSClient
+else:
+    RDSClient = object
+
+# the maximum page size of describe_db_snapshots
+DESCRIBE_SNAPSHOTS_PAGE_SIZE: Final = 100
+
+SnapshotIdentifier = str
+DBInstanceIdentifier = str
+
+
+class RdsSnapshotManager:
+    """
+    manages the manual snapshots taken when rds instances are stopped, named {stack name}-stopped-{instance id}
+
+    The snapshots of the stack are listed once per scheduling run and joined against the instances being stopped,
+    instead of describing the previous snapshot of every instance before it is stopped. Previous snapshots are
+    deleted concurrently, and the lineage (snapshot identifier -> source instance) of listed and newly created
+    snapshots is kept for the remainder of the run
+    """
+
+    def __init__(
+        self,
+        rds_client: RDSClient,
+        stack_name: str,
+        logger: Logger,
+        concurrency: int,
+    ) -> None:
+        self._rds_client: Final = rds_client
+        self._prefix: Final = "{}-stopped-".format(stack_name).replace(" ", "")
+        self._logger: Final = logger
+        self._concurrency: Final = max(1, concurrency)
+        self._lineage_lock: Final = Lock()
+
+    def snapshot_name(self, instance_id: DBInstanceIdentifier) -> SnapshotIdentifier:
+        return "{}{}".format(self._prefix, instance_id).replace(" ", "")
+
+    @cached_property
+    def lineage(self) -> dict[SnapshotIdentifier, DBInstanceIdentifier]:
+        """the source instance of each manual snapshot taken by this stack when stopping an instance"""
+        lineage: Final[dict[SnapshotIdentifier, DBInstanceIdentifier]] = {}
+        paginator: Final = self._rds_client.get_paginator("describe_db_snapshots")
+        for page in paginator.paginate(
+            SnapshotType="manual",
+            PaginationConfig={"PageSize": DESCRIBE_SNAPSHOTS_PAGE_SIZE},
+        ):
+            for snapshot in page.get("DBSnapshots", []):
+                snapshot_id = snapshot["DBSnapshotIdentifier"]
+                if snapshot_id.startswith(self._prefix):
+                    lineage[snapshot_id] = snapshot.get("DBInstanceIdentifier", "")
+        return lineage
+
+    def delete_previous_snapshots(
+        self, instance_ids: Iterable[DBInstanceIdentifier]
+    ) -> set[DBInstanceIdentifier]:
+        """
+        delete the snapshots taken by previous stops of the instances with IDs in `instance_ids`
+
+        :returns the IDs of the instances whose previous snapshot could not be deleted
+        """
+        try:
+            lineage: Final = self.lineage
+        except Exception as ex:
+            self._logger.error("Error listing rds snapshots: {}", str(ex))
+            return set()
+
+        stale_snapshots: Final = {
+            self.snapshot_name(instance_id): instance_id
+            for instance_id in instance_ids
+            if self.snapshot_name(instance_id) in lineage
+        }
+        if not stale_snapshots:
+            return set()
+
+        with ThreadPoolExecutor(
+            max_workers=min(self._concurrency, len(stale_snapshots))
+        ) as executor:
+            deleted: Final = list(
+                executor.map(self._delete_snapshot, stale_snapshots.keys())
+            )
+
+        return {
+            instance_id
+            for instance_id, is_deleted in zip(stale_snapshots.values(), deleted)
+            if not is_deleted
+        }
+
+    def record_snapshot(self, instance_id: DBInstanceIdentifier) -> None:
+        """record the snapshot taken when the instance with ID `instance_id` was stopped"""
+        with self._lineage_lock:
+            self.lineage[self.snapshot_name(instance_id)] = instance_id
+
+    def _delete_snapshot(self, snapshot_id: SnapshotIdentifier) -> bool:
+        try:
+            self._rds_client.delete_db_snapshot(DBSnapshotIdentifier=snapshot_id)
+        except Exception as ex:
+            if type(ex).__name__ != "DBSnapshotNotFoundFault":
+                self._logger.error(
+                    "Error deleting snapshot {}: {}", snapshot_id, str(ex)
+                )
+                return False
+        else:
+            self._logger.info("Deleted previous snapshot {}", snapshot_id)
+
+        with self._lineage_lock:
+            self.lineage.pop(snapshot_id, None)
+        return True
@@ -1,8 +1,8 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
-from collections.abc import Callable
+from collections.abc import Callable, Collection
 from dataclasses import dataclass, field
-from typing import Final, Generic, Self, TypeVar
+from typing import Final, Generic, Optional, Self, TypeAlias, TypeVar
 
 T = TypeVar("T")
 
@@ -15,6 +15,10 @@ class FailureResponse(Generic[T]):
 
 U = TypeVar("U")
 
+# given the inputs of a failed action and the error it raised, return the indexes of the inputs that are known to
+# have caused the error, or an empty collection if the error does not identify them
+ErrorClassifier: TypeAlias = Callable[[list[T], Exception], Collection[int]]
+
 
 @dataclass
 class BisectRetryResponse(Generic[T, U]):
@@ -31,7 +35,10 @@ class BisectRetryResponse(Generic[T, U]):
 
 
 def bisect_retry(
-    inputs: list[T], action: Callable[[list[T]], U]
+    inputs: list[T],
+    action: Callable[[list[T]], U],
+    *,
+    classify_error: Optional[ErrorClassifier[T]] = None,
 ) -> BisectRetryResponse[T, U]:
     """
     Retry an action taking a list of inputs by successively splitting the inputs in half
@@ -50,6 +57,11 @@ def bisect_retry(
     and will never result in a successful action. For this reason, `action` should
     handle ephemeral errors.
 
+    When `classify_error` is provided, it is given the inputs and error of each failed
+    action. Inputs it identifies as the cause of the error fail immediately and the
+    remaining inputs are retried in a single action. Inputs are only bisected when the
+    classifier cannot identify any of them.
+
     Return a list of responses from successful actions. For actions that failed, return
     a tuple of the single input item that resulted in an error and the error that was
     raised.
@@ -69,7 +81,33 @@ def bisect_retry(
                 intermediate_responses=[FailureResponse(failed_input=inputs, error=err)]
             )
 
+        failed_indexes: Final = (
+            frozenset(classify_error(inputs, err)).intersection(range(length))
+            if classify_error
+            else frozenset()
+        )
+        if failed_indexes:
+            result.failure_responses.extend(
+                FailureResponse(failed_input=inputs[index], error=err)
+                for index in sorted(failed_indexes)
+            )
+            return result.merge(
+                bisect_retry(
+                    [
+                        item
+                        for index, item in enumerate(inputs)
+                        if index not in failed_indexes
+                    ],
+                    action,
+                    classify_error=classify_error,
+                )
+            )
+
         midpoint: Final = length // 2
-        left: Final = bisect_retry(inputs[0:midpoint], action)
-        right: Final = bisect_retry(inputs[midpoint:], action)
+        left: Final = bisect_retry(
+            inputs[0:midpoint], action, classify_error=classify_error
+        )
+        right: Final = bisect_retry(
+            inputs[midpoint:], action, classify_error=classify_error
+        )
         return result.merge(left, right)
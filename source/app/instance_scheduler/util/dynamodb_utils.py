@@ -13,11 +13,15 @@ else:
 
 
 class DynamoDBUtils:
+    @staticmethod
+    def get_dynamodb_resource() -> (
+        Any
+    ):  # todo: switch typing to "DynamoDBServiceResource"
+        return boto3.resource("dynamodb", config=get_boto_config())
+
     @staticmethod
     def get_dynamodb_table_resource_ref(
         table_name: str,
     ) -> Any:  # todo: switch typing to "Table"
-        table: Table = boto3.resource("dynamodb", config=get_boto_config()).Table(
-            table_name
-        )
+        table: Table = DynamoDBUtils.get_dynamodb_resource().Table(table_name)
         return table
@@ -1,5 +1,6 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
+import threading
 import time
 from types import TracebackType
 from typing import TYPE_CHECKING, Any, Optional
@@ -39,6 +40,8 @@ class Logger:
         self._cached_size = 0
         self._client: Optional[CloudWatchLogsClient] = None
         self._sns: Optional[SNSClient] = None
+        # the buffer may be shared by worker threads, guard appends and flushes
+        self._lock = threading.RLock()
 
     def __enter__(self) -> "Logger":
         return self
@@ -57,15 +60,19 @@ class Logger:
             t = time.time()
             s = "{:7s} : {}".format(level, s)
 
-            if self._cached_size + (len(s) + LOG_ENTRY_ADDITIONAL) > LOG_MAX_BATCH_SIZE:
-                self.flush()
+            with self._lock:
+                if (
+                    self._cached_size + (len(s) + LOG_ENTRY_ADDITIONAL)
+                    > LOG_MAX_BATCH_SIZE
+                ):
+                    self.flush()
 
-            self._cached_size += len(s) + LOG_ENTRY_ADDITIONAL
+                self._cached_size += len(s) + LOG_ENTRY_ADDITIONAL
 
-            self._buffer.append((int(t * 1000), s))
+                self._buffer.append((int(t * 1000), s))
 
-            if len(self._buffer) >= self._buffer_size:
-                self.flush()
+                if len(self._buffer) >= self._buffer_size:
+                    self.flush()
 
             return s
         except Exception:
@@ -146,27 +153,28 @@ class Logger:
         :return:
         """
         try:
-            if len(self._buffer) == 0:
-                return
-
-            put_event_args: PutLogEventsRequestRequestTypeDef = {
-                "logGroupName": self._log_group,
-                "logStreamName": self._log_stream,
-                "logEvents": [
-                    {"timestamp": r[0], "message": r[1]} for r in self._buffer
-                ],
-            }
-
-            try:
-                self.client.create_log_stream(
-                    logGroupName=self._log_group, logStreamName=self._log_stream
-                )
-            except self.client.exceptions.ResourceAlreadyExistsException:
-                pass
-
-            self.client.put_log_events(**put_event_args)
-            self._buffer = []
-            self._cached_size = 0
+            with self._lock:
+                if len(self._buffer) == 0:
+                    return
+
+                put_event_args: PutLogEventsRequestRequestTypeDef = {
+                    "logGroupName": self._log_group,
+                    "logStreamName": self._log_stream,
+                    "logEvents": [
+                        {"timestamp": r[0], "message": r[1]} for r in self._buffer
+                    ],
+                }
+
+                try:
+                    self.client.create_log_stream(
+                        logGroupName=self._log_group, logStreamName=self._log_stream
+                    )
+                except self.client.exceptions.ResourceAlreadyExistsException:
+                    pass
+
+                self.client.put_log_events(**put_event_args)
+                self._buffer = []
+                self._cached_size = 0
         except Exception:
             if self._raise_exceptions:
                 raise
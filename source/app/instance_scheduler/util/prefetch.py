@@ -0,0 +1,74 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Any, Final, TypeVar
+
+T = TypeVar("T")
+
+# how often a blocked producer or consumer checks if the other side has gone away
+_POLL_INTERVAL_SECONDS: Final = 0.1
+
+
+class _EndOfItems:
+    pass
+
+
+class _ProducerError:
+    def __init__(self, error: BaseException) -> None:
+        self.error: Final = error
+
+
+@contextmanager
+def read_ahead(items: Iterable[T], max_buffered: int) -> Iterator[Iterator[T]]:
+    """
+    iterate {items} in a background thread, buffering up to {max_buffered} items ahead of the consumer
+
+    allows slow producers (such as paginated describe calls) to make progress while the consumer is busy
+    processing previous items. Errors raised by the producer are re-raised to the consumer at the position they
+    occurred. When the consumer exits the context early, the producer is stopped before its next item is buffered
+    """
+    buffer: Final[Queue[Any]] = Queue(maxsize=max(1, max_buffered))
+    stopped: Final = Event()
+
+    def put(item: Any) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=_POLL_INTERVAL_SECONDS)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(_EndOfItems())
+        except BaseException as e:
+            put(_ProducerError(e))
+
+    def consume() -> Iterator[T]:
+        while True:
+            try:
+                item = buffer.get(timeout=_POLL_INTERVAL_SECONDS)
+            except Empty:
+                if not producer.is_alive() and buffer.empty():
+                    return
+                continue
+            if isinstance(item, _EndOfItems):
+                return
+            if isinstance(item, _ProducerError):
+                raise item.error
+            yield item
+
+    producer: Final = Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        yield consume()
+    finally:
+        stopped.set()
+        producer.join()
@@ -1,8 +1,9 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
-from collections.abc import Iterator
+import math
+from collections.abc import Callable, Iterable, Iterator, Mapping
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Union
+from typing import TYPE_CHECKING, Final, Union
 
 import boto3
 from aws_lambda_powertools import Logger as PowerToolsLogger
@@ -13,6 +14,7 @@ from instance_scheduler.handler.environments.orchestrator_environment import (
     OrchestratorEnvironment,
 )
 from instance_scheduler.model.ddb_config_item import DdbConfigItem
+from instance_scheduler.model.target_stats import TargetStats
 from instance_scheduler.util.logger import Logger
 
 if TYPE_CHECKING:
@@ -21,15 +23,40 @@ else:
     LambdaContext = object
 
 
+# instance count assumed for targets for which no better estimate is available
+DEFAULT_TARGET_INSTANCE_ESTIMATE: Final = 50
+# targets whose start and stop calls took longer than this are split even when their instance count is within
+# limits, keeps shards well within the 5 minute timeout of the scheduling request handler
+MAX_SHARD_ACTION_SECONDS: Final = 120
+MAX_SHARDS_PER_TARGET: Final = 16
+
+
 @dataclass(frozen=True)
 class SchedulingTarget:
     account: str
     service: str
     region: str
+    # large targets may be split into multiple shards that each schedule a subset of the instances
+    shard_index: int = 0
+    shard_count: int = 1
 
     def __str__(self) -> str:
+        if self.shard_count > 1:
+            return f"{self.account}-{self.region}-{self.service}-shard-{self.shard_index + 1}-of-{self.shard_count}"
         return f"{self.account}-{self.region}-{self.service}"
 
+    @property
+    def unsharded(self) -> "SchedulingTarget":
+        return SchedulingTarget(
+            account=self.account, service=self.service, region=self.region
+        )
+
+    @classmethod
+    def of(cls, stats: TargetStats) -> "SchedulingTarget":
+        return SchedulingTarget(
+            account=stats.account, service=stats.service, region=stats.region
+        )
+
 
 def get_account_ids(
     ddb_config_item: DdbConfigItem,
@@ -80,3 +107,101 @@ def list_all_targets(
         for region in regions:
             for account in get_account_ids(ddb_config_item, env, logger, context):
                 yield SchedulingTarget(account=account, service=service, region=region)
+
+
+def batch_targets(
+    targets: Iterable[SchedulingTarget],
+    max_instances_per_batch: int,
+    estimate_instance_count: Callable[
+        [SchedulingTarget], int
+    ] = lambda _: DEFAULT_TARGET_INSTANCE_ESTIMATE,
+) -> Iterator[list[SchedulingTarget]]:
+    """
+    group consecutive targets into batches whose estimated total instance count does not exceed
+    {max_instances_per_batch}. Targets that exceed the limit on their own and shards of split targets are
+    placed in a batch by themselves.
+
+    when {max_instances_per_batch} is 0 or less, batching is disabled and every target is its own batch
+    """
+    batch: list[SchedulingTarget] = []
+    batch_instances = 0
+    for target in targets:
+        target_instances = estimate_instance_count(target)
+        if batch and (
+            max_instances_per_batch <= 0
+            or target.shard_count > 1
+            or batch[0].shard_count > 1
+            or batch_instances + target_instances > max_instances_per_batch
+        ):
+            yield batch
+            batch, batch_instances = [], 0
+        batch.append(target)
+        batch_instances += target_instances
+
+    if batch:
+        yield batch
+
+
+def shard_count_for(stats: TargetStats, max_instances_per_shard: int) -> int:
+    """
+    the number of shards a target should be split into based on the statistics of its last scheduling run
+
+    the shard count derived from the action time at most doubles per run, so that a single slow run does not
+    split a target into the maximum number of shards
+    """
+    if max_instances_per_shard <= 0:
+        return 1
+    shards_by_instances: Final = math.ceil(
+        stats.estimated_instance_count / max_instances_per_shard
+    )
+    shards_by_action_time: Final = min(
+        math.ceil(stats.estimated_action_seconds / MAX_SHARD_ACTION_SECONDS),
+        2 * stats.shard_count,
+    )
+    return min(
+        max(1, shards_by_instances, shards_by_action_time), MAX_SHARDS_PER_TARGET
+    )
+
+
+def shard_targets(
+    targets: Iterable[SchedulingTarget],
+    max_instances_per_shard: int,
+    stats: Mapping[SchedulingTarget, TargetStats],
+) -> Iterator[SchedulingTarget]:
+    """
+    split targets that were too large during their last scheduling run into multiple shards
+
+    when {max_instances_per_shard} is 0 or less, sharding is disabled
+    """
+    for target in targets:
+        target_stats = stats.get(target.unsharded)
+        shard_count = (
+            shard_count_for(target_stats, max_instances_per_shard)
+            if target_stats
+            else 1
+        )
+        if shard_count == 1:
+            yield target
+            continue
+        for shard_index in range(shard_count):
+            yield SchedulingTarget(
+                account=target.account,
+                service=target.service,
+                region=target.region,
+                shard_index=shard_index,
+                shard_count=shard_count,
+            )
+
+
+def instance_count_estimator(
+    stats: Mapping[SchedulingTarget, TargetStats]
+) -> Callable[[SchedulingTarget], int]:
+    """estimate the instance count of a target (shard) from the statistics of its last scheduling run"""
+
+    def estimate_instance_count(target: SchedulingTarget) -> int:
+        target_stats = stats.get(target.unsharded)
+        if target_stats is None:
+            return DEFAULT_TARGET_INSTANCE_ESTIMATE
+        return math.ceil(target_stats.estimated_instance_count / target.shard_count)
+
+    return estimate_instance_count
@@ -16,3 +16,12 @@ def test_get_client_with_standard_retry() -> None:
     with mock_aws():
         client: EC2Client = get_client_with_standard_retry("ec2")
         assert client.describe_instances()["Reservations"] == []
+
+
+def test_get_client_with_standard_retry_sets_connection_pool_size() -> None:
+    with mock_aws():
+        client: EC2Client = get_client_with_standard_retry(
+            "ec2", max_pool_connections=25
+        )
+        assert client.meta.config.max_pool_connections == 25  # type: ignore[attr-defined]
+        assert client.describe_instances()["Reservations"] == []
@@ -0,0 +1,93 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from instance_scheduler.configuration.instance_schedule import (
+    InstanceSchedule,
+    ScheduleTransition,
+)
+from instance_scheduler.configuration.running_period import RunningPeriod
+from instance_scheduler.configuration.running_period_dict_element import (
+    RunningPeriodDictElement,
+)
+from instance_scheduler.cron.cron_recurrence_expression import CronRecurrenceExpression
+from instance_scheduler.schedulers.states import ScheduleState
+
+
+def period(
+    name: str,
+    begintime: Optional[time] = None,
+    endtime: Optional[time] = None,
+    weekdays: set[str] = {"*"},
+    instancetype: Optional[str] = None,
+) -> RunningPeriodDictElement:
+    element: RunningPeriodDictElement = {
+        "period": RunningPeriod(
+            name=name,
+            begintime=begintime,
+            endtime=endtime,
+            cron_recurrence=CronRecurrenceExpression.parse(weekdays=weekdays),
+        )
+    }
+    if instancetype:
+        element["instancetype"] = instancetype
+    return element
+
+
+schedules = [
+    [period("office", time(9), time(17))],
+    [period("adjacent-1", time(4), time(12)), period("adjacent-2", time(12), time(17))],
+    [
+        period("day", time(6), time(18), instancetype="t3.micro"),
+        period("peak", time(10), time(14), instancetype="t3.large"),
+    ],
+    [period("start", begintime=time(8)), period("stop", endtime=time(20))],
+    [period("weekdays", time(9), time(17), weekdays={"mon-fri"}), period("all-day")],
+    [period("weekend", weekdays={"sat-sun"}), period("1-sided", begintime=time(22))],
+]
+
+
+@pytest.mark.parametrize("periods", schedules)
+def test_compiled_table_matches_period_evaluation(
+    periods: list[RunningPeriodDictElement],
+) -> None:
+    schedule = InstanceSchedule(
+        name="test", timezone=ZoneInfo("Europe/Berlin"), periods=periods
+    )
+    start = datetime(2024, 3, 29, tzinfo=ZoneInfo("Europe/Berlin"))
+    for minute in range(0, 4 * 24 * 60, 7):
+        localized_time = start + timedelta(minutes=minute)
+        expected = InstanceSchedule._combine_period_states(
+            schedule.get_periods_with_desired_states(localized_time)
+        )
+
+        assert schedule._get_desired_state_at_time(localized_time) == expected
+
+
+def test_transition_table_of_overlapping_periods() -> None:
+    schedule = InstanceSchedule(
+        name="test", timezone=ZoneInfo("UTC"), periods=schedules[2]
+    )
+
+    assert schedule.get_transition_table(date(2024, 3, 1)).transitions == [
+        ScheduleTransition(0, ScheduleState.STOPPED, None, None),
+        ScheduleTransition(6 * 3600, ScheduleState.RUNNING, "t3.micro", "day"),
+        ScheduleTransition(10 * 3600, ScheduleState.RUNNING, "t3.large", "peak"),
+        ScheduleTransition(14 * 3600, ScheduleState.RUNNING, "t3.micro", "day"),
+        ScheduleTransition(18 * 3600, ScheduleState.STOPPED, None, None),
+    ]
+
+
+def test_transition_tables_are_cached_per_date() -> None:
+    schedule = InstanceSchedule(
+        name="test", timezone=ZoneInfo("UTC"), periods=schedules[0]
+    )
+
+    table = schedule.get_transition_table(date(2024, 3, 1))
+
+    assert schedule.get_transition_table(date(2024, 3, 1)) is table
+    assert schedule.get_transition_table(date(2024, 3, 2)) is not table
@@ -149,6 +149,29 @@ def config_table(test_suite_env: TestSuiteEnv, moto_backend: None) -> Iterator[s
     yield test_suite_env.config_table_name
 
 
+@fixture
+def state_table(moto_backend: None, test_suite_env: TestSuiteEnv) -> str:
+    state_table_name = test_suite_env.state_table_name
+    dynamo_client: DynamoDBClient = boto3.client("dynamodb")
+    dynamo_client.create_table(
+        TableName=state_table_name,
+        AttributeDefinitions=[
+            {"AttributeName": "service", "AttributeType": "S"},
+            {"AttributeName": "account-region", "AttributeType": "S"},
+        ],
+        KeySchema=[
+            {"AttributeName": "service", "KeyType": "HASH"},
+            {"AttributeName": "account-region", "KeyType": "RANGE"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    dynamo_client.update_time_to_live(
+        TableName=state_table_name,
+        TimeToLiveSpecification={"AttributeName": "expires_at", "Enabled": True},
+    )
+    return state_table_name
+
+
 @fixture
 def maint_win_table(test_suite_env: TestSuiteEnv, moto_backend: None) -> Iterator[str]:
     table_name: Final = test_suite_env.maintenance_window_table_name
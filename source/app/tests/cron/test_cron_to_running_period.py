@@ -1,6 +1,6 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 
 import pytest
 
@@ -9,10 +9,16 @@ from instance_scheduler.cron.cron_to_running_period import (
     IntDomain,
     _range_to_discrete_values,
     _resolve_first_occurrence_of_weekday_in_month,
+    in_period_days,
     months_cron_expr_contains,
     resolve_nth_weekday_as_monthday,
 )
-from instance_scheduler.cron.expression import CronRange
+from instance_scheduler.cron.expression import (
+    CronAll,
+    CronRange,
+    CronSingleValueNumeric,
+    FullCronExpression,
+)
 from instance_scheduler.cron.parser import _parse_multi_general, parse_months_expr
 
 
@@ -213,3 +219,56 @@ def test_resolve_nth_weekday_as_monthday_returns_expected(
 ) -> None:
     reference_date = datetime(year=2024, month=9, day=1)
     assert resolve_nth_weekday_as_monthday(weekday, n, reference_date) == expected
+
+
+@pytest.mark.parametrize(
+    "monthdays,months,weekdays",
+    [
+        ({"*"}, {"*"}, {"*"}),
+        ({"1-10/3", "L"}, {"*"}, {"*"}),
+        ({"15W"}, {"feb-apr", "dec"}, {"*"}),
+        ({"*"}, {"*"}, {"mon-fri"}),
+        ({"*"}, {"*"}, {"sat#2", "fri#5", "wedL"}),
+        ({"1-15"}, {"jan/3"}, {"sun-tue"}),
+        ({"30-L"}, {"*"}, {"5-2"}),
+    ],
+)
+def test_contains_days_matches_single_day_evaluation(
+    monthdays: set[str], months: set[str], weekdays: set[str]
+) -> None:
+    expr = CronRecurrenceExpression.parse(
+        monthdays=monthdays, months=months, weekdays=weekdays
+    )
+    start = date(2023, 11, 17)
+    end = date(2025, 3, 2)
+
+    mask = expr.contains_days(start, end)
+
+    assert len(mask) == (end - start).days
+    for index, matches in enumerate(mask):
+        day = start + timedelta(days=index)
+        assert matches == expr.contains(
+            datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        ), day
+
+
+def test_contains_days_of_empty_range() -> None:
+    assert (
+        CronRecurrenceExpression().contains_days(date(2024, 3, 1), date(2024, 3, 1))
+        == bytearray()
+    )
+
+
+def test_in_period_days() -> None:
+    expr = FullCronExpression(
+        days_of_month=CronAll(),
+        months_of_year=CronAll(),
+        days_of_week=CronRange(
+            start=CronSingleValueNumeric(0), end=CronSingleValueNumeric(4)
+        ),
+    )
+
+    # 2024-03-01 is a friday
+    assert in_period_days(expr, date(2024, 3, 1), date(2024, 3, 8)) == bytearray(
+        [1, 0, 0, 1, 1, 1, 1]
+    )
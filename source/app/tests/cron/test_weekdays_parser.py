@@ -276,3 +276,16 @@ def test_invalid_nth_weekday() -> None:
         parse_weekdays_expr({"0#0"})
     with raises(ValueError):
         parse_weekdays_expr({"L-2"})  # range cannot start with L
+
+
+def test_weekdays_parser_caches_parsed_expressions() -> None:
+    first = parse_weekdays_expr({"mon-fri", "sun"})
+
+    assert parse_weekdays_expr({"sun", "mon-fri"}) is first
+    assert parse_weekdays_expr({"mon-fri"}) is not first
+
+
+def test_weekdays_parser_does_not_cache_errors() -> None:
+    for _ in range(2):
+        with raises(ValueError):
+            parse_weekdays_expr({"mon-frx"})
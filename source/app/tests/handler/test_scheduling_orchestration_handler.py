@@ -10,10 +10,12 @@ from _pytest.fixtures import fixture
 from instance_scheduler.handler.scheduling_orchestrator import (
     OrchestrationRequest,
     SchedulingOrchestratorHandler,
+    SchedulingRequestPayloadBuilder,
     prefetch_schedules_and_periods,
 )
 from instance_scheduler.handler.scheduling_request import SchedulingRequest
 from instance_scheduler.model.ddb_config_item import DdbConfigItem
+from instance_scheduler.model.period_definition import PeriodDefinition
 from instance_scheduler.model.period_identifier import PeriodIdentifier
 from instance_scheduler.model.schedule_definition import ScheduleDefinition
 from instance_scheduler.model.store.ddb_config_item_store import DdbConfigItemStore
@@ -23,6 +25,15 @@ from instance_scheduler.model.store.dynamo_period_definition_store import (
 from instance_scheduler.model.store.dynamo_schedule_definition_store import (
     DynamoScheduleDefinitionStore,
 )
+from instance_scheduler.model.store.in_memory_period_definition_store import (
+    InMemoryPeriodDefinitionStore,
+)
+from instance_scheduler.model.store.in_memory_schedule_definition_store import (
+    InMemoryScheduleDefinitionStore,
+)
+from instance_scheduler.model.store.target_stats_store import TargetStatsStore
+from instance_scheduler.model.target_stats import TargetStats
+from instance_scheduler.util.scheduling_target import DEFAULT_TARGET_INSTANCE_ESTIMATE
 from tests.context import MockLambdaContext
 from tests.logger import MockLogger
 from tests.test_utils.mock_orchestrator_environment import MockOrchestratorEnvironment
@@ -101,6 +112,120 @@ def test_prefetch_gracefully_handles_invalid_configurations(
     # todo: write assertions against the errors that get logged to sns (see output to MockLogger)
 
 
+# ##------------------- PAYLOAD ENCODING -----------------## #
+def build_payload_test_stores() -> (
+    tuple[InMemoryScheduleDefinitionStore, InMemoryPeriodDefinitionStore]
+):
+    schedules = InMemoryScheduleDefinitionStore(
+        {
+            "my-schedule": ScheduleDefinition(
+                name="my-schedule",
+                timezone="UTC",
+                periods=[PeriodIdentifier.of("my-period", "t2.micro")],
+            )
+        }
+    )
+    periods = InMemoryPeriodDefinitionStore(
+        {
+            "my-period": PeriodDefinition(
+                name="my-period", begintime="10:00", weekdays={"mon-fri"}
+            )
+        }
+    )
+    return schedules, periods
+
+
+def sample_request(account: str = "111122223333") -> SchedulingRequest:
+    return SchedulingRequest(
+        action="scheduler:run",
+        account=account,
+        region="us-east-1",
+        service="ec2",
+        current_dt="2024-03-01T10:00:00+00:00",
+        dispatch_time="2024-03-01T10:00:00+00:00",
+    )
+
+
+def test_payload_builder_encodes_same_bytes_as_full_request() -> None:
+    schedules, periods = build_payload_test_stores()
+    builder = SchedulingRequestPayloadBuilder(
+        schedules=schedules,
+        periods=periods,
+        capacity_bytes=200_000,
+    )
+
+    for account in ["111122223333", "222233334444"]:
+        full_request = sample_request(account)
+        full_request["schedules"] = schedules.serialize()
+        full_request["periods"] = periods.serialize()
+
+        assert builder.build(sample_request(account)) == str.encode(
+            json.dumps(full_request)
+        )
+
+
+def test_payload_builder_uses_compact_format_when_payload_is_too_large() -> None:
+    schedules, periods = build_payload_test_stores()
+    for index in range(100):
+        schedules.put(
+            ScheduleDefinition(
+                name=f"schedule-{index}",
+                timezone="UTC",
+                periods=[PeriodIdentifier.of("my-period", "t2.micro")],
+            )
+        )
+    full_request = sample_request()
+    full_request["schedules"] = schedules.serialize()
+    full_request["periods"] = periods.serialize()
+    capacity = len(json.dumps(full_request)) - 1
+
+    builder = SchedulingRequestPayloadBuilder(
+        schedules=schedules,
+        periods=periods,
+        capacity_bytes=capacity,
+    )
+
+    scheduling_request = json.loads(builder.build(sample_request()))
+    assert scheduling_request["schedules"] == schedules.serialize(compact=True)
+    assert scheduling_request["periods"] == periods.serialize(compact=True)
+    assert (
+        InMemoryScheduleDefinitionStore.deserialize(
+            scheduling_request["schedules"]
+        ).find_all()
+        == schedules.find_all()
+    )
+
+
+def test_payload_builder_strips_periods_first_when_payload_is_too_large() -> None:
+    schedules, periods = build_payload_test_stores()
+    request_with_schedules = sample_request()
+    request_with_schedules["schedules"] = schedules.serialize(compact=True)
+    capacity = len(json.dumps(request_with_schedules))
+
+    builder = SchedulingRequestPayloadBuilder(
+        schedules=schedules,
+        periods=periods,
+        capacity_bytes=capacity,
+    )
+
+    payload = builder.build(sample_request())
+    assert json.loads(payload) == request_with_schedules
+
+
+def test_payload_builder_strips_schedules_and_periods_when_payload_is_too_large() -> (
+    None
+):
+    schedules, periods = build_payload_test_stores()
+    builder = SchedulingRequestPayloadBuilder(
+        schedules=schedules,
+        periods=periods,
+        capacity_bytes=0,
+    )
+
+    payload = builder.build(sample_request())
+    assert json.loads(payload) == sample_request()
+
+
 # ##------------------- FAN OUT BEHAVIOR -----------------## #
 def test_no_region_provided_uses_local_region(
     mocked_lambda_invoke: MagicMock,
@@ -393,6 +518,181 @@ def test_3account_3region_2service_calls_scheduler_x18(
         assert scheduling_request["service"]
 
 
+def test_concurrent_dispatch_calls_scheduler_for_every_target(
+    mocked_lambda_invoke: MagicMock,
+    config_item_store: DdbConfigItemStore,
+) -> None:
+    config_item_store.put(
+        DdbConfigItem(
+            organization_id="",
+            remote_account_ids=["111122223333", "222233334444", "333344445555"],
+        )
+    )
+
+    orchestrator = SchedulingOrchestratorHandler(
+        event=mockEvent,
+        context=MockLambdaContext(),
+        env=MockOrchestratorEnvironment(
+            schedule_regions=["us-east-1", "us-east-2", "us-west-1"],
+            enable_ec2_service=True,
+            enable_rds_service=True,
+            enable_schedule_hub_account=False,
+            scheduling_request_dispatch_concurrency=4,
+        ),
+        logger=MockLogger(),
+    )
+    result = orchestrator.handle_request()
+
+    assert mocked_lambda_invoke.call_count == 18
+    dispatched_targets = {
+        (request["service"], request["region"], request["account"])
+        for request in map(
+            scheduling_request_from_lambda_invoke, mocked_lambda_invoke.call_args_list
+        )
+    }
+    assert len(dispatched_targets) == 18
+
+    # results are reported in target order regardless of completion order
+    assert [(r["service"], r["region"], r["account"]) for r in result] == [
+        (service, region, account)
+        for service in ["ec2", "rds"]
+        for region in ["us-east-1", "us-east-2", "us-west-1"]
+        for account in ["111122223333", "222233334444", "333344445555"]
+    ]
+
+
+def test_failed_dispatch_does_not_prevent_scheduling_other_targets(
+    mocked_lambda_invoke: MagicMock,
+    config_item_store: DdbConfigItemStore,
+) -> None:
+    config_item_store.put(
+        DdbConfigItem(
+            organization_id="", remote_account_ids=["222233334444", "333344445555"]
+        )
+    )
+
+    def invoke(**kwargs: Any) -> Any:
+        if json.loads(kwargs["Payload"])["account"] == "222233334444":
+            raise RuntimeError("invoke failed")
+        return {"StatusCode": 202, "ResponseMetadata": {"RequestId": "my-request"}}
+
+    mocked_lambda_invoke.side_effect = invoke
+
+    orchestrator = SchedulingOrchestratorHandler(
+        event=mockEvent,
+        context=MockLambdaContext(),
+        env=MockOrchestratorEnvironment(
+            schedule_regions=["us-east-1"],
+            enable_ec2_service=True,
+            enable_schedule_hub_account=True,
+            scheduling_request_dispatch_concurrency=2,
+        ),
+        logger=MockLogger(),
+    )
+    result = orchestrator.handle_request()
+
+    assert mocked_lambda_invoke.call_count == 3
+    assert [(r["account"], r["lambda_invoke_result"]) for r in result] == [
+        (moto_hub_account, 202),
+        ("222233334444", None),
+        ("333344445555", 202),
+    ]
+    assert result[1]["error"] == "invoke failed"
+
+
+def test_large_targets_are_sharded_by_recorded_stats(
+    mocked_lambda_invoke: MagicMock,
+    config_item_store: DdbConfigItemStore,
+    state_table: str,
+) -> None:
+    TargetStatsStore(state_table).put(
+        TargetStats(
+            account=moto_hub_account,
+            service="ec2",
+            region="us-east-1",
+            instance_count=150,
+            action_seconds=10,
+        )
+    )
+
+    orchestrator = SchedulingOrchestratorHandler(
+        event=mockEvent,
+        context=MockLambdaContext(),
+        env=MockOrchestratorEnvironment(
+            schedule_regions=["us-east-1", "us-east-2"],
+            enable_ec2_service=True,
+            enable_schedule_hub_account=True,
+            state_table_name=state_table,
+            scheduling_request_shard_max_instances=100,
+        ),
+        logger=MockLogger(),
+    )
+    orchestrator.handle_request()
+
+    scheduling_requests = [
+        json.loads(call.kwargs["Payload"])
+        for call in mocked_lambda_invoke.call_args_list
+    ]
+    assert [
+        (r["region"], r.get("shard_index"), r.get("shard_count"))
+        for r in scheduling_requests
+    ] == [("us-east-1", 0, 2), ("us-east-1", 1, 2), ("us-east-2", None, None)]
+
+
+def test_missing_stats_do_not_prevent_scheduling(
+    mocked_lambda_invoke: MagicMock,
+    config_item_store: DdbConfigItemStore,
+) -> None:
+    # no state table exists, so the stats cannot be loaded
+    orchestrator = SchedulingOrchestratorHandler(
+        event=mockEvent,
+        context=MockLambdaContext(),
+        env=MockOrchestratorEnvironment(
+            schedule_regions=["us-east-1"],
+            enable_ec2_service=True,
+            enable_schedule_hub_account=True,
+            scheduling_request_shard_max_instances=100,
+        ),
+        logger=MockLogger(),
+    )
+    orchestrator.handle_request()
+
+    assert mocked_lambda_invoke.call_count == 1
+    assert "shard_count" not in json.loads(
+        mocked_lambda_invoke.call_args.kwargs["Payload"]
+    )
+
+
+def test_targets_are_batched_by_estimated_instance_count(
+    mocked_lambda_invoke: MagicMock,
+    config_item_store: DdbConfigItemStore,
+) -> None:
+    orchestrator = SchedulingOrchestratorHandler(
+        event=mockEvent,
+        context=MockLambdaContext(),
+        env=MockOrchestratorEnvironment(
+            schedule_regions=["us-east-1", "us-east-2", "us-west-1"],
+            enable_ec2_service=True,
+            enable_schedule_hub_account=True,
+            scheduling_request_batch_max_instances=2 * DEFAULT_TARGET_INSTANCE_ESTIMATE,
+        ),
+        logger=MockLogger(),
+    )
+    orchestrator.handle_request()
+
+    assert mocked_lambda_invoke.call_count == 2
+    scheduling_requests = [
+        json.loads(call.kwargs["Payload"])
+        for call in mocked_lambda_invoke.call_args_list
+    ]
+    assert scheduling_requests[0]["region"] == "us-east-1"
+    assert scheduling_requests[0]["additional_targets"] == [
+        {"account": moto_hub_account, "region": "us-east-2", "service": "ec2"}
+    ]
+    assert scheduling_requests[1]["region"] == "us-west-1"
+    assert "additional_targets" not in scheduling_requests[1]
+
+
 # ##------------------- SSM Parameter Resolution -----------------## #
 def test_ssm_parameter_string_list_is_resolved_to_account_ids(
     mocked_lambda_invoke: MagicMock,
@@ -0,0 +1,195 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from typing import Iterator
+from unittest.mock import MagicMock, patch
+
+import pytest
+from _pytest.fixtures import fixture
+
+from instance_scheduler.handler import scheduling_request
+from instance_scheduler.handler.environments.scheduling_request_environment import (
+    SchedulingRequestEnvironment,
+)
+from instance_scheduler.handler.scheduling_request import (
+    SchedulingRequest,
+    decode_scheduler_request,
+    handle_scheduling_request,
+    load_schedules,
+    split_targets,
+    validate_scheduler_request,
+)
+from instance_scheduler.model.period_definition import PeriodDefinition
+from instance_scheduler.model.period_identifier import PeriodIdentifier
+from instance_scheduler.model.schedule_definition import ScheduleDefinition
+from instance_scheduler.model.store import (
+    compact_serial_data,
+    in_memory_period_definition_store,
+    in_memory_schedule_definition_store,
+)
+from instance_scheduler.model.store.in_memory_period_definition_store import (
+    InMemoryPeriodDefinitionStore,
+)
+from instance_scheduler.model.store.in_memory_schedule_definition_store import (
+    InMemoryScheduleDefinitionStore,
+)
+from instance_scheduler.util.validation import ValidationException
+from tests.context import MockLambdaContext
+from tests.test_utils.mock_scheduling_request_environment import (
+    MockSchedulingRequestEnvironment,
+)
+
+
+def batched_request() -> SchedulingRequest:
+    return SchedulingRequest(
+        action="scheduler:run",
+        account="111122223333",
+        region="us-east-1",
+        service="ec2",
+        current_dt="2024-03-01T10:00:00+00:00",
+        dispatch_time="2024-03-01T10:00:00+00:00",
+        additional_targets=[
+            {"account": "222233334444", "region": "us-east-1", "service": "ec2"},
+            {"account": "111122223333", "region": "us-west-2", "service": "rds"},
+        ],
+    )
+
+
+@fixture
+def mock_env() -> Iterator[None]:
+    with patch.object(
+        SchedulingRequestEnvironment,
+        "from_env",
+        return_value=MockSchedulingRequestEnvironment(),
+    ):
+        yield
+
+
+def test_split_targets_creates_one_request_per_target() -> None:
+    split = split_targets(batched_request())
+
+    assert [(r["account"], r["region"], r["service"]) for r in split] == [
+        ("111122223333", "us-east-1", "ec2"),
+        ("222233334444", "us-east-1", "ec2"),
+        ("111122223333", "us-west-2", "rds"),
+    ]
+    for request in split:
+        assert "additional_targets" not in request
+        assert request["current_dt"] == batched_request()["current_dt"]
+
+
+def test_validate_rejects_malformed_additional_targets() -> None:
+    assert validate_scheduler_request(batched_request())
+
+    with pytest.raises(ValidationException):
+        validate_scheduler_request({**batched_request(), "additional_targets": "ec2"})
+
+    with pytest.raises(ValidationException):
+        validate_scheduler_request(
+            {**batched_request(), "additional_targets": [{"account": "111122223333"}]}
+        )
+
+
+def test_validate_rejects_invalid_shards() -> None:
+    assert validate_scheduler_request(
+        {**batched_request(), "shard_index": 1, "shard_count": 2}
+    )
+
+    with pytest.raises(ValidationException):
+        validate_scheduler_request(
+            {**batched_request(), "shard_index": 2, "shard_count": 2}
+        )
+
+    with pytest.raises(ValidationException):
+        validate_scheduler_request({**batched_request(), "shard_index": "1"})
+
+
+@patch.object(scheduling_request, "SchedulingRequestHandler")
+@patch.object(scheduling_request, "load_schedules")
+def test_batched_request_loads_schedules_once_and_schedules_every_target(
+    load_schedules: MagicMock, handler: MagicMock, mock_env: None
+) -> None:
+    handle_scheduling_request(batched_request(), MockLambdaContext())
+
+    assert load_schedules.call_count == 1
+    assert handler.call_count == 3
+    scheduled_accounts = [call.args[0]["account"] for call in handler.call_args_list]
+    assert scheduled_accounts == ["111122223333", "222233334444", "111122223333"]
+    for call in handler.call_args_list:
+        assert call.kwargs["schedules"] is load_schedules.return_value
+
+
+@patch.object(scheduling_request, "SchedulingRequestHandler")
+@patch.object(scheduling_request, "load_schedules")
+def test_failed_target_does_not_prevent_scheduling_other_targets(
+    load_schedules: MagicMock, handler: MagicMock, mock_env: None
+) -> None:
+    handler.return_value.handle_request.side_effect = [
+        {"111122223333": "ok"},
+        Exception("target failed"),
+        {"111122223333": "ok"},
+    ]
+
+    with pytest.raises(Exception, match="target failed"):
+        handle_scheduling_request(batched_request(), MockLambdaContext())
+
+    assert handler.return_value.handle_request.call_count == 3
+
+
+@patch.object(scheduling_request, "InstanceStatesBatch")
+@patch.object(scheduling_request, "SchedulingRequestHandler")
+@patch.object(scheduling_request, "load_schedules")
+def test_batched_instance_states_are_prefetched_and_flushed_once(
+    load_schedules: MagicMock, handler: MagicMock, instance_states_batch: MagicMock
+) -> None:
+    with patch.object(
+        SchedulingRequestEnvironment,
+        "from_env",
+        return_value=MockSchedulingRequestEnvironment(
+            enable_batched_instance_states=True
+        ),
+    ):
+        handle_scheduling_request(batched_request(), MockLambdaContext())
+
+    batch = instance_states_batch.return_value
+    prefetched_targets = list(batch.prefetch.call_args.args[0])
+    assert prefetched_targets == [
+        ("ec2", "111122223333", "us-east-1"),
+        ("ec2", "222233334444", "us-east-1"),
+        ("rds", "111122223333", "us-west-2"),
+    ]
+    for call in handler.call_args_list:
+        assert call.kwargs["instance_states_batch"] is batch
+    batch.flush.assert_called_once()
+
+
+def test_compact_schedules_and_periods_are_decoded_once() -> None:
+    schedule_store = InMemoryScheduleDefinitionStore()
+    schedule_store.put(
+        ScheduleDefinition(
+            name="my-schedule", periods=[PeriodIdentifier.of("my-period")]
+        )
+    )
+    period_store = InMemoryPeriodDefinitionStore()
+    period_store.put(PeriodDefinition(name="my-period", begintime="10:00"))
+    request = {
+        **batched_request(),
+        "schedules": schedule_store.serialize(compact=True),
+        "periods": period_store.serialize(compact=True),
+    }
+
+    with patch.object(
+        in_memory_schedule_definition_store,
+        "from_compact_serial_data",
+        wraps=compact_serial_data.from_compact_serial_data,
+    ) as decode_schedules, patch.object(
+        in_memory_period_definition_store,
+        "from_compact_serial_data",
+        wraps=compact_serial_data.from_compact_serial_data,
+    ) as decode_periods:
+        schedules = load_schedules(
+            decode_scheduler_request(request), MockSchedulingRequestEnvironment()
+        )
+
+    assert decode_schedules.call_count == 1
+    assert decode_periods.call_count == 1
+    assert list(schedules) == ["my-schedule"]
@@ -8,7 +8,6 @@ from pytest import fixture
 
 from instance_scheduler.schedulers.instance_states import InstanceStates
 from tests.logger import MockLogger
-from tests.test_utils.testsuite_env import TestSuiteEnv
 
 if TYPE_CHECKING:
     from mypy_boto3_dynamodb import DynamoDBClient
@@ -84,25 +83,6 @@ def rds_cluster(moto_backend: None) -> Iterator[str]:
     yield cluster_id
 
 
-@fixture
-def state_table(moto_backend: None, test_suite_env: TestSuiteEnv) -> str:
-    state_table_name = test_suite_env.state_table_name
-    dynamo_client: DynamoDBClient = boto3.client("dynamodb")
-    dynamo_client.create_table(
-        TableName=state_table_name,
-        AttributeDefinitions=[
-            {"AttributeName": "service", "AttributeType": "S"},
-            {"AttributeName": "account-region", "AttributeType": "S"},
-        ],
-        KeySchema=[
-            {"AttributeName": "service", "KeyType": "HASH"},
-            {"AttributeName": "account-region", "KeyType": "RANGE"},
-        ],
-        BillingMode="PAY_PER_REQUEST",
-    )
-    return state_table_name
-
-
 @fixture
 def ec2_instance_states(state_table: str) -> InstanceStates:
     instance_states = InstanceStates(state_table, "ec2", MockLogger())
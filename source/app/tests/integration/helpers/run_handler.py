@@ -80,6 +80,9 @@ class SchedulingTestContext:
             "periods": period_store.serialize(),
             "dispatch_time": "2023-05-12 14:55:10.600619",
         }
+        if target.shard_count > 1:
+            event["shard_index"] = target.shard_index
+            event["shard_count"] = target.shard_count
 
         return SchedulingRequestHandler(
             event, MockLambdaContext(), environment, MockLogger()
@@ -170,7 +170,7 @@ def test_orchestrator_sends_expected_metric(
                     "use_ssm_maintenance_window": 1,
                     "non_default_timezone": 2,
                 },
-                "approximate_lambda_payload_size_bytes": 1084,  # semi-magic
+                "approximate_lambda_payload_size_bytes": 271,  # semi-magic
             },
         }
 
@@ -1,13 +1,27 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import boto3
+import pytest
+from freezegun import freeze_time
+
 from instance_scheduler.schedulers.instance_states import InstanceStates
+from instance_scheduler.service.ec2 import Ec2Service
+from instance_scheduler.service.ec2_instance import EC2Instance
 from tests.integration.helpers.ec2_helpers import (
+    create_ec2_instances,
     get_current_state,
     start_ec2_instances,
     stop_ec2_instances,
 )
 from tests.integration.helpers.run_handler import simple_schedule
 from tests.integration.helpers.schedule_helpers import quick_time
+from tests.test_utils.mock_scheduling_request_environment import (
+    MockSchedulingRequestEnvironment,
+)
 
 
 def test_ec2_starts_at_beginning_of_period(
@@ -108,3 +122,105 @@ def test_instance_is_stopped_if_started_outside_running_period_when_schedule_is_
         # instance is not stopped
         context.run_scheduling_request_handler(dt=quick_time(22, 5, 0))
         assert get_current_state(ec2_instance) == "stopped"
+
+
+def test_actions_are_flushed_in_batches_while_instances_are_described(
+    state_table: str,
+) -> None:
+    instance_ids = create_ec2_instances(5, schedule_name="test-schedule")
+    stop_ec2_instances(*instance_ids)
+    environment = MockSchedulingRequestEnvironment(scheduling_action_batch_size=2)
+
+    with simple_schedule(begintime="10:00", endtime="20:00") as context:
+        with patch.object(
+            Ec2Service,
+            "start_instances",
+            autospec=True,
+            side_effect=Ec2Service.start_instances,
+        ) as start_instances:
+            result = context.run_scheduling_request_handler(
+                dt=quick_time(10, 0), environment=environment
+            )
+
+        assert [len(call.args[1]) for call in start_instances.call_args_list] == [
+            2,
+            2,
+            1,
+        ]
+        assert all(
+            get_current_state(instance_id) == "running" for instance_id in instance_ids
+        )
+        assert (
+            sum(len(started) for started in result["123456789012"]["started"].values())
+            == 5
+        )
+        assert result["123456789012"]["desired_state_cache"] == {
+            "hits": 4,
+            "misses": 1,
+        }
+
+        context.run_scheduling_request_handler(
+            dt=quick_time(20, 0), environment=environment
+        )
+        assert all(
+            get_current_state(instance_id) == "stopped" for instance_id in instance_ids
+        )
+
+
+def test_states_of_instances_no_longer_scheduled_are_removed(
+    ec2_instance: str,
+    ec2_instance_states: InstanceStates,
+) -> None:
+    first_run = datetime(2024, 3, 1, 10, 0, tzinfo=timezone.utc)
+    with simple_schedule(begintime="10:00", endtime="20:00") as context:
+        with freeze_time(first_run):
+            context.run_scheduling_request_handler(dt=quick_time(10, 0))
+        ec2_instance_states.load(account="123456789012", region="us-east-1")
+        assert ec2_instance_states.get_instance_state(ec2_instance) == "running"
+
+        boto3.client("ec2").delete_tags(
+            Resources=[ec2_instance], Tags=[{"Key": "Schedule"}]
+        )
+        # not described in two cleanups
+        for hours in [13, 26]:
+            with freeze_time(first_run + timedelta(hours=hours)):
+                context.run_scheduling_request_handler(dt=quick_time(10, 0))
+
+    ec2_instance_states.load(account="123456789012", region="us-east-1")
+    assert ec2_instance_states.get_instance_state(ec2_instance) == "unknown"
+
+
+def test_states_of_instances_acted_on_are_saved_when_describe_fails(
+    state_table: str,
+    ec2_instance_states: InstanceStates,
+) -> None:
+    instance_ids = create_ec2_instances(5, schedule_name="test-schedule")
+    stop_ec2_instances(*instance_ids)
+    environment = MockSchedulingRequestEnvironment(scheduling_action_batch_size=2)
+    describe_tagged_instances = Ec2Service.describe_tagged_instances
+
+    def describe_then_fail(self: Ec2Service) -> Iterator[EC2Instance]:
+        instances = describe_tagged_instances(self)
+        for _ in range(3):
+            yield next(instances)
+        raise RuntimeError("describe failed")
+
+    with simple_schedule(begintime="10:00", endtime="20:00") as context:
+        with patch.object(
+            Ec2Service, "describe_tagged_instances", describe_then_fail
+        ), pytest.raises(RuntimeError, match="describe failed"):
+            context.run_scheduling_request_handler(
+                dt=quick_time(10, 0), environment=environment
+            )
+
+    started = [
+        instance_id
+        for instance_id in instance_ids
+        if get_current_state(instance_id) == "running"
+    ]
+    assert len(started) == 3
+    ec2_instance_states.load(account="123456789012", region="us-east-1")
+    for instance_id in instance_ids:
+        assert ec2_instance_states.get_instance_state(instance_id) == (
+            "running" if instance_id in started else "unknown"
+        )
@@ -68,3 +68,31 @@ def test_rds_does_not_create_snapshot_when_flag_disabled(
             DBInstanceIdentifier=rds_instance
         )
         assert len(result["DBSnapshots"]) == 0
+
+
+def test_rds_replaces_previous_snapshot_when_flag_enabled(
+    rds_instance: str,
+    rds_instance_states: InstanceStates,
+) -> None:
+    rds_client: RDSClient = boto3.client("rds")
+    rds_client.create_db_snapshot(
+        DBInstanceIdentifier=rds_instance,
+        DBSnapshotIdentifier=f"my-stack-name-stopped-{rds_instance}",
+    )
+    with simple_schedule(begintime="10:00", endtime="20:00") as context:
+        context.run_scheduling_request_handler(
+            dt=quick_time(19, 55, 0), target=target(service="rds")
+        )
+        context.run_scheduling_request_handler(
+            dt=quick_time(20, 0, 0),
+            environment=MockSchedulingRequestEnvironment(enable_rds_snapshots=True),
+            target=target(service="rds"),
+        )
+
+        assert get_rds_instance_state(rds_instance) == "stopped"
+        result: DBSnapshotMessageTypeDef = rds_client.describe_db_snapshots(
+            DBInstanceIdentifier=rds_instance
+        )
+        assert [
+            snapshot["DBSnapshotIdentifier"] for snapshot in result["DBSnapshots"]
+        ] == [f"my-stack-name-stopped-{rds_instance}"]
@@ -3,7 +3,10 @@
 """
 tests for schedule encoding limits of lambda
 
-by default, all configured schedules are encoded into the event sent to the scheduling_request handler. However,
+by default, the orchestrator saves a snapshot of all configured schedules and only a reference to this snapshot is
+encoded into the event sent to the scheduling_request handler.
+
+If the snapshot cannot be saved, all configured schedules are encoded into the event instead. However,
 if a customer has too many schedules this event can exceed the maximum payload size for a Lambda request.
 
 In this scenario the schedules will be omitted from the event, and instead need to be refetched from dynamodb
@@ -13,6 +16,7 @@ from typing import Iterator
 from unittest.mock import MagicMock, patch
 
 from _pytest.fixtures import fixture
+from botocore.exceptions import ClientError
 
 from instance_scheduler.configuration.scheduling_context import SchedulingContext
 from instance_scheduler.handler import scheduling_orchestrator
@@ -23,11 +27,13 @@ from instance_scheduler.handler.scheduling_orchestrator import (
 from instance_scheduler.handler.scheduling_request import (
     SchedulingRequest,
     SchedulingRequestHandler,
+    load_schedules,
     validate_scheduler_request,
 )
 from instance_scheduler.model.period_definition import PeriodDefinition
 from instance_scheduler.model.period_identifier import PeriodIdentifier
 from instance_scheduler.model.schedule_definition import ScheduleDefinition
+from instance_scheduler.model.store.config_snapshot_store import ConfigSnapshotStore
 from instance_scheduler.model.store.ddb_config_item_store import DdbConfigItemStore
 from instance_scheduler.model.store.in_memory_period_definition_store import (
     InMemoryPeriodDefinitionStore,
@@ -62,7 +68,113 @@ def mocked_lambda_invoke() -> Iterator[MagicMock]:
             yield invoke_func
 
 
-def test_schedules_and_periods_are_encoded_into_payload(
+@fixture
+def failing_config_snapshot_put() -> Iterator[None]:
+    error = ClientError(
+        {"Error": {"Code": "AccessDeniedException", "Message": "denied"}},
+        "PutItem",
+    )
+    with patch.object(ConfigSnapshotStore, "put", side_effect=error):
+        yield
+
+
+def test_only_config_snapshot_is_encoded_into_payload(
+    mocked_lambda_invoke: MagicMock,
+    schedule_store: ScheduleDefinitionStore,
+    period_store: PeriodDefinitionStore,
+    config_item_store: DdbConfigItemStore,
+    config_table: str,
+) -> None:
+    schedule_store.put(
+        ScheduleDefinition(
+            name="my_schedule", periods=[PeriodIdentifier.of("my_period")]
+        )
+    )
+    period_store.put(PeriodDefinition(name="my_period", begintime="10:00"))
+
+    SchedulingOrchestratorHandler(
+        event=mock_event_bridge_event,
+        context=MockLambdaContext(),
+        env=MockOrchestratorEnvironment(
+            schedule_regions=[],
+            enable_ec2_service=True,
+            enable_schedule_hub_account=True,
+        ),
+        logger=MockLogger(),
+    ).handle_request()
+
+    assert mocked_lambda_invoke.call_count == 1
+    scheduling_request: SchedulingRequest = scheduling_request_from_lambda_invoke(
+        mocked_lambda_invoke.call_args
+    )
+    validate_scheduler_request(scheduling_request)
+
+    assert "schedules" not in scheduling_request
+    assert "periods" not in scheduling_request
+
+    snapshot = ConfigSnapshotStore(config_table).get(
+        scheduling_request["config_snapshot"]
+    )
+    assert snapshot is not None
+    assert (
+        InMemoryScheduleDefinitionStore.deserialize(snapshot["schedules"]).find_all()
+        == schedule_store.find_all()
+    )
+    assert (
+        InMemoryPeriodDefinitionStore.deserialize(snapshot["periods"]).find_all()
+        == period_store.find_all()
+    )
+
+
+def test_scheduling_request_handler_loads_config_snapshot_once_per_container(
+    schedule_store: ScheduleDefinitionStore,
+    period_store: PeriodDefinitionStore,
+    config_table: str,
+) -> None:
+    schedule_store.put(
+        ScheduleDefinition(
+            name="snapshot_schedule", periods=[PeriodIdentifier.of("my_period")]
+        )
+    )
+    period_store.put(PeriodDefinition(name="my_period", begintime="10:00"))
+    snapshot_key = ConfigSnapshotStore(config_table).put(
+        {
+            "schedules": InMemoryScheduleDefinitionStore(
+                schedule_store.find_all()
+            ).serialize(),
+            "periods": InMemoryPeriodDefinitionStore(
+                period_store.find_all()
+            ).serialize(),
+        },
+        created_at=quick_time(10, 0, 0),
+    )
+    schedule_store.delete("snapshot_schedule")  # must not be reloaded from dynamo
+
+    request = SchedulingRequest(
+        action="scheduler:run",
+        account="123456789012",
+        region="us-east-1",
+        service="ec2",
+        current_dt=quick_time(10, 0, 0).isoformat(),
+        config_snapshot=snapshot_key,
+        dispatch_time=quick_time(10, 0, 0).isoformat(),
+    )
+
+    with patch.dict(
+        "instance_scheduler.handler.scheduling_request._config_snapshot_cache",
+        clear=True,
+    ), patch.object(
+        ConfigSnapshotStore, "get", wraps=ConfigSnapshotStore(config_table).get
+    ) as snapshot_get:
+        for _ in range(3):
+            schedules = load_schedules(request, MockSchedulingRequestEnvironment())
+            assert "snapshot_schedule" in schedules
+
+    assert snapshot_get.call_count == 1
+
+
+def test_schedules_and_periods_are_encoded_into_payload_without_config_snapshot(
+    failing_config_snapshot_put: None,
     mocked_lambda_invoke: MagicMock,
     schedule_store: ScheduleDefinitionStore,
     period_store: PeriodDefinitionStore,
@@ -122,7 +234,9 @@ def test_schedules_and_periods_are_encoded_into_payload(
 
 @patch.object(SchedulingOrchestratorHandler, "lambda_client")
 def test_strips_schedules_when_payload_is_too_large(
-    lambda_client: MagicMock, config_item_store: DdbConfigItemStore
+    lambda_client: MagicMock,
+    failing_config_snapshot_put: None,
+    config_item_store: DdbConfigItemStore,
 ) -> None:
     scheduling_orchestrator.LAMBDA_PAYLOAD_CAPACITY_BYTES = 0
     with patch.object(lambda_client, "invoke") as invoke_func:
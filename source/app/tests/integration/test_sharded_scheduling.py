@@ -0,0 +1,55 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from instance_scheduler.model.store.target_stats_store import TargetStatsStore
+from instance_scheduler.util.scheduling_target import SchedulingTarget
+from tests.integration.helpers.ec2_helpers import (
+    create_ec2_instances,
+    get_current_state,
+    stop_ec2_instances,
+)
+from tests.integration.helpers.run_handler import simple_schedule, target
+from tests.integration.helpers.schedule_helpers import quick_time
+
+
+def shard(shard_index: int, shard_count: int) -> SchedulingTarget:
+    return SchedulingTarget(
+        account=target().account,
+        service=target().service,
+        region=target().region,
+        shard_index=shard_index,
+        shard_count=shard_count,
+    )
+
+
+def test_each_shard_schedules_a_disjoint_subset_of_instances(
+    state_table: str,
+) -> None:
+    instance_ids = create_ec2_instances(16, schedule_name="test-schedule")
+    stop_ec2_instances(*instance_ids)
+
+    with simple_schedule(begintime="10:00", endtime="20:00") as context:
+        context.run_scheduling_request_handler(dt=quick_time(10, 0), target=shard(0, 2))
+        started_by_first_shard = {
+            instance_id
+            for instance_id in instance_ids
+            if get_current_state(instance_id) == "running"
+        }
+
+        context.run_scheduling_request_handler(dt=quick_time(10, 0), target=shard(1, 2))
+
+    assert 0 < len(started_by_first_shard) < len(instance_ids)
+    assert all(
+        get_current_state(instance_id) == "running" for instance_id in instance_ids
+    )
+
+
+def test_scheduling_statistics_are_recorded(state_table: str) -> None:
+    create_ec2_instances(3, schedule_name="test-schedule")
+
+    with simple_schedule(begintime="10:00", endtime="20:00") as context:
+        context.run_scheduling_request_handler(dt=quick_time(10, 0))
+
+    [stats] = TargetStatsStore(state_table).find_all()
+    assert SchedulingTarget.of(stats) == target()
+    assert stats.instance_count == 3
+    assert stats.shard_count == 1
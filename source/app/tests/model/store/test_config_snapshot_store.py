@@ -0,0 +1,70 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from datetime import datetime, timedelta, timezone
+
+from _pytest.fixtures import fixture
+
+from instance_scheduler.model.store.config_snapshot_store import (
+    ConfigSnapshot,
+    ConfigSnapshotStore,
+)
+
+now = datetime(2024, 3, 1, 10, 0, tzinfo=timezone.utc)
+
+
+@fixture
+def config_snapshot_store(config_table: str) -> ConfigSnapshotStore:
+    return ConfigSnapshotStore(config_table)
+
+
+def snapshot_of(schedule_name: str) -> ConfigSnapshot:
+    return ConfigSnapshot(
+        schedules=[{"name": schedule_name, "periods": "my-period"}],
+        periods=[{"name": "my-period", "begintime": "10:00"}],
+    )
+
+
+def test_write_then_read(config_snapshot_store: ConfigSnapshotStore) -> None:
+    snapshot = snapshot_of("my-schedule")
+
+    key = config_snapshot_store.put(snapshot, created_at=now)
+
+    assert config_snapshot_store.get(key) == snapshot
+
+
+def test_get_unknown_snapshot_returns_none(
+    config_snapshot_store: ConfigSnapshotStore,
+) -> None:
+    assert config_snapshot_store.get("unknown") is None
+
+
+def test_key_is_addressed_by_content(
+    config_snapshot_store: ConfigSnapshotStore,
+) -> None:
+    key = config_snapshot_store.put(snapshot_of("my-schedule"), created_at=now)
+
+    assert key == config_snapshot_store.put(snapshot_of("my-schedule"), created_at=now)
+    assert key != config_snapshot_store.put(snapshot_of("other"), created_at=now)
+
+
+def test_delete_older_than_keeps_current_and_recent_snapshots(
+    config_snapshot_store: ConfigSnapshotStore,
+) -> None:
+    current_key = config_snapshot_store.put(
+        snapshot_of("current"), created_at=now - timedelta(days=5)
+    )
+    stale_key = config_snapshot_store.put(
+        snapshot_of("stale"), created_at=now - timedelta(days=2)
+    )
+    recent_key = config_snapshot_store.put(
+        snapshot_of("recent"), created_at=now - timedelta(hours=1)
+    )
+
+    deleted = config_snapshot_store.delete_older_than(
+        now - timedelta(days=1), keep=current_key
+    )
+
+    assert deleted == [stale_key]
+    assert config_snapshot_store.get(stale_key) is None
+    assert config_snapshot_store.get(current_key) is not None
+    assert config_snapshot_store.get(recent_key) is not None
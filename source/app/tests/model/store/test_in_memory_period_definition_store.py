@@ -15,15 +15,17 @@ def period_store() -> InMemoryPeriodDefinitionStore:
     return InMemoryPeriodDefinitionStore()
 
 
+@pytest.mark.parametrize("compact", [False, True])
 def test_serialize_then_deserialize(
     period_store: InMemoryPeriodDefinitionStore,
+    compact: bool,
 ) -> None:
     period_store.put(PeriodDefinition("period1", begintime="05:00", endtime="10:00"))
     period_store.put(PeriodDefinition("period2", weekdays={"Mon-Fri"}))
     period_store.put(PeriodDefinition("period3", monthdays={"1-5"}))
     period_store.put(PeriodDefinition("period4", months={"Jan-Feb"}))
 
-    serial_data = period_store.serialize()
+    serial_data = period_store.serialize(compact=compact)
 
     # ensure returned data matches own validation
     period_store.validate_serial_data(serial_data)
@@ -47,3 +49,15 @@ def test_validate_rejects_malformed_input() -> None:
         InMemoryPeriodDefinitionStore.validate_serial_data(
             [PeriodParams(name="aPeriod"), {"invalid-key": "something-invalid"}]
         )
+
+    with pytest.raises(ValidationException):
+        # unsupported compact format version
+        InMemoryPeriodDefinitionStore.validate_serial_data(
+            {"compact_version": 0, "data": ""}
+        )
+
+    with pytest.raises(ValidationException):
+        # compact data is not a valid compressed payload
+        InMemoryPeriodDefinitionStore.validate_serial_data(
+            {"compact_version": 1, "data": "not-compressed"}
+        )
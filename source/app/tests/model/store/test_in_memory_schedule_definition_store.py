@@ -19,8 +19,10 @@ def schedule_store() -> InMemoryScheduleDefinitionStore:
     return InMemoryScheduleDefinitionStore()
 
 
+@pytest.mark.parametrize("compact", [False, True])
 def test_serialize_then_deserialize(
     schedule_store: InMemoryScheduleDefinitionStore,
+    compact: bool,
 ) -> None:
     schedule_store.put(
         ScheduleDefinition(name="override-sched", override_status="running")
@@ -59,7 +61,7 @@ def test_serialize_then_deserialize(
         )
     )
 
-    serialized_store = schedule_store.serialize()
+    serialized_store = schedule_store.serialize(compact=compact)
 
     # ensure returned data matches own validation
     schedule_store.validate_serial_data(serialized_store)
@@ -83,3 +85,15 @@ def test_validate_rejects_malformed_input() -> None:
         InMemoryScheduleDefinitionStore.validate_serial_data(
             [ScheduleParams(name="a Schedule"), {"invalid-key": "something-invalid"}]
         )
+
+    with pytest.raises(ValidationException):
+        # unsupported compact format version
+        InMemoryScheduleDefinitionStore.validate_serial_data(
+            {"compact_version": 0, "data": ""}
+        )
+
+    with pytest.raises(ValidationException):
+        # compact data is not a valid compressed payload
+        InMemoryScheduleDefinitionStore.validate_serial_data(
+            {"compact_version": 1, "data": "not-compressed"}
+        )
@@ -0,0 +1,61 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from datetime import datetime, timezone
+
+from _pytest.fixtures import fixture
+
+from instance_scheduler.model.store.target_stats_store import TargetStatsStore
+from instance_scheduler.model.target_stats import TargetStats
+from instance_scheduler.schedulers.instance_states import InstanceStates
+from instance_scheduler.schedulers.states import InstanceState
+from tests.logger import MockLogger
+
+
+@fixture
+def target_stats_store(state_table: str) -> TargetStatsStore:
+    return TargetStatsStore(state_table)
+
+
+def stats_of(account: str, instance_count: int) -> TargetStats:
+    return TargetStats(
+        account=account,
+        service="ec2",
+        region="us-east-1",
+        instance_count=instance_count,
+        action_seconds=12.5,
+        shard_count=2,
+        updated_at=datetime(2024, 3, 1, 10, 0, tzinfo=timezone.utc),
+    )
+
+
+def test_write_then_read(target_stats_store: TargetStatsStore) -> None:
+    stats = stats_of("111122223333", 10)
+
+    target_stats_store.put(stats)
+
+    assert target_stats_store.find_all() == [stats]
+
+
+def test_put_overwrites_previous_stats(target_stats_store: TargetStatsStore) -> None:
+    target_stats_store.put(stats_of("111122223333", 10))
+    target_stats_store.put(stats_of("111122223333", 20))
+    target_stats_store.put(stats_of("222233334444", 30))
+
+    assert sorted(
+        (stats.account, stats.instance_count) for stats in target_stats_store.find_all()
+    ) == [("111122223333", 20), ("222233334444", 30)]
+
+
+def test_stats_do_not_collide_with_instance_states(
+    state_table: str, target_stats_store: TargetStatsStore
+) -> None:
+    instance_states = InstanceStates(state_table, "ec2", MockLogger())
+    instance_states.load(account="111122223333", region="us-east-1")
+    instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+    instance_states.save()
+
+    target_stats_store.put(stats_of("111122223333", 10))
+
+    assert target_stats_store.find_all() == [stats_of("111122223333", 10)]
+    instance_states.load(account="111122223333", region="us-east-1")
+    assert instance_states.get_instance_state("i-1") == InstanceState.RUNNING
@@ -0,0 +1,62 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from datetime import datetime, time, timezone
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from instance_scheduler.configuration.instance_schedule import InstanceSchedule
+from instance_scheduler.configuration.running_period import RunningPeriod
+from instance_scheduler.schedulers.desired_state_cache import DesiredStateCache
+from instance_scheduler.schedulers.states import ScheduleState
+
+
+def schedule_of(name: str) -> InstanceSchedule:
+    return InstanceSchedule(
+        name=name,
+        timezone=ZoneInfo("UTC"),
+        periods=[
+            {
+                "period": RunningPeriod(
+                    name="period", begintime=time(10, 0), endtime=time(20, 0)
+                )
+            }
+        ],
+    )
+
+
+def test_desired_state_is_evaluated_once_per_schedule_and_time() -> None:
+    cache = DesiredStateCache()
+    schedule = schedule_of("my-schedule")
+    dt = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+    with patch.object(
+        InstanceSchedule,
+        "get_desired_state",
+        autospec=True,
+        side_effect=InstanceSchedule.get_desired_state,
+    ) as get_desired_state:
+        for _ in range(10):
+            assert cache.get_desired_state(schedule, dt)[0] == ScheduleState.RUNNING
+
+    get_desired_state.assert_called_once()
+    assert (cache.hits, cache.misses) == (9, 1)
+
+
+def test_schedules_and_times_are_cached_separately() -> None:
+    cache = DesiredStateCache()
+    running_dt = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+    stopped_dt = datetime(2024, 3, 1, 22, 0, tzinfo=timezone.utc)
+
+    assert (
+        cache.get_desired_state(schedule_of("first"), running_dt)[0]
+        == ScheduleState.RUNNING
+    )
+    assert (
+        cache.get_desired_state(schedule_of("first"), stopped_dt)[0]
+        == ScheduleState.STOPPED
+    )
+    assert (
+        cache.get_desired_state(schedule_of("second"), running_dt)[0]
+        == ScheduleState.RUNNING
+    )
+    assert (cache.hits, cache.misses) == (0, 3)
@@ -0,0 +1,459 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from threading import Event
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import boto3
+from _pytest.fixtures import fixture
+from botocore.exceptions import EndpointConnectionError
+from freezegun import freeze_time
+
+from instance_scheduler.schedulers import instance_states as instance_states_module
+from instance_scheduler.schedulers.instance_states import (
+    MAX_INSTANCE_CHANGES_PER_UPDATE,
+    InstanceStateLayout,
+    InstanceStates,
+    InstanceStatesBatch,
+)
+from instance_scheduler.schedulers.states import InstanceState
+from instance_scheduler.util.dynamodb_utils import DynamoDBUtils
+from tests.logger import MockLogger
+
+
+def load_states(
+    state_table: str,
+    layout: InstanceStateLayout = InstanceStateLayout.SINGLE_ITEM,
+    use_cache: bool = False,
+) -> InstanceStates:
+    instance_states = InstanceStates(
+        state_table, "ec2", MockLogger(), layout=layout, use_cache=use_cache
+    )
+    instance_states.load(account="123456789012", region="us-east-1")
+    return instance_states
+
+
+def test_concurrent_instance_changes_are_merged(state_table: str) -> None:
+    first_shard = load_states(state_table)
+    second_shard = load_states(state_table)
+
+    first_shard.set_instance_state("i-1", InstanceState.RUNNING)
+    second_shard.set_instance_state("i-2", InstanceState.STOPPED)
+    first_shard.save()
+    second_shard.save()
+
+    instance_states = load_states(state_table)
+    assert instance_states.get_instance_state("i-1") == InstanceState.RUNNING
+    assert instance_states.get_instance_state("i-2") == InstanceState.STOPPED
+
+
+def test_deleted_instances_are_removed(state_table: str) -> None:
+    instance_states = load_states(state_table)
+    instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+    instance_states.set_instance_state("i-2", InstanceState.RUNNING)
+    instance_states.save()
+
+    instance_states = load_states(state_table)
+    instance_states.delete_instance_state("i-1")
+    instance_states.save()
+
+    instance_states = load_states(state_table)
+    assert instance_states.get_instance_state("i-1") == InstanceState.UNKNOWN
+    assert instance_states.get_instance_state("i-2") == InstanceState.RUNNING
+
+
+def test_large_change_sets_are_saved_with_a_single_write(state_table: str) -> None:
+    instance_ids = [
+        f"i-{index}" for index in range(MAX_INSTANCE_CHANGES_PER_UPDATE * 2 + 1)
+    ]
+    instance_states = load_states(state_table)
+    instance_states.set_instance_state("i-concurrent", InstanceState.RUNNING)
+    concurrent = load_states(state_table)
+    concurrent.set_instance_state("i-concurrent", InstanceState.STOPPED)
+    concurrent.save()
+
+    for instance_id in instance_ids:
+        instance_states.set_instance_state(instance_id, InstanceState.STOPPED)
+    with patch.object(
+        instance_states.state_table,
+        "put_item",
+        wraps=instance_states.state_table.put_item,
+    ) as put_item:
+        instance_states.save()
+
+    # the first put conflicts with the concurrent save, the states are reloaded and put once more
+    assert put_item.call_count == 2
+
+    instance_states = load_states(state_table)
+    assert all(
+        instance_states.get_instance_state(instance_id) == InstanceState.STOPPED
+        for instance_id in instance_ids
+    )
+    assert instance_states.get_instance_state("i-concurrent") == InstanceState.RUNNING
+
+
+def stored_sort_keys(state_table: str) -> list[str]:
+    return sorted(
+        item["account-region"]
+        for item in boto3.resource("dynamodb").Table(state_table).scan()["Items"]
+    )
+
+
+def test_item_per_instance_layout_stores_one_item_per_instance(
+    state_table: str,
+) -> None:
+    instance_ids = [f"i-{index}" for index in range(30)]
+    instance_states = load_states(state_table, InstanceStateLayout.ITEM_PER_INSTANCE)
+    for instance_id in instance_ids:
+        instance_states.set_instance_state(instance_id, InstanceState.RUNNING)
+    instance_states.save()
+
+    assert stored_sort_keys(state_table) == sorted(
+        ["123456789012:us-east-1#"]
+        + [f"123456789012:us-east-1#{instance_id}" for instance_id in instance_ids]
+    )
+    instance_states = load_states(state_table, InstanceStateLayout.ITEM_PER_INSTANCE)
+    assert all(
+        instance_states.get_instance_state(instance_id) == InstanceState.RUNNING
+        for instance_id in instance_ids
+    )
+
+
+def test_item_per_instance_layout_merges_concurrent_changes(state_table: str) -> None:
+    first_shard = load_states(state_table, InstanceStateLayout.ITEM_PER_INSTANCE)
+    second_shard = load_states(state_table, InstanceStateLayout.ITEM_PER_INSTANCE)
+
+    first_shard.set_instance_state("i-1", InstanceState.RUNNING)
+    second_shard.set_instance_state("i-2", InstanceState.STOPPED)
+    first_shard.save()
+    second_shard.save()
+
+    instance_states = load_states(state_table, InstanceStateLayout.ITEM_PER_INSTANCE)
+    assert instance_states.get_instance_state("i-1") == InstanceState.RUNNING
+    assert instance_states.get_instance_state("i-2") == InstanceState.STOPPED
+
+    instance_states.delete_instance_state("i-1")
+    instance_states.save()
+
+    assert stored_sort_keys(state_table) == [
+        "123456789012:us-east-1#",
+        "123456789012:us-east-1#i-2",
+    ]
+
+
+def test_item_per_instance_layout_migrates_single_item_states(
+    state_table: str,
+) -> None:
+    instance_states = load_states(state_table)
+    instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+    instance_states.set_instance_state("i-2", InstanceState.STOPPED)
+    instance_states.save()
+
+    instance_states = load_states(state_table, InstanceStateLayout.ITEM_PER_INSTANCE)
+    assert instance_states.get_instance_state("i-1") == InstanceState.RUNNING
+    instance_states.set_instance_state("i-1", InstanceState.STOPPED)
+    instance_states.save()
+
+    assert stored_sort_keys(state_table) == [
+        "123456789012:us-east-1#",
+        "123456789012:us-east-1#i-1",
+        "123456789012:us-east-1#i-2",
+    ]
+    instance_states = load_states(state_table, InstanceStateLayout.ITEM_PER_INSTANCE)
+    assert instance_states.get_instance_state("i-1") == InstanceState.STOPPED
+    assert instance_states.get_instance_state("i-2") == InstanceState.STOPPED
+
+
+def test_item_per_instance_migration_does_not_overwrite_concurrent_changes(
+    state_table: str,
+) -> None:
+    instance_states = load_states(state_table)
+    instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+    instance_states.set_instance_state("i-2", InstanceState.RUNNING)
+    instance_states.save()
+
+    # two shards migrate the same single item
+    shard_a = load_states(state_table, InstanceStateLayout.ITEM_PER_INSTANCE)
+    shard_b = load_states(state_table, InstanceStateLayout.ITEM_PER_INSTANCE)
+    shard_b.set_instance_state("i-2", InstanceState.STOPPED)
+    shard_b.save()
+    shard_a.set_instance_state("i-1", InstanceState.STOPPED)
+    shard_a.save()
+
+    instance_states = load_states(state_table, InstanceStateLayout.ITEM_PER_INSTANCE)
+    assert instance_states.get_instance_state("i-1") == InstanceState.STOPPED
+    assert instance_states.get_instance_state("i-2") == InstanceState.STOPPED
+
+
+def test_save_does_not_overwrite_concurrent_changes(state_table: str) -> None:
+    instance_states = load_states(state_table)
+    instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+    instance_states.set_instance_state("i-2", InstanceState.RUNNING)
+    instance_states.save()
+
+    stale = load_states(state_table)
+    concurrent = load_states(state_table)
+    concurrent.set_instance_state("i-2", InstanceState.STOPPED)
+    concurrent.save()
+
+    stale.set_instance_state("i-1", InstanceState.STOPPED)
+    stale.save()
+
+    # the stale worker reloaded the item to retry its update
+    assert stale.get_instance_state("i-2") == InstanceState.STOPPED
+    stored = (
+        boto3.resource("dynamodb")
+        .Table(state_table)
+        .get_item(Key={"service": "ec2", "account-region": "123456789012:us-east-1"})[
+            "Item"
+        ]
+    )
+    assert stored["i-1"] == InstanceState.STOPPED
+    assert stored["i-2"] == InstanceState.STOPPED
+    assert stored["version"] == 3
+
+
+@fixture
+def empty_cache() -> Iterator[None]:
+    instance_states_module._instance_states_cache.clear()
+    yield
+    instance_states_module._instance_states_cache.clear()
+
+
+def test_cached_states_are_reused_while_item_is_unchanged(
+    state_table: str, empty_cache: None
+) -> None:
+    instance_states = load_states(state_table, use_cache=True)
+    instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+    instance_states.save()
+
+    # modify the state without bumping the version, only a full read would see this
+    boto3.resource("dynamodb").Table(state_table).update_item(
+        Key={"service": "ec2", "account-region": "123456789012:us-east-1"},
+        UpdateExpression="SET #i = :state",
+        ExpressionAttributeNames={"#i": "i-1"},
+        ExpressionAttributeValues={":state": InstanceState.STOPPED},
+    )
+
+    cached = load_states(state_table, use_cache=True)
+    assert cached.get_instance_state("i-1") == InstanceState.RUNNING
+    assert load_states(state_table).get_instance_state("i-1") == InstanceState.STOPPED
+
+
+def test_cached_states_are_reloaded_after_concurrent_changes(
+    state_table: str, empty_cache: None
+) -> None:
+    instance_states = load_states(state_table, use_cache=True)
+    instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+    instance_states.save()
+
+    concurrent = load_states(state_table)
+    concurrent.set_instance_state("i-1", InstanceState.STOPPED)
+    concurrent.save()
+
+    cached = load_states(state_table, use_cache=True)
+    assert cached.get_instance_state("i-1") == InstanceState.STOPPED
+    cached.set_instance_state("i-2", InstanceState.RUNNING)
+    cached.save()
+
+    stored = load_states(state_table)
+    assert stored.get_instance_state("i-1") == InstanceState.STOPPED
+    assert stored.get_instance_state("i-2") == InstanceState.RUNNING
+
+
+def test_batch_serves_prefetched_states(state_table: str) -> None:
+    instance_states = load_states(state_table)
+    instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+    instance_states.save()
+
+    batch = InstanceStatesBatch(state_table)
+    batch.prefetch(
+        [("ec2", "123456789012", "us-east-1"), ("rds", "123456789012", "us-east-1")],
+        MockLogger(),
+    )
+
+    with patch.object(InstanceStates, "_load_single_item") as load_single_item:
+        ec2_states = batch.instance_states("ec2", MockLogger())
+        ec2_states.load(account="123456789012", region="us-east-1")
+        rds_states = batch.instance_states("rds", MockLogger())
+        rds_states.load(account="123456789012", region="us-east-1")
+
+    load_single_item.assert_not_called()
+    assert ec2_states.get_instance_state("i-1") == InstanceState.RUNNING
+    assert rds_states.get_instance_state("i-1") == InstanceState.UNKNOWN
+
+
+def test_batch_prefetch_retries_unprocessed_keys(state_table: str) -> None:
+    def key(account: str) -> dict[str, Any]:
+        return {"service": "ec2", "account-region": f"{account}:us-east-1"}
+
+    dynamodb = MagicMock()
+    dynamodb.batch_get_item.side_effect = [
+        {
+            "Responses": {state_table: [{**key("111122223333"), "i-1": "running"}]},
+            "UnprocessedKeys": {state_table: {"Keys": [key("222233334444")]}},
+        },
+        {
+            "Responses": {state_table: [{**key("222233334444"), "i-2": "stopped"}]},
+            "UnprocessedKeys": {},
+        },
+    ]
+
+    batch = InstanceStatesBatch(state_table)
+    with patch.object(DynamoDBUtils, "get_dynamodb_resource", return_value=dynamodb):
+        batch.prefetch(
+            [
+                ("ec2", "111122223333", "us-east-1"),
+                ("ec2", "222233334444", "us-east-1"),
+            ],
+            MockLogger(),
+        )
+
+    assert dynamodb.batch_get_item.call_count == 2
+    assert dynamodb.batch_get_item.call_args.kwargs["RequestItems"][state_table][
+        "Keys"
+    ] == [key("222233334444")]
+    assert batch.take_prefetched("ec2", "111122223333:us-east-1") == {
+        **key("111122223333"),
+        "i-1": "running",
+    }
+    assert batch.take_prefetched("ec2", "222233334444:us-east-1") == {
+        **key("222233334444"),
+        "i-2": "stopped",
+    }
+
+
+def test_batch_falls_back_to_loading_per_target_when_prefetch_fails(
+    state_table: str,
+) -> None:
+    instance_states = load_states(state_table)
+    instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+    instance_states.save()
+
+    dynamodb = MagicMock()
+    dynamodb.batch_get_item.side_effect = EndpointConnectionError(
+        endpoint_url="https://dynamodb.us-east-1.amazonaws.com"
+    )
+    batch = InstanceStatesBatch(state_table)
+    with patch.object(DynamoDBUtils, "get_dynamodb_resource", return_value=dynamodb):
+        batch.prefetch([("ec2", "123456789012", "us-east-1")], MockLogger())
+
+    instance_states = batch.instance_states("ec2", MockLogger())
+    instance_states.load(account="123456789012", region="us-east-1")
+    assert instance_states.get_instance_state("i-1") == InstanceState.RUNNING
+
+
+def test_batch_saves_changes_in_background_before_flush(state_table: str) -> None:
+    batch = InstanceStatesBatch(state_table)
+    instance_states = batch.instance_states("ec2", MockLogger())
+    instance_states.load(account="123456789012", region="us-east-1")
+    instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+
+    saved = Event()
+    with patch.object(
+        InstanceStates, "flush", autospec=True, side_effect=lambda _: saved.set()
+    ):
+        instance_states.save()
+        # the save does not wait for the end of the batch
+        assert saved.wait(timeout=10)
+        batch.flush()
+
+
+def test_batch_flush_waits_for_saves(state_table: str) -> None:
+    batch = InstanceStatesBatch(state_table)
+    instance_states = batch.instance_states("ec2", MockLogger())
+    instance_states.load(account="123456789012", region="us-east-1")
+    instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+    instance_states.save()
+
+    batch.flush()
+
+    assert load_states(state_table).get_instance_state("i-1") == InstanceState.RUNNING
+
+
+def test_cleanup_removes_instances_not_seen_in_two_cleanups(state_table: str) -> None:
+    first_cleanup = datetime(2024, 3, 1, 10, 0, tzinfo=timezone.utc)
+    with freeze_time(first_cleanup):
+        instance_states = load_states(state_table)
+        instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+        instance_states.set_instance_state("i-2", InstanceState.RUNNING)
+        instance_states.cleanup({"i-1"})
+        instance_states.save()
+
+    with freeze_time(first_cleanup + timedelta(hours=1)):
+        # within the cleanup interval
+        instance_states = load_states(state_table)
+        instance_states.cleanup({"i-1"})
+        instance_states.save()
+        assert instance_states.get_instance_state("i-2") == InstanceState.RUNNING
+
+    with freeze_time(first_cleanup + timedelta(hours=13)):
+        instance_states = load_states(state_table)
+        instance_states.cleanup({"i-1"})
+        instance_states.save()
+
+    instance_states = load_states(state_table)
+    assert instance_states.get_instance_state("i-1") == InstanceState.RUNNING
+    assert instance_states.get_instance_state("i-2") == InstanceState.UNKNOWN
+
+
+def test_item_per_instance_states_expire_when_no_longer_seen(
+    state_table: str,
+) -> None:
+    layout = InstanceStateLayout.ITEM_PER_INSTANCE
+    first_seen = datetime(2024, 3, 1, 10, 0, tzinfo=timezone.utc)
+    with freeze_time(first_seen):
+        instance_states = load_states(state_table, layout)
+        instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+        instance_states.set_instance_state("i-2", InstanceState.RUNNING)
+        instance_states.save()
+
+    with freeze_time(first_seen + timedelta(hours=13)):
+        instance_states = load_states(state_table, layout)
+        instance_states.cleanup({"i-1"})
+        instance_states.save()
+
+    items = {
+        item["account-region"]: item
+        for item in boto3.resource("dynamodb").Table(state_table).scan()["Items"]
+    }
+    refreshed = items["123456789012:us-east-1#i-1"]
+    not_seen = items["123456789012:us-east-1#i-2"]
+    assert refreshed["last_seen"] == int((first_seen + timedelta(hours=13)).timestamp())
+    assert not_seen["expires_at"] == not_seen["last_seen"] + 36 * 3600
+
+    # expired states are ignored until they are deleted by dynamodb
+    with freeze_time(first_seen + timedelta(hours=37)):
+        instance_states = load_states(state_table, layout)
+        assert instance_states.get_instance_state("i-1") == InstanceState.RUNNING
+        assert instance_states.get_instance_state("i-2") == InstanceState.UNKNOWN
+
+
+def test_item_per_instance_last_seen_refresh_keeps_concurrent_state_changes(
+    state_table: str,
+) -> None:
+    layout = InstanceStateLayout.ITEM_PER_INSTANCE
+    first_seen = datetime(2024, 3, 1, 10, 0, tzinfo=timezone.utc)
+    with freeze_time(first_seen):
+        instance_states = load_states(state_table, layout)
+        instance_states.set_instance_state("i-1", InstanceState.RUNNING)
+        instance_states.save()
+
+    with freeze_time(first_seen + timedelta(hours=13)):
+        shard_a = load_states(state_table, layout)
+        shard_b = load_states(state_table, layout)
+        shard_b.set_instance_state("i-1", InstanceState.STOPPED)
+        shard_b.save()
+        # shard a describes i-1 of shard b and refreshes its last seen time
+        shard_a.cleanup({"i-1"})
+        shard_a.save()
+
+    [item] = [
+        item
+        for item in boto3.resource("dynamodb").Table(state_table).scan()["Items"]
+        if item["account-region"] == "123456789012:us-east-1#i-1"
+    ]
+    assert item["state"] == InstanceState.STOPPED
+    assert item["last_seen"] == int((first_seen + timedelta(hours=13)).timestamp())
@@ -2,7 +2,7 @@
 # SPDX-License-Identifier: Apache-2.0
 import random
 from collections.abc import Sequence
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from itertools import chain
 from typing import TYPE_CHECKING, Final
 from unittest.mock import ANY, MagicMock, patch
@@ -10,6 +10,7 @@ from zoneinfo import ZoneInfo
 
 import boto3
 from boto3.session import Session
+from botocore.exceptions import ClientError
 from botocore.stub import Stubber
 
 from instance_scheduler.configuration.instance_schedule import InstanceSchedule
@@ -20,7 +21,12 @@ from instance_scheduler.handler.environments.scheduling_request_environment impo
 from instance_scheduler.maint_win.ssm_mw_client import SSMMWClient
 from instance_scheduler.model import EC2SSMMaintenanceWindow, MWStore
 from instance_scheduler.service import Ec2Service
-from instance_scheduler.service.ec2 import EC2StateCode, get_tags
+from instance_scheduler.service.ec2 import (
+    EC2StateCode,
+    get_tags,
+    instance_ids_named_in_error,
+    is_member_of_asg,
+)
 from instance_scheduler.service.ec2_instance import EC2Instance
 from instance_scheduler.util.session_manager import AssumedRole
 from tests.conftest import get_ami
@@ -58,6 +64,14 @@ def test_get_tags() -> None:
     assert get_tags(instance) == {"foo": "bar", "baz": "qux"}
 
 
+def test_is_member_of_asg() -> None:
+    assert not is_member_of_asg({})
+    assert not is_member_of_asg({"Tags": [{"Key": "Schedule", "Value": "s"}]})
+    assert is_member_of_asg(
+        {"Tags": [{"Key": "aws:autoscaling:groupName", "Value": "my-group"}]}
+    )
+
+
 def build_ec2_service(
     env: SchedulingRequestEnvironment = MockSchedulingRequestEnvironment(),
     scheduling_context: SchedulingContext = build_scheduling_context(
@@ -589,3 +603,123 @@ def test_stop_instances_will_fallback_on_regular_stop_when_hibernate_errors() ->
 
     instance_results: Final = {instance_id: status for (instance_id, status) in result}
     assert instance_results[my_instance_id] == "stopped"
+
+
+def test_stop_instances_stops_and_tags_each_chunk(moto_backend: None) -> None:
+    ec2: Final[EC2Client] = boto3.client("ec2")
+    instance_type: Final[InstanceTypeType] = "m6g.large"
+    instances = create_instances_of_status(
+        ec2, instance_type=instance_type, qty_running=5
+    )
+    service: Final = build_ec2_service(
+        scheduling_context=replace(
+            build_scheduling_context(quick_time(0, 0, 0)),
+            stopped_tags=[{"Key": "state", "Value": "stopped"}],
+        )
+    )
+
+    instances_to_stop: Final = [
+        instance_data_from(
+            instance_id=instance_id,
+            instance_state="running",
+            instance_type=instance_type,
+            hibernate=index % 2 == 0,
+        )
+        for index, instance_id in enumerate(instances.running_ids)
+    ]
+
+    with patch("instance_scheduler.service.ec2.MAX_INSTANCE_IDS_PER_ACTION", 2):
+        with patch.object(
+            service._ec2, "stop_instances", wraps=service._ec2.stop_instances
+        ) as stop_instances:
+            result = list(service.stop_instances(instances_to_stop))
+
+    assert sorted(instance_id for instance_id, _ in result) == sorted(
+        instances.running_ids
+    )
+    # 3 hibernated instances in chunks of [2, 1] and 2 stopped instances in a single chunk
+    assert sorted(
+        len(call.kwargs["InstanceIds"]) for call in stop_instances.mock_calls
+    ) == [1, 2, 2]
+
+    for reservation in ec2.describe_instances(InstanceIds=instances.running_ids)[
+        "Reservations"
+    ]:
+        for instance in reservation["Instances"]:
+            assert get_tags(instance)["state"] == "stopped"
+
+
+def test_describe_tagged_instances_omits_asg_members_and_reads_every_page(
+    moto_backend: None,
+) -> None:
+    ec2: Final[EC2Client] = boto3.client("ec2")
+    instance_ids = [
+        instance["InstanceId"]
+        for instance in ec2.run_instances(ImageId=get_ami(), MinCount=5, MaxCount=5)[
+            "Instances"
+        ]
+    ]
+    ec2.create_tags(
+        Resources=instance_ids, Tags=[{"Key": "Schedule", "Value": "test-schedule"}]
+    )
+    ec2.create_tags(
+        Resources=instance_ids[0:1],
+        Tags=[{"Key": "aws:autoscaling:groupName", "Value": "my-group"}],
+    )
+
+    with patch("instance_scheduler.service.ec2.DESCRIBE_INSTANCES_PAGE_SIZE", 2):
+        described = list(build_ec2_service().describe_tagged_instances())
+
+    assert sorted(instance.id for instance in described) == sorted(instance_ids[1:])
+
+
+def test_describe_tagged_instances_by_schedule_name_omits_unknown_schedules(
+    moto_backend: None,
+) -> None:
+    ec2: Final[EC2Client] = boto3.client("ec2")
+    instance_ids = [
+        instance["InstanceId"]
+        for instance in ec2.run_instances(ImageId=get_ami(), MinCount=4, MaxCount=4)[
+            "Instances"
+        ]
+    ]
+    for instance_id, schedule_name in zip(
+        instance_ids, ["first", "second", "third", "unknown"]
+    ):
+        ec2.create_tags(
+            Resources=[instance_id], Tags=[{"Key": "Schedule", "Value": schedule_name}]
+        )
+    schedules = {
+        name: InstanceSchedule(name=name, timezone=ZoneInfo("UTC"))
+        for name in ["first", "second", "third"]
+    }
+    service = build_ec2_service(
+        env=MockSchedulingRequestEnvironment(ec2_describe_by_schedule_name=True),
+        scheduling_context=build_scheduling_context(
+            quick_time(0, 0, 0), schedules=schedules
+        ),
+    )
+
+    # one schedule name per filter, spread over multiple groups of concurrent streams
+    with patch(
+        "instance_scheduler.service.ec2.DESCRIBE_INSTANCES_FILTER_VALUES_LIMIT", 1
+    ), patch("instance_scheduler.service.ec2.MAX_CONCURRENT_DESCRIBE_STREAMS", 2):
+        described = list(service.describe_tagged_instances())
+
+    assert sorted(instance.id for instance in described) == sorted(instance_ids[0:3])
+
+
+def test_instance_ids_named_in_error() -> None:
+    instance_ids: Final = ["i-0123456789abcdef0", "i-1", "i-12"]
+    error: Final = ClientError(
+        {
+            "Error": {
+                "Code": "IncorrectInstanceState",
+                "Message": "The instance 'i-12' is not in a state from which it can be started.",
+            }
+        },
+        "StartInstances",
+    )
+
+    assert instance_ids_named_in_error(instance_ids, error) == {"i-12"}
+    assert instance_ids_named_in_error(instance_ids, ValueError("i-12")) == set()
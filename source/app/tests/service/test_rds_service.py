@@ -1,18 +1,25 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 from contextlib import contextmanager
-from typing import Iterator
+from dataclasses import replace
+from typing import Any, Final, Iterator
 from unittest.mock import MagicMock, call, patch
 
 import pytest
 from _pytest.fixtures import fixture
 from boto3.session import Session
 
+from instance_scheduler.configuration.scheduling_context import SchedulingContext
 from instance_scheduler.handler.environments.scheduling_request_environment import (
     SchedulingRequestEnvironment,
 )
+from instance_scheduler.schedulers.states import ScheduleState
 from instance_scheduler.service import RdsService
-from instance_scheduler.service.rds import RdsTagDescription
+from instance_scheduler.service.rds import (
+    RdsTagDescription,
+    maintenance_window_schedule,
+)
+from instance_scheduler.service.rds_instance import RdsInstance
 from instance_scheduler.util.session_manager import AssumedRole
 from tests.integration.helpers.rds_helpers import (
     create_rds_clusters,
@@ -30,6 +37,9 @@ from tests.test_utils.mock_scheduling_request_environment import (
 
 def build_rds_service(
     env: SchedulingRequestEnvironment = MockSchedulingRequestEnvironment(),
+    scheduling_context: SchedulingContext = build_scheduling_context(
+        quick_time(0, 0, 0)
+    ),
 ) -> RdsService:
     return RdsService(
         assumed_scheduling_role=AssumedRole(
@@ -38,7 +48,7 @@ def build_rds_service(
             role_name="role-name",
             session=Session(),
         ),
-        scheduling_context=build_scheduling_context(quick_time(0, 0, 0)),
+        scheduling_context=scheduling_context,
         logger=MockLogger(),
         env=env,
     )
@@ -236,3 +246,186 @@ def test_describe_clusters_respects_50_arn_filter_limit(moto_backend: None) -> N
             in requested_rds_arns
             for instance_id in rds_clusters
         )
+
+
+def rds_instance_data_from(instance_id: str, state: str) -> RdsInstance:
+    return RdsInstance(
+        _id=instance_id,
+        _name="",
+        _schedule_name="test-schedule",
+        _current_state=state,
+        _instance_type="db.m5.large",
+        _tags={},
+        _maintenance_windows=[],
+        _is_cluster=False,
+        _arn=f"arn:aws:rds:us-east-1:123456789012:db:{instance_id}",
+        _engine_type="postgres",
+    )
+
+
+def test_start_instances_yields_failures_from_concurrent_starts(
+    mock_boto_client: MagicMock,
+) -> None:
+    def start_db_instance(DBInstanceIdentifier: str) -> None:
+        if DBInstanceIdentifier == "bad-instance":
+            raise ValueError("cannot start")
+
+    mock_boto_client.start_db_instance.side_effect = start_db_instance
+    rds_service = build_rds_service(
+        MockSchedulingRequestEnvironment(rds_action_concurrency=3)
+    )
+    instances = [
+        rds_instance_data_from(instance_id, "stopped")
+        for instance_id in ["first", "bad-instance", "second", "third"]
+    ]
+
+    result = list(rds_service.start_instances(instances))
+
+    assert [(instance.id, str(error)) for instance, error in result] == [
+        ("bad-instance", "cannot start")
+    ]
+    assert sorted(
+        call.kwargs["DBInstanceIdentifier"]
+        for call in mock_boto_client.start_db_instance.call_args_list
+    ) == ["bad-instance", "first", "second", "third"]
+
+
+def test_stop_instances_yields_stopped_instances_in_order(
+    mock_boto_client: MagicMock,
+) -> None:
+    def stop_db_instance(DBInstanceIdentifier: str, **_: str) -> None:
+        if DBInstanceIdentifier == "bad-instance":
+            raise ValueError("cannot stop")
+
+    mock_boto_client.stop_db_instance.side_effect = stop_db_instance
+    rds_service = build_rds_service(
+        MockSchedulingRequestEnvironment(
+            rds_action_concurrency=3, enable_rds_snapshots=False
+        )
+    )
+    instances = [
+        rds_instance_data_from(instance_id, "available")
+        for instance_id in ["first", "bad-instance", "second", "third"]
+    ]
+
+    result = list(rds_service.stop_instances(instances))
+
+    assert result == [
+        ("first", ScheduleState.STOPPED),
+        ("second", ScheduleState.STOPPED),
+        ("third", ScheduleState.STOPPED),
+    ]
+
+
+def test_start_instances_tags_started_instances_in_batches_of_20(
+    mock_boto_client: MagicMock, capsys: pytest.CaptureFixture[str]
+) -> None:
+    failed_arn: Final = "arn:aws:rds:us-east-1:123456789012:db:instance-21"
+    mock_boto_client.untag_resources.return_value = {"FailedResourcesMap": {}}
+    mock_boto_client.tag_resources.side_effect = lambda ResourceARNList, Tags: {
+        "FailedResourcesMap": (
+            {
+                failed_arn: {
+                    "ErrorCode": "InvalidParameterException",
+                    "ErrorMessage": "no",
+                }
+            }
+            if failed_arn in ResourceARNList
+            else {}
+        )
+    }
+    rds_service = build_rds_service(
+        scheduling_context=replace(
+            build_scheduling_context(quick_time(0, 0, 0)),
+            started_tags=[{"Key": "state", "Value": "started"}],
+            stopped_tags=[{"Key": "stopped-at", "Value": "yesterday"}],
+        )
+    )
+    instances = [
+        rds_instance_data_from(f"instance-{index}", "stopped") for index in range(25)
+    ]
+
+    assert list(rds_service.start_instances(instances)) == []
+
+    assert [
+        len(call.kwargs["ResourceARNList"])
+        for call in mock_boto_client.tag_resources.call_args_list
+    ] == [20, 5]
+    assert all(
+        call.kwargs["Tags"] == {"state": "started"}
+        for call in mock_boto_client.tag_resources.call_args_list
+    )
+    assert [
+        (len(call.kwargs["ResourceARNList"]), call.kwargs["TagKeys"])
+        for call in mock_boto_client.untag_resources.call_args_list
+    ] == [(20, ["stopped-at"]), (5, ["stopped-at"])]
+    mock_boto_client.add_tags_to_resource.assert_not_called()
+    mock_boto_client.remove_tags_from_resource.assert_not_called()
+    assert (
+        "Error setting start or stop tags to started instance instance-21, (no)"
+        in capsys.readouterr().out
+    )
+
+
+def describe_db_instances_response(instance_ids: list[str]) -> dict[str, Any]:
+    return {
+        "DBInstances": [
+            {
+                "DBInstanceIdentifier": instance_id,
+                "DBInstanceArn": f"arn:aws:rds:us-east-1:123456789012:db:{instance_id}",
+                "DBInstanceStatus": "available",
+                "DBInstanceClass": "db.m5.large",
+                "Engine": "postgres",
+                "PreferredMaintenanceWindow": "sun:01:00-sun:01:30",
+            }
+            for instance_id in instance_ids
+        ]
+    }
+
+
+@pytest.mark.parametrize(
+    "account_instance_count,expect_unfiltered", [(4, True), (10, False)]
+)
+def test_describes_all_instances_when_most_instances_are_tagged(
+    mock_boto_client: MagicMock, account_instance_count: int, expect_unfiltered: bool
+) -> None:
+    mock_boto_client.describe_account_attributes.return_value = {
+        "AccountQuotas": [
+            {"AccountQuotaName": "DBInstances", "Used": account_instance_count}
+        ]
+    }
+    paginator = MagicMock()
+    paginator.paginate.return_value = [
+        describe_db_instances_response(["tagged-1", "untagged", "tagged-2"])
+    ]
+    mock_boto_client.get_paginator.side_effect = lambda name: (
+        paginator if name == "describe_db_instances" else MagicMock()
+    )
+    rds_service = build_rds_service()
+
+    with mock_tagged_resources(
+        rds_service,
+        {
+            "db": {
+                f"arn:aws:rds:us-east-1:123456789012:db:{instance_id}": {
+                    "Schedule": "test-schedule"
+                }
+                for instance_id in ["tagged-1", "tagged-2"]
+            },
+            "cluster": {},
+        },
+    ):
+        described = list(rds_service.describe_tagged_instances())
+
+    assert [instance.id for instance in described] == ["tagged-1", "tagged-2"]
+    assert ("Filters" not in paginator.paginate.call_args.kwargs) == expect_unfiltered
+
+
+def test_maintenance_window_schedules_are_shared_per_window() -> None:
+    schedule = maintenance_window_schedule("mon:01:00-mon:01:30")
+
+    assert maintenance_window_schedule("mon:01:00-mon:01:30") is schedule
+    assert maintenance_window_schedule("tue:01:00-tue:01:30") is not schedule
+    assert schedule == RdsService.build_schedule_from_maintenance_window(
+        "mon:01:00-mon:01:30"
+    )
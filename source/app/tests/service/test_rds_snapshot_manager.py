@@ -0,0 +1,106 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from typing import TYPE_CHECKING, Final
+from unittest.mock import patch
+
+import boto3
+
+from instance_scheduler.service.rds_snapshot_manager import RdsSnapshotManager
+from tests.integration.helpers.rds_helpers import create_rds_instances
+from tests.logger import MockLogger
+
+if TYPE_CHECKING:
+    from mypy_boto3_rds.client import RDSClient
+else:
+    RDSClient = object
+
+
+def build_snapshot_manager(rds: RDSClient) -> RdsSnapshotManager:
+    return RdsSnapshotManager(
+        rds, stack_name="my stack", logger=MockLogger(), concurrency=4
+    )
+
+
+def snapshot_ids(rds: RDSClient) -> set[str]:
+    return {
+        snapshot["DBSnapshotIdentifier"]
+        for snapshot in rds.describe_db_snapshots(SnapshotType="manual")["DBSnapshots"]
+    }
+
+
+def test_snapshot_name_omits_spaces(moto_backend: None) -> None:
+    manager: Final = build_snapshot_manager(boto3.client("rds"))
+
+    assert manager.snapshot_name("my-instance") == "mystack-stopped-my-instance"
+
+
+def test_lists_lineage_of_stack_snapshots_once(moto_backend: None) -> None:
+    rds: Final[RDSClient] = boto3.client("rds")
+    first, second = create_rds_instances(2)
+    rds.create_db_snapshot(
+        DBInstanceIdentifier=first, DBSnapshotIdentifier=f"mystack-stopped-{first}"
+    )
+    rds.create_db_snapshot(
+        DBInstanceIdentifier=second, DBSnapshotIdentifier="customer-snapshot"
+    )
+    manager: Final = build_snapshot_manager(rds)
+
+    with patch.object(rds, "get_paginator", wraps=rds.get_paginator) as get_paginator:
+        assert manager.lineage == {f"mystack-stopped-{first}": first}
+        assert manager.lineage == {f"mystack-stopped-{first}": first}
+
+    get_paginator.assert_called_once_with("describe_db_snapshots")
+
+
+def test_deletes_previous_snapshots_of_stopped_instances_only(
+    moto_backend: None,
+) -> None:
+    rds: Final[RDSClient] = boto3.client("rds")
+    instance_ids: Final = create_rds_instances(3)
+    for instance_id in instance_ids:
+        rds.create_db_snapshot(
+            DBInstanceIdentifier=instance_id,
+            DBSnapshotIdentifier=f"mystack-stopped-{instance_id}",
+        )
+    rds.create_db_snapshot(
+        DBInstanceIdentifier=instance_ids[0],
+        DBSnapshotIdentifier="customer-snapshot",
+    )
+    manager: Final = build_snapshot_manager(rds)
+
+    undeleted = manager.delete_previous_snapshots(instance_ids[0:2])
+
+    assert undeleted == set()
+    assert snapshot_ids(rds) == {
+        "customer-snapshot",
+        f"mystack-stopped-{instance_ids[2]}",
+    }
+    assert manager.lineage == {f"mystack-stopped-{instance_ids[2]}": instance_ids[2]}
+
+
+def test_reports_instances_whose_snapshot_could_not_be_deleted(
+    moto_backend: None,
+) -> None:
+    rds: Final[RDSClient] = boto3.client("rds")
+    (instance_id,) = create_rds_instances(1)
+    rds.create_db_snapshot(
+        DBInstanceIdentifier=instance_id,
+        DBSnapshotIdentifier=f"mystack-stopped-{instance_id}",
+    )
+    manager: Final = build_snapshot_manager(rds)
+
+    with patch.object(
+        rds, "delete_db_snapshot", side_effect=Exception("access denied")
+    ):
+        undeleted = manager.delete_previous_snapshots([instance_id])
+
+    assert undeleted == {instance_id}
+    assert manager.lineage == {f"mystack-stopped-{instance_id}": instance_id}
+
+
+def test_records_new_snapshots(moto_backend: None) -> None:
+    manager: Final = build_snapshot_manager(boto3.client("rds"))
+
+    manager.record_snapshot("my-instance")
+
+    assert manager.lineage == {"mystack-stopped-my-instance": "my-instance"}
@@ -18,6 +18,7 @@ class MockOrchestratorEnvironment(OrchestratorEnvironment):
     # references
     scheduling_request_handler_name: str = "scheduling-request-handler-lambda"
     config_table_name: str = "my-config-table-name"
+    state_table_name: str = "my-state-table-name"
     # scheduling
     enable_schedule_hub_account: bool = False
     enable_ec2_service: bool = False
@@ -27,6 +28,10 @@ class MockOrchestratorEnvironment(OrchestratorEnvironment):
     enable_docdb_service: bool = False
     enable_asg_service: bool = False
     schedule_regions: list[str] = field(default_factory=list)
+    # dispatch
+    scheduling_request_dispatch_concurrency: int = 1
+    scheduling_request_batch_max_instances: int = 0
+    scheduling_request_shard_max_instances: int = 0
 
     # used for metrics only
     default_timezone: ZoneInfo = ZoneInfo("Asia/Tokyo")
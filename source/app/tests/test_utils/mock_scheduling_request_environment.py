@@ -6,6 +6,7 @@ from zoneinfo import ZoneInfo
 from instance_scheduler.handler.environments.scheduling_request_environment import (
     SchedulingRequestEnvironment,
 )
+from instance_scheduler.schedulers.instance_states import InstanceStateLayout
 
 
 @dataclass(frozen=True)
@@ -16,6 +17,9 @@ class MockSchedulingRequestEnvironment(SchedulingRequestEnvironment):
     enable_debug_logging: bool = False
     stack_name: str = "my-stack-name"
     state_table_name: str = "my-state-table-name"
+    state_table_layout: InstanceStateLayout = InstanceStateLayout.SINGLE_ITEM
+    enable_instance_states_cache: bool = False
+    enable_batched_instance_states: bool = False
     config_table_name: str = "my-config-table-name"
     maintenance_window_table_name: str = "my-maintenance-window-table"
     scheduler_role_name: str = "my-scheduler-role-name"
@@ -27,9 +31,13 @@ class MockSchedulingRequestEnvironment(SchedulingRequestEnvironment):
     schedule_tag_key: str = "Schedule"
     scheduler_frequency_minutes: int = 5
     enable_ec2_ssm_maintenance_windows: bool = False
+    ec2_describe_by_schedule_name: bool = False
+    ec2_action_concurrency: int = 4
     enable_rds_service: bool = True
     enable_rds_clusters: bool = True
     enable_docdb_service: bool = True
     enable_neptune_service: bool = True
     enable_rds_snapshots: bool = True
+    rds_action_concurrency: int = 4
     enable_ops_monitoring: bool = True
+    scheduling_action_batch_size: int = 100
@@ -114,3 +114,64 @@ def test_bisect_retry_many_errors() -> None:
 
     # \sum_{i=0}^{log_2(n)} 2^i = 2n-1
     assert action_fail_even.call_count == 2 * input_size - 1
+
+
+def classify_value_errors(inputs: list[int], error: Exception) -> list[int]:
+    return [
+        index
+        for index, item in enumerate(inputs)
+        if isinstance(error, ValueError) and item in error.args
+    ]
+
+
+def test_bisect_retry_with_classifier_retries_remaining_inputs_once() -> None:
+    action_fail_single: Final = MagicMock(
+        side_effect=create_action_failing_on_inputs(frozenset([2]))
+    )
+
+    result = bisect_retry(
+        list(range(10)), action_fail_single, classify_error=classify_value_errors
+    )
+
+    assert [failure.failed_input for failure in result.failure_responses] == [2]
+    assert isinstance(result.failure_responses[0].error, ValueError)
+    assert len(result.success_responses) == 1
+    assert len(result.intermediate_responses) == 1
+    action_fail_single.assert_has_calls(
+        [call(list(range(10))), call([0, 1, 3, 4, 5, 6, 7, 8, 9])]
+    )
+    assert action_fail_single.call_count == 2
+
+
+def test_bisect_retry_bisects_when_classifier_identifies_nothing() -> None:
+    action_fail_single: Final = MagicMock(
+        side_effect=create_action_failing_on_inputs(frozenset([2]))
+    )
+
+    result = bisect_retry(
+        list(range(10)), action_fail_single, classify_error=lambda inputs, err: []
+    )
+
+    assert [failure.failed_input for failure in result.failure_responses] == [2]
+    assert action_fail_single.call_count == 7
+
+
+def test_bisect_retry_fails_classified_indexes_only() -> None:
+    # equal inputs are told apart by their index
+    inputs: Final = [[0], [1], [2], [3], [2]]
+
+    def action_failing_on_third_input(items: list[list[int]]) -> None:
+        if any(item is inputs[2] for item in items):
+            raise ValueError()
+
+    result = bisect_retry(
+        inputs,
+        action_failing_on_third_input,
+        classify_error=lambda items, err: [
+            index for index, item in enumerate(items) if item is inputs[2]
+        ],
+    )
+
+    assert len(result.failure_responses) == 1
+    assert result.failure_responses[0].failed_input is inputs[2]
+    assert len(result.success_responses) == 1
@@ -0,0 +1,41 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from collections.abc import Iterator
+
+import pytest
+
+from instance_scheduler.util.prefetch import read_ahead
+
+
+def test_items_are_returned_in_order() -> None:
+    with read_ahead(iter(range(100)), max_buffered=3) as items:
+        assert list(items) == list(range(100))
+
+
+def test_producer_errors_are_raised_to_the_consumer() -> None:
+    def produce() -> Iterator[int]:
+        yield 1
+        yield 2
+        raise ValueError("describe failed")
+
+    consumed = []
+    with pytest.raises(ValueError, match="describe failed"):
+        with read_ahead(produce(), max_buffered=10) as items:
+            for item in items:
+                consumed.append(item)
+
+    assert consumed == [1, 2]
+
+
+def test_producer_stops_when_consumer_exits_early() -> None:
+    produced = []
+
+    def produce() -> Iterator[int]:
+        for index in range(1000):
+            produced.append(index)
+            yield index
+
+    with read_ahead(produce(), max_buffered=2) as items:
+        assert next(items) == 0
+
+    assert len(produced) < 1000
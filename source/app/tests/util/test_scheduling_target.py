@@ -0,0 +1,176 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+from instance_scheduler.model.target_stats import TargetStats
+from instance_scheduler.util.scheduling_target import (
+    DEFAULT_TARGET_INSTANCE_ESTIMATE,
+    MAX_SHARD_ACTION_SECONDS,
+    MAX_SHARDS_PER_TARGET,
+    SchedulingTarget,
+    batch_targets,
+    instance_count_estimator,
+    shard_count_for,
+    shard_targets,
+)
+
+targets = [
+    SchedulingTarget(account=f"11112222333{index}", service="ec2", region="us-east-1")
+    for index in range(5)
+]
+
+
+def test_batching_disabled_yields_one_batch_per_target() -> None:
+    assert list(batch_targets(targets, max_instances_per_batch=0)) == [
+        [target] for target in targets
+    ]
+
+
+def test_targets_are_grouped_up_to_max_instances() -> None:
+    assert list(
+        batch_targets(
+            targets, max_instances_per_batch=20, estimate_instance_count=lambda _: 10
+        )
+    ) == [targets[0:2], targets[2:4], targets[4:5]]
+
+
+def test_large_targets_are_batched_alone() -> None:
+    estimates = {targets[1]: 100}
+
+    assert list(
+        batch_targets(
+            targets,
+            max_instances_per_batch=30,
+            estimate_instance_count=lambda target: estimates.get(target, 10),
+        )
+    ) == [targets[0:1], targets[1:2], targets[2:5]]
+
+
+def stats_of(
+    target: SchedulingTarget,
+    instance_count: int,
+    action_seconds: float = 1,
+    shard_count: int = 1,
+) -> TargetStats:
+    return TargetStats(
+        account=target.account,
+        service=target.service,
+        region=target.region,
+        instance_count=instance_count,
+        action_seconds=action_seconds,
+        shard_count=shard_count,
+    )
+
+
+def test_shard_count_is_based_on_instance_count() -> None:
+    assert shard_count_for(stats_of(targets[0], 100), max_instances_per_shard=0) == 1
+    assert shard_count_for(stats_of(targets[0], 100), max_instances_per_shard=100) == 1
+    assert shard_count_for(stats_of(targets[0], 101), max_instances_per_shard=100) == 2
+    assert (
+        shard_count_for(
+            stats_of(targets[0], 100, shard_count=2), max_instances_per_shard=100
+        )
+        == 2
+    )
+
+
+def test_shard_count_is_based_on_action_time() -> None:
+    assert (
+        shard_count_for(
+            stats_of(
+                targets[0],
+                10,
+                action_seconds=MAX_SHARD_ACTION_SECONDS * 3 / 4,
+                shard_count=4,
+            ),
+            max_instances_per_shard=100,
+        )
+        == 3
+    )
+
+
+def test_shard_count_by_action_time_at_most_doubles() -> None:
+    assert (
+        shard_count_for(
+            stats_of(targets[0], 10, action_seconds=MAX_SHARD_ACTION_SECONDS * 5),
+            max_instances_per_shard=100,
+        )
+        == 2
+    )
+
+
+def test_shard_count_scales_down_when_shards_are_fast() -> None:
+    assert (
+        shard_count_for(
+            stats_of(targets[0], 10, action_seconds=1, shard_count=8),
+            max_instances_per_shard=100,
+        )
+        == 1
+    )
+
+
+def test_shard_count_is_limited() -> None:
+    assert (
+        shard_count_for(stats_of(targets[0], 100_000), max_instances_per_shard=1)
+        == MAX_SHARDS_PER_TARGET
+    )
+
+
+def test_targets_without_stats_are_not_sharded() -> None:
+    assert list(shard_targets(targets, max_instances_per_shard=1, stats={})) == targets
+
+
+def test_large_targets_are_sharded() -> None:
+    stats = {targets[1]: stats_of(targets[1], 250)}
+
+    sharded_targets = list(
+        shard_targets(targets[0:2], max_instances_per_shard=100, stats=stats)
+    )
+
+    assert sharded_targets[0] == targets[0]
+    assert [(t.shard_index, t.shard_count) for t in sharded_targets[1:]] == [
+        (0, 3),
+        (1, 3),
+        (2, 3),
+    ]
+    assert all(t.unsharded == targets[1] for t in sharded_targets[1:])
+
+
+def test_shards_are_never_batched() -> None:
+    shards = [
+        SchedulingTarget(
+            account="111122223333",
+            service="ec2",
+            region="us-east-1",
+            shard_index=index,
+            shard_count=2,
+        )
+        for index in range(2)
+    ]
+
+    assert list(
+        batch_targets(
+            [targets[0], *shards, targets[1]],
+            max_instances_per_batch=1000,
+            estimate_instance_count=lambda _: 1,
+        )
+    ) == [[targets[0]], [shards[0]], [shards[1]], [targets[1]]]
+
+
+def test_instance_count_estimate_is_based_on_stats() -> None:
+    estimate = instance_count_estimator(
+        {targets[0]: stats_of(targets[0], 50, shard_count=2)}
+    )
+
+    assert estimate(targets[0]) == 100
+    assert (
+        estimate(
+            SchedulingTarget(
+                account=targets[0].account,
+                service=targets[0].service,
+                region=targets[0].region,
+                shard_index=1,
+                shard_count=4,
+            )
+        )
+        == 25
+    )
+    assert estimate(targets[1]) == DEFAULT_TARGET_INSTANCE_ESTIMATE
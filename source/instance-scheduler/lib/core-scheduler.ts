@@ -138,6 +138,7 @@ export class CoreScheduler {
       pointInTimeRecovery: true,
       encryption: TableEncryption.CUSTOMER_MANAGED,
       encryptionKey: key,
+      timeToLiveAttribute: "expires_at",
     });
     overrideLogicalId(stateTable, "StateTable");
     overrideRetentionPolicies(
@@ -263,6 +264,7 @@ export class CoreScheduler {
       schedulingRequestHandlerLambda: schedulingRequestHandler.lambdaFunction,
       enableDebugLogging: props.enableDebugLogging,
       configTable: this.configTable,
+      stateTable: stateTable,
       snsErrorReportingTopic: this.topic,
       snsKmsKey: key,
       scheduleLogGroup: schedulerLogGroup,
@@ -38,9 +38,17 @@ export class SchedulingPermissionsPolicy extends Policy {
         resources: ["*"],
       }),
 
-      // describe rds instances and clusters
+      // describe rds resources and snapshots, bulk tag rds resources (tagging api actions cannot be scoped)
       new PolicyStatement({
-        actions: ["rds:DescribeDBClusters", "rds:DescribeDBInstances", "tag:GetResources"],
+        actions: [
+          "rds:DescribeAccountAttributes",
+          "rds:DescribeDBClusters",
+          "rds:DescribeDBInstances",
+          "rds:DescribeDBSnapshots",
+          "tag:GetResources",
+          "tag:TagResources",
+          "tag:UntagResources",
+        ],
         effect: Effect.ALLOW,
         resources: ["*"],
       }),
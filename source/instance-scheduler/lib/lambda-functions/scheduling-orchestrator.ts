@@ -21,6 +21,7 @@ export interface SchedulingOrchestratorProps {
   readonly schedulingRequestHandlerLambda: LambdaFunction;
   readonly enableDebugLogging: CfnCondition;
   readonly configTable: Table;
+  readonly stateTable: Table;
   readonly snsErrorReportingTopic: Topic;
   readonly snsKmsKey: Key;
   readonly scheduleLogGroup: LogGroup;
@@ -81,6 +82,7 @@ export class SchedulingOrchestrator {
         OPS_DASHBOARD_ENABLED: cfnConditionToTrueFalse(props.opsDashboardEnabled),
         START_TAGS: props.startTags,
         STOP_TAGS: props.stopTags,
+        STATE_TABLE: props.stateTable.tableName,
         ...props.metricsEnv,
       },
     });
@@ -103,7 +105,8 @@ export class SchedulingOrchestrator {
     props.schedulingRequestHandlerLambda.grantInvoke(this.lambdaFunction.role);
 
     lambdaDefaultLogGroup.grantWrite(orchestratorPolicy);
-    props.configTable.grantReadData(orchestratorPolicy);
+    props.configTable.grantReadWriteData(orchestratorPolicy);
+    props.stateTable.grantReadData(orchestratorPolicy);
     props.snsErrorReportingTopic.grantPublish(orchestratorPolicy);
     props.scheduleLogGroup.grantWrite(orchestratorPolicy);
 